@@ -4,7 +4,8 @@ Servidor Flask para o PMO Dashboard.
 Não chama mais o PWA diretamente — lê os snapshots gerados por fetcher.py.
 Tudo do dashboard fica instantâneo (lê de disco).
 
-Para atualizar os dados manualmente: POST /api/refresh (chama fetcher.py).
+Para atualizar os dados manualmente: POST /api/refresh (roda fetcher.main numa
+thread do próprio app).
 Para fluxo automático: Windows Task Scheduler roda fetcher.py 3x/dia.
 """
 import io
@@ -16,6 +17,7 @@ import sys
 import tempfile
 import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
 
 # ── SSE keepalive (encerra servidor quando o browser fecha) ──────────────────
@@ -28,7 +30,10 @@ matplotlib.use('Agg')
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 
+import progresso
 import pwa_client
+import snapshot
+import telemetria
 
 # ── Scripts das ferramentas (subpastas locais por função) ─────────────────────
 _HERE_DIR = Path(__file__).parent
@@ -45,7 +50,10 @@ sys.path.insert(0, str(_HERE_DIR / 'entregas'))
 
 from Report import gerar_relatorio_web_json
 import comparador
+import comparativos
+import rede
 import report_base
+import saude_calculada
 import saude
 import entregas
 from gantt_projetos import gerar_para_web_json as _gerar_projetos_web_json
@@ -70,21 +78,223 @@ HERE     = Path(__file__).parent
 DATA_DIR = HERE / "data"
 
 report_base.DATA_DIR = DATA_DIR
+saude_calculada.DATA_DIR = DATA_DIR
+comparativos.DATA_DIR = DATA_DIR
+# A coleta dentro do app compara na própria thread: pool de processos num
+# processo com as threads do Flask, não (ver comparativos.py).
+comparativos.PROCESSOS = 1
 
 app = Flask(__name__, static_folder=str(HERE))
 CORS(app)
 
+# Andamento do fetcher, empurrado por ele (progresso.py). Aberto no __main__;
+# a coleta que roda aqui dentro publica direto, sem socket.
+_progresso = progresso.Canal()
+progresso.LOCAL = _progresso
+
+
+class _Coleta:
+    """O fetcher rodando numa thread do app — no máximo um run por vez.
+
+    Antes cada Atualizar abria um Python novo (fetcher.py): reimportava
+    requests, msal, aiohttp e a análise de saúde, relia o cache de token e
+    reabria o índice das tabelas de pesquisa, e só então começava. Aqui o
+    fetcher.main roda no processo que já tem tudo isso carregado, e o
+    pedido volta assim que a thread sobe.
+
+    Pedido com um run em curso não abre outro: devolve o run_id do que está
+    rodando, e o browser passa a acompanhá-lo. `cancelar()` sinaliza o
+    evento que o fetcher.main confere entre um projeto e outro.
+
+    A exclusão é deste processo: um fetcher do Agendador rodando ao mesmo
+    tempo não é barrado, como não era antes.
+    """
+
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._run_id: str | None = None
+        self._cancelar: threading.Event | None = None
+
+    @property
+    def rodando(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def disparar(self, forcar: bool = False) -> tuple[str, bool]:
+        """(run_id, novo). Com um run em curso, o dele e novo=False."""
+        from datetime import datetime
+
+        with self._lock:
+            if self.rodando:
+                return self._run_id, False
+            run_id = datetime.now().isoformat(timespec="seconds")
+            self._publicar(run_id, "iniciando", "Iniciando coleta…", ativo=True)
+            self._run_id   = run_id
+            self._cancelar = threading.Event()
+            self._thread   = threading.Thread(
+                target=self._rodar, args=(run_id, forcar, self._cancelar),
+                name="coleta", daemon=True)
+            self._thread.start()
+            return run_id, True
+
+    def cancelar(self) -> str | None:
+        """Pede o fim do run em curso. Devolve o run_id dele (None se não há)."""
+        with self._lock:
+            if not self.rodando:
+                return None
+            self._cancelar.set()
+            return self._run_id
+
+    def esperar(self, timeout: float | None = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _rodar(self, run_id: str, forcar: bool, cancelar: threading.Event) -> None:
+        try:
+            import fetcher
+            fetcher.log_no_app()
+            codigo = fetcher.main(forcar=forcar, run_id=run_id, cancelar=cancelar)
+            log.info("Coleta %s terminou (código %d).", run_id, codigo)
+        except Exception as exc:
+            # O fetcher.main trata o que espera; isto é o inesperado. Sem o
+            # andamento de erro a barra esperaria 3 min para desistir.
+            log.exception("Coleta %s falhou:", run_id)
+            self._publicar(run_id, "erro", f"A coleta falhou: {exc}", ativo=False)
+
+    @staticmethod
+    def _publicar(run_id: str, fase: str, rotulo: str, ativo: bool) -> None:
+        """Andamento dado pelo app: no canal e no arquivo (o processo pode cair)."""
+        from datetime import datetime
+
+        evento = {
+            "run_id":        run_id,
+            "fase":          fase,
+            "rotulo":        rotulo,
+            "feito":         0,
+            "total":         0,
+            "ativo":         ativo,
+            "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+        }
+        _progresso.publicar(evento)
+        try:
+            arquivo = DATA_DIR / "fetch_progress.json"
+            tmp = arquivo.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(evento, ensure_ascii=False, indent=2), encoding="utf-8")
+            tmp.replace(arquivo)
+        except Exception as exc:
+            # Andamento é acessório — a coleta vale mais que a barra.
+            log.warning("Não foi possível gravar o andamento (%s): %s", fase, exc)
+
+
+_coleta = _Coleta()
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
+class _CacheDeSnapshots:
+    """Snapshots já lidos, guardados em memória até o arquivo mudar no disco.
+
+    Cada entrada guarda a assinatura (st_mtime_ns, st_size) dos arquivos de
+    que saiu e só vale enquanto ela bater. O fetcher grava tudo com tmp +
+    replace, então um snapshot novo é sempre um arquivo novo, com mtime novo:
+    a invalidação vem de graça, sem o fetcher precisar avisar o app.
+
+    O stat é tirado ANTES da leitura. Se o arquivo for trocado entre as duas,
+    a entrada fica com conteúdo novo e assinatura velha — e é relida no
+    próximo pedido. Na ordem inversa ela ficaria com conteúdo velho e
+    assinatura nova, e nunca mais seria relida.
+
+    O limite é em bytes de disco dos arquivos guardados (LRU). É medida
+    relativa, não a memória do processo: um JSON parseado ocupa várias vezes
+    o tamanho do arquivo. Os objetos devolvidos são compartilhados entre
+    requisições — quem os recebe não pode alterá-los.
+    """
+
+    def __init__(self, limite_bytes: int):
+        self.limite_bytes = limite_bytes
+        self._lock     = threading.Lock()
+        self._entradas: "OrderedDict[object, tuple]" = OrderedDict()
+        self._bytes    = 0
+
+    @staticmethod
+    def _assinatura(arquivos) -> tuple:
+        assinatura = []
+        for arq in arquivos:
+            try:
+                st = arq.stat()
+                assinatura.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                assinatura.append(None)
+        return tuple(assinatura)
+
+    def obter(self, chave, arquivos, ler):
+        """Valor de `ler()` para `arquivos`, relido só se algum deles mudou."""
+        assinatura = self._assinatura(arquivos)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == assinatura:
+                self._entradas.move_to_end(chave)
+                return entrada[1]
+        valor = ler()
+        custo = sum(a[1] for a in assinatura if a is not None)
+        with self._lock:
+            antiga = self._entradas.pop(chave, None)
+            if antiga is not None:
+                self._bytes -= antiga[2]
+            if custo <= self.limite_bytes:
+                self._entradas[chave] = (assinatura, valor, custo)
+                self._bytes += custo
+                while self._bytes > self.limite_bytes:
+                    _, (_, _, c) = self._entradas.popitem(last=False)
+                    self._bytes -= c
+        return valor
+
+
+CACHE_MB = 256
+_cache = _CacheDeSnapshots(CACHE_MB << 20)
+
+
 def _read_json(path: Path, default):
-    if not path.exists():
-        return default
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        data = _cache.obter(path, (path,), lambda: (
+            json.loads(path.read_text(encoding="utf-8")) if path.exists() else None))
     except Exception as exc:
         log.error("Erro lendo %s: %s", path, exc)
         return default
+    return default if data is None else data
+
+
+def _tarefas(pid: str):
+    """Tarefas do snapshot do projeto — do .col compacto quando em dia.
+
+    Devolve uma sequência (snapshot.Tarefas ou list); quem vai serializar
+    chama list(). None se não houver snapshot ou se ele estiver ilegível.
+    A entrada do cache depende dos dois arquivos: qualquer um que mude decide
+    de novo de onde ler.
+    """
+    arquivos = (DATA_DIR / f"tasks_{pid}.json", snapshot.caminho(DATA_DIR, pid))
+    try:
+        return _cache.obter(("tarefas", pid), arquivos,
+                            lambda: snapshot.carregar(DATA_DIR, pid))
+    except Exception as exc:
+        log.error("Erro lendo as tarefas de %s: %s", pid, exc)
+        return None
+
+
+def _grafo(pid: str, tarefas):
+    """O rede.Grafo de `tarefas` (as de _tarefas(pid)), montado uma vez por versão.
+
+    A saúde e o comparativo do report andam pela mesma hierarquia e pela mesma
+    rede; com a entrada no cache, quem chega depois reaproveita o índice. A
+    entrada guarda de quais tarefas saiu: se o snapshot foi trocado entre a
+    leitura das tarefas e esta chamada, o grafo guardado é de outra versão, e
+    monta-se um para estas.
+    """
+    arquivos = (DATA_DIR / f"tasks_{pid}.json", snapshot.caminho(DATA_DIR, pid))
+    origem, grafo = _cache.obter(("grafo", pid), arquivos,
+                                 lambda: (tarefas, rede.indexar(tarefas)))
+    return grafo if origem is tarefas else rede.indexar(tarefas)
 
 
 # Projeto mestre consolidado de alocação da equipe (único com recursos
@@ -102,7 +312,7 @@ def _master_tasks() -> list:
     mestre = next((p for p in projetos if _is_master(p)), None)
     if not mestre or not mestre.get("id"):
         return []
-    return _read_json(DATA_DIR / f"tasks_{mestre['id']}.json", []) or []
+    return _tarefas(mestre["id"]) or []
 
 
 # ── Arquivos estáticos ────────────────────────────────────────────────────────
@@ -161,10 +371,10 @@ def projects():
 
 @app.route("/api/tasks/<project_id>")
 def tasks(project_id: str):
-    data = _read_json(DATA_DIR / f"tasks_{project_id}.json", None)
+    data = _tarefas(project_id)
     if data is None:
         return jsonify({"error": "Tarefas não disponíveis para esse projeto."}), 404
-    return jsonify(data)
+    return jsonify(list(data))
 
 
 @app.route("/api/status")
@@ -179,21 +389,79 @@ def status():
     }))
 
 
-@app.route("/api/progress")
-def progress():
-    """Andamento do fetcher em curso (alimenta a barra do botão Atualizar).
+def _andamento() -> dict:
+    """O andamento mais novo: o empurrado pelo fetcher ou, sem ele, o do arquivo.
 
-    Quem escreve é o fetcher; aqui só se repassa o arquivo. Sem arquivo, devolve
-    um andamento vazio — é o estado normal entre coletas.
+    O arquivo só muda a cada fase; o canal recebe todo avanço. O canal só perde
+    para o arquivo quando este é de um run mais novo — fetcher que rodou sem o
+    app ouvindo (run_id é o carimbo de início, em ISO: compara como texto).
     """
-    return jsonify(_read_json(DATA_DIR / "fetch_progress.json", {
+    arquivo = _read_json(DATA_DIR / "fetch_progress.json", {
         "run_id": None,
         "fase":   "ocioso",
         "rotulo": "",
         "feito":  0,
         "total":  0,
         "ativo":  False,
-    }))
+    })
+    _, empurrado = _progresso.atual()
+    if empurrado and (empurrado.get("run_id") or "") >= (arquivo.get("run_id") or ""):
+        return empurrado
+    return arquivo
+
+
+@app.route("/api/progress")
+def progress():
+    """Andamento do fetcher em curso (alimenta a barra do botão Atualizar).
+
+    Quem publica é o fetcher; aqui só se repassa. Sem andamento nenhum, devolve
+    um vazio — é o estado normal entre coletas.
+    """
+    return jsonify(_andamento())
+
+
+@app.route("/api/progress/stream")
+def progress_stream():
+    """SSE com cada andamento do fetcher assim que ele chega.
+
+    O primeiro evento é o andamento atual; depois, um por avanço. A cada 15 s
+    sem novidade vai um comentário, para proxy nenhum fechar a conexão parada.
+    """
+    from flask import Response, stream_with_context
+
+    def stream():
+        versao, _ = _progresso.atual()
+        yield f"data: {json.dumps(_andamento(), ensure_ascii=False)}\n\n"
+        while True:
+            nova, evento = _progresso.esperar(versao, timeout=15)
+            if nova == versao:
+                yield ": ok\n\n"
+                continue
+            versao = nova
+            yield f"data: {json.dumps(evento, ensure_ascii=False)}\n\n"
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/telemetria")
+def api_telemetria():
+    """Tempos dos últimos runs do fetcher, por fase e dos projetos mais lentos.
+
+    `?runs=N` limita a janela (padrão 60, uns 20 dias). O arquivo só muda ao
+    fim de cada run, então o resumo sai do cache até lá.
+    """
+    n = max(1, min(request.args.get("runs", 60, type=int), telemetria.RETER))
+    arquivo = telemetria.caminho()
+    try:
+        return jsonify(_cache.obter(("telemetria", n), (arquivo,),
+                                    lambda: telemetria.painel(n)))
+    except Exception as exc:
+        log.error("Erro lendo %s: %s", arquivo, exc)
+        return jsonify({"error": str(exc)}), 500
 
 
 @app.route("/api/keepalive")
@@ -220,6 +488,10 @@ def keepalive():
 
             def _maybe_exit():
                 time.sleep(1)          # aguarda possível reload da página
+                # A coleta roda aqui dentro: fechar o browser no meio não
+                # pode matá-la junto. Sai quando ela terminar.
+                while _clients <= 0 and _coleta.rodando:
+                    _coleta.esperar(timeout=5)
                 if _clients <= 0:
                     log.info("Sem browsers ativos — encerrando em 1 s…")
                     time.sleep(1)
@@ -236,43 +508,29 @@ def keepalive():
 
 @app.route("/api/refresh", methods=["POST"])
 def refresh():
-    """Dispara o fetcher manualmente em background. Útil para forçar refresh.
+    """Dispara a coleta (fetcher.main) numa thread do app. `{"full": true}` força tudo.
 
-    O andamento inicial é gravado aqui, antes do Popen: o processo leva alguns
-    segundos para subir e escrever o primeiro progresso, e sem isso a barra
-    ficaria parada na sobra do run anterior. O run_id devolvido é o que o browser
-    usa para reconhecer o andamento deste run — e ignorar o de qualquer outro.
+    Com uma coleta em curso, não abre outra: devolve o run_id dela, e quem
+    pediu acompanha o mesmo andamento. O run_id é o que o browser usa para
+    reconhecer o andamento deste run — e ignorar o de qualquer outro.
     """
-    from datetime import datetime
-
-    run_id = datetime.now().isoformat(timespec="seconds")
+    forcar = bool((request.get_json(silent=True) or {}).get("full"))
     try:
-        progresso = DATA_DIR / "fetch_progress.json"
-        tmp = progresso.with_suffix(".json.tmp")
-        tmp.write_text(json.dumps({
-            "run_id":        run_id,
-            "fase":          "iniciando",
-            "rotulo":        "Iniciando coleta…",
-            "feito":         0,
-            "total":         0,
-            "ativo":         True,
-            "atualizado_em": run_id,
-        }, ensure_ascii=False, indent=2), encoding="utf-8")
-        tmp.replace(progresso)
+        run_id, novo = _coleta.disparar(forcar)
     except Exception as exc:
-        # Andamento é acessório — a coleta vale mais que a barra.
-        log.warning("Não foi possível gravar o andamento inicial: %s", exc)
-
-    try:
-        subprocess.Popen(
-            [sys.executable, str(HERE / "fetcher.py"), "--run-id", run_id],
-            cwd=str(HERE),
-            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
-        )
-        return jsonify({"started": True, "run_id": run_id})
-    except Exception as exc:
-        log.error("Erro ao iniciar fetcher: %s", exc)
+        log.error("Erro ao iniciar a coleta: %s", exc)
         return jsonify({"error": str(exc)}), 500
+    if not novo:
+        log.info("Atualizar com coleta em curso — acompanhando %s.", run_id)
+    return jsonify({"started": novo, "run_id": run_id})
+
+
+@app.route("/api/refresh/cancel", methods=["POST"])
+def refresh_cancel():
+    """Pede o fim da coleta em curso: o que está em voo é abortado, e os
+    projetos pendentes voltam a ser coletados no próximo run."""
+    run_id = _coleta.cancelar()
+    return jsonify({"cancelado": run_id is not None, "run_id": run_id})
 
 
 # ── Ferramentas (GUI integrado) ───────────────────────────────────────────────
@@ -289,8 +547,8 @@ def _secao_comparativa(project_id: str, tarefas: list):
         return None, {"aviso": "Primeiro report deste projeto — o comparativo "
                                "aparece a partir do próximo."}
     try:
-        return comparador.secao_desde_base(base, tarefas), \
-               {"desde": report_base.data(base)}
+        secao = comparador.secao_desde_base(base, tarefas, _grafo(project_id, tarefas))
+        return secao, {"desde": report_base.data(base)}
     except Exception as exc:
         # Comparativo é acessório: se ele falhar, o report sai sem a seção em
         # vez de o usuário ficar sem relatório nenhum.
@@ -298,6 +556,22 @@ def _secao_comparativa(project_id: str, tarefas: list):
         return None, {"aviso": f"Comparativo indisponível: {exc}"}
 
 
+def _rebasear_comparativo(project_id: str, tarefas, publicado_em: str | None) -> None:
+    """Põe no índice da carteira o comparativo contra a base recém-gravada.
+
+    A entrada antiga media o período que este report acabou de fechar; sem a
+    troca, a revisão da carteira mostraria até a próxima coleta um atraso já
+    reportado.
+    """
+    try:
+        base = report_base.carregar(project_id)
+        comparativos.gravar(project_id, base and comparativos.resumir(
+            project_id, base, tarefas, publicado_em))
+    except Exception as exc:
+        log.warning("Comparativo da carteira não atualizado para %s: %s",
+                    project_id[:8], exc)
+
+
 @app.route("/api/report-json", methods=["POST"])
 def api_report_json():
     """Report Semanal 2.0 — gera o relatório direto do snapshot JSON do PWA,
@@ -313,7 +587,7 @@ def api_report_json():
         nome       = (data.get("nome_projeto") or "").strip()
         if not project_id:
             return jsonify({"error": "Selecione um projeto."}), 400
-        tarefas = _read_json(DATA_DIR / f"tasks_{project_id}.json", None)
+        tarefas = _tarefas(project_id)
         if tarefas is None:
             return jsonify({"error": "Tarefas não disponíveis para esse projeto no snapshot."}), 404
 
@@ -327,6 +601,7 @@ def api_report_json():
         # Só depois de o relatório existir: base gravada num report que falhou
         # ao ser montado engoliria o período seguinte.
         report_base.gravar(project_id, tarefas, (match or {}).get("publicadoEm"))
+        _rebasear_comparativo(project_id, tarefas, (match or {}).get("publicadoEm"))
         return jsonify({"success": True, "content": conteudo, "filename": nome_arq,
                         "comparativo": info})
     except Exception as exc:
@@ -347,7 +622,7 @@ def api_entregas():
         nome       = (data.get("nome_projeto") or "").strip()
         if not project_id:
             return jsonify({"error": "Selecione um projeto."}), 400
-        tarefas = _read_json(DATA_DIR / f"tasks_{project_id}.json", None)
+        tarefas = _tarefas(project_id)
         if tarefas is None:
             return jsonify({"error": "Tarefas não disponíveis para esse projeto no snapshot."}), 404
 
@@ -365,20 +640,46 @@ def api_entregas():
 
 # ── Análise de Saúde dos Cronogramas ──────────────────────────────────────────
 
+def _saude(pid: str, projeto: dict | None, detalhada: bool = True) -> dict | None:
+    """Análise de saúde do projeto, como saude_calculada a guarda.
+
+    Vale a que estiver gravada se ainda retratar a publicação atual com as
+    regras atuais (saude_calculada.vale). Se não, analisa aqui, grava — para
+    o próximo pedido e para depois de reiniciar o app — e devolve. Normalmente
+    quem já calculou foi o fetcher; chegam aqui o snapshot anterior a ele, o
+    cálculo que falhou na coleta e a mudança de regras antes do próximo run.
+
+    Sem `detalhada` (o painel geral, que só conta) serve também a análise sem
+    a lista de tarefas apontadas, e é assim que ela é feita aqui.
+
+    None se o projeto não tem snapshot. Erro da análise sobe para quem chamou.
+    """
+    publicado_em = (projeto or {}).get("publicadoEm")
+    pronta = _read_json(saude_calculada.caminho(pid), None)
+    if saude_calculada.vale(pronta, publicado_em, detalhada):
+        return pronta
+    tarefas = _tarefas(pid)
+    if tarefas is None:
+        return None
+    return saude_calculada.calcular(pid, tarefas, (projeto or {}).get("name", ""),
+                                    publicado_em, _grafo(pid, tarefas), detalhada)
+
+
 @app.route("/api/saude/<project_id>")
 def api_saude(project_id: str):
     """Análise completa de um cronograma: KPIs, notas e score."""
-    tarefas = _read_json(DATA_DIR / f"tasks_{project_id}.json", None)
-    if tarefas is None:
-        return jsonify({"error": "Tarefas não disponíveis para esse projeto."}), 404
     projetos = _read_json(DATA_DIR / "projects.json", []) or []
-    nome = next((p.get("name", "") for p in projetos
-                 if str(p.get("id")) == project_id), "")
+    projeto = next((p for p in projetos if str(p.get("id")) == project_id), None)
     try:
-        return jsonify(saude.analisar(tarefas, nome, project_id))
+        pronta = _saude(project_id, projeto)
     except Exception as exc:
         log.exception("Erro na análise de saúde de %s:", project_id[:8])
         return jsonify({"error": str(exc)}), 500
+    if pronta is None:
+        return jsonify({"error": "Tarefas não disponíveis para esse projeto."}), 404
+    # O nome vem do projects.json: renomear no PWA não republica, e a análise
+    # guardada ficaria com o nome antigo.
+    return jsonify({**pronta["analise"], "nome": (projeto or {}).get("name", "")})
 
 
 @app.route("/api/saude")
@@ -387,6 +688,9 @@ def api_saude_todos():
 
     O projeto mestre consolidado fica de fora: é uma agregação de alocação, não
     um cronograma de obra, e as regras daqui não se aplicam a ele.
+
+    Normalmente é só leitura: o resumo de cada projeto vem pronto do fetcher.
+    Projeto sem análise válida é analisado aqui mesmo (ver _saude).
     """
     projetos = _read_json(DATA_DIR / "projects.json", []) or []
     saida, erros = [], []
@@ -394,14 +698,15 @@ def api_saude_todos():
         pid = str(p.get("id"))
         if _is_master(p):
             continue
-        tarefas = _read_json(DATA_DIR / f"tasks_{pid}.json", None)
-        if not tarefas:
-            continue
         try:
-            saida.append(saude.resumo(tarefas, p.get("name", ""), pid))
+            pronta = _saude(pid, p, detalhada=False)
         except Exception as exc:
             log.warning("Saúde indisponível para %s: %s", pid[:8], exc)
             erros.append({"id": pid, "nome": p.get("name", ""), "error": str(exc)})
+            continue
+        if not pronta or not pronta["analise"]["tarefas"]:
+            continue
+        saida.append({**pronta["resumo"], "nome": p.get("name", "")})
     saida.sort(key=lambda s: s["score"])
     media = round(sum(s["score"] for s in saida) / len(saida), 1) if saida else 0.0
     # Cabeçalho do mapa de calor: nome e peso de cada indicador, na ordem fixa
@@ -412,6 +717,24 @@ def api_saude_todos():
                     "indicadores": indicadores})
 
 
+@app.route("/api/comparativos")
+def api_comparativos():
+    """O que mudou em cada projeto desde o último report, para a carteira toda.
+
+    Só leitura: o índice vem pronto do fetcher (comparativos.py). Os projetos
+    saem do maior atraso para o maior adiantamento; o nome vem do
+    projects.json, como na saúde.
+    """
+    projetos = {str(p.get("id")): p for p in _read_json(DATA_DIR / "projects.json", []) or []}
+    indice = _read_json(comparativos.caminho(), {})
+    saida = [{**r, "nome": projetos[pid].get("name", "")}
+             for pid, r in (indice.get("projetos") or {}).items()
+             if pid in projetos and not _is_master(projetos[pid])]
+    saida.sort(key=lambda r: -(r.get("saldo") or 0))
+    return jsonify({"projetos": saida, "atualizadoEm": indice.get("atualizadoEm"),
+                    "topo": comparador.TOPO_OFENSORES})
+
+
 @app.route("/api/desembolso", methods=["POST"])
 def api_desembolso():
     try:
@@ -535,5 +858,12 @@ if __name__ == "__main__":
     print(f"  Dados:   {DATA_DIR}")
     print("  Acesse:  http://localhost:5000")
     print("=" * 60 + "\n")
+    progresso.DATA_DIR = DATA_DIR
+    try:
+        _progresso.abrir()
+    except OSError as exc:
+        # Sem o canal, a barra anda pelo arquivo — a cada fase em vez de a
+        # cada projeto.
+        log.warning("Canal de andamento indisponível: %s", exc)
     threading.Timer(1.2, lambda: webbrowser.open("http://localhost:5000")).start()
     app.run(debug=False, port=5000, use_reloader=False, threaded=True)
@@ -0,0 +1,90 @@
+"""
+fluxo_prefixos.py — Corta o payload de tarefas em cada byte e confere o fluxo.py.
+
+    python bancada/fluxo_prefixos.py
+
+O contrato do fluxo.LeitorEmFluxo é que payload cortado — a conexão que cai
+no meio — termine em JsonIncompleto, onde quer que o corte caia: dentro de
+um valor, depois de uma chave, antes de um `}`, `]` ou `,`. Aqui um payload
+pequeno, nos dois formatos OData (verbose e minimalmetadata), é dado ao
+leitor em todos os prefixos, de uma vez e byte a byte:
+
+  - o payload inteiro devolve os itens e o `resto` do json.loads;
+  - todo prefixo próprio termina em JsonIncompleto, nunca em ValueError puro.
+
+Sem rede e sem o PWA falso: só o leitor. Sai com 1 no primeiro prefixo que
+fugir do contrato.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import fluxo                                    # noqa: E402
+from pwa_client import _CAMINHO_TAREFAS         # noqa: E402
+
+TAREFAS = [
+    {"Id": "a1", "Name": "Início", "OutlineLevel": 1, "PercentComplete": 0,
+     "Start": "2026-03-02T08:00:00", "IsMilestone": True},
+    {"Id": "b2", "Name": "Fundação \"bloco A\"", "OutlineLevel": 2,
+     "PercentComplete": 37.5, "Start": None, "Predecessors": []},
+    {"Id": "c3", "Name": "Fim", "OutlineLevel": 1, "Duration": 125,
+     "Assignments": [{"Resource": "Equipe 1"}, {"Resource": "Equipe 2"}]},
+]
+
+PAYLOADS = {
+    "verbose":         {"d": {"results": [{"Name": "Projeto", "Tasks": {
+                           "results": TAREFAS, "__next": None}}]}},
+    "minimalmetadata": {"odata.metadata": "x", "value": [{"Name": "Projeto",
+                                                         "Tasks": TAREFAS}]},
+}
+
+
+def _ler(dados: bytes, alvo: tuple, byte_a_byte: bool) -> tuple[list, object]:
+    leitor = fluxo.LeitorEmFluxo(alvo)
+    pedacos = [dados[i:i + 1] for i in range(len(dados))] if byte_a_byte else [dados]
+    itens = []
+    for p in pedacos:
+        itens += leitor.alimentar(p)
+    itens += leitor.fechar()
+    return itens, leitor.resto
+
+
+def _esperado(doc: dict, alvo: tuple) -> tuple[list, object]:
+    resto = copy.deepcopy(doc)
+    no = resto
+    for chave in alvo[:-1]:
+        no = no[chave]
+    itens, no[alvo[-1]] = no[alvo[-1]], []
+    return itens, resto
+
+
+def main() -> int:
+    for formato, doc in PAYLOADS.items():
+        alvo = _CAMINHO_TAREFAS[formato]
+        dados = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+        for byte_a_byte in (False, True):
+            if _ler(dados, alvo, byte_a_byte) != _esperado(doc, alvo):
+                print(f"{formato}: payload inteiro lido errado")
+                return 1
+        for n in range(len(dados)):
+            for byte_a_byte in (False, True):
+                try:
+                    _ler(dados[:n], alvo, byte_a_byte)
+                except fluxo.JsonIncompleto:
+                    continue
+                except ValueError as exc:
+                    print(f"{formato}, {n} bytes: {type(exc).__name__}: {exc}")
+                    return 1
+                print(f"{formato}, {n} bytes: prefixo aceito como documento")
+                return 1
+        print(f"{formato}: {len(dados)} prefixos, todos JsonIncompleto")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
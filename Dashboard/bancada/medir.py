@@ -0,0 +1,273 @@
+"""
+medir.py — Roda o fetcher contra o PWA falso e mede a coleta.
+
+    python bancada/medir.py                       # 16 projetos, coleta completa
+    python bancada/medir.py --tarefas 2000 --vagas 6 --rodadas 2
+    python bancada/medir.py --json >> medidas.jsonl
+    python bancada/medir.py --cassete data/cassete.zip --rodadas 3 --perfil fetch.prof
+
+Sobe o pwa_falso.py num processo à parte e roda fetcher.main em outro, um por
+rodada — como o Task Scheduler faz, com módulo, cache de lookup e sessão novos
+a cada run. Os dados vão para uma pasta temporária: o data/ de verdade não é
+tocado. A primeira rodada é --full; as seguintes são incrementais e, como o
+portfólio falso não republica nada, medem o caminho "nada mudou".
+
+Por rodada:
+  projetos/s, tarefas/s   coletados pela duração do fetcher.main
+  bytes                   no fio (comprimidos) e de JSON, contados pelo servidor
+  requisições, 429        vistos pelo servidor
+  pico de RSS             do processo do fetcher (resource no Linux/macOS,
+                          psutil no Windows se instalado; senão não mede)
+  concorrência            onde o governador assentou (last_update.json)
+
+Com --cassete, o servidor falso não sobe: cada rodada reproduz as respostas
+gravadas por `fetcher.py --record` (cassete.py), sem rede — o portfólio real,
+sempre igual, para medir só a normalização. Toda rodada é --full (reproduzir
+um incremental não coletaria nada), e os números do servidor não existem.
+--perfil ARQ grava o cProfile de cada rodada (ARQ, ARQ.2, ...) para o pstats.
+
+O stdout do fetcher fica calado (WARNING para cima); --verboso mostra o log.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.request import urlopen
+
+AQUI      = Path(__file__).parent
+DASHBOARD = AQUI.parent
+
+
+def _pico_rss_mb() -> float | None:
+    """Pico de memória residente deste processo, em MB."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 2 ** 20, 1)
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é KB no Linux e bytes no macOS.
+    return round(pico / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+# ── Rodada (processo filho) ───────────────────────────────────────────────────
+
+def _rodada(url: str | None, dados: Path, forcar: bool, concorrencia: int | None,
+            verboso: bool, cassete: str | None = None, perfil: str | None = None) -> dict:
+    """Um fetcher.main contra o PWA falso (ou a cassete), gravando em `dados`."""
+    import logging
+
+    sys.path.insert(0, str(DASHBOARD))
+    import comparativos
+    import fetcher
+    import progresso
+    import pwa_client
+    import report_base
+    import saude_calculada
+    import telemetria
+
+    # O fetcher abre o log em data/fetcher.log ao ser importado: aqui ele não
+    # escreve lá, e o stdout só recebe o que importa.
+    raiz = logging.getLogger()
+    for h in list(raiz.handlers):
+        raiz.removeHandler(h)
+    h = logging.StreamHandler(sys.stderr)
+    h.setLevel(logging.INFO if verboso else logging.WARNING)
+    h.setFormatter(logging.Formatter("  %(levelname)-7s %(name)s  %(message)s"))
+    raiz.addHandler(h)
+
+    fetcher.DATA_DIR      = dados
+    fetcher.STATE_FILE    = dados / "fetch_state.json"
+    fetcher.PROGRESS_FILE = dados / "fetch_progress.json"
+    saude_calculada.DATA_DIR = dados
+    comparativos.DATA_DIR = report_base.DATA_DIR = dados
+    telemetria.DATA_DIR = dados
+    progresso.DATA_DIR = dados
+    pwa_client.LOOKUP_CACHE_FILE = str(dados / "lookup_cache.sqlite")
+    if cassete:
+        pwa_client.usar_cassete(cassete, "reproduzir")
+    else:
+        pwa_client.apontar_para(url, token="bancada")
+
+    perfilador = None
+    if perfil:
+        import cProfile
+        perfilador = cProfile.Profile()
+    inicio = time.perf_counter()
+    if perfilador:
+        perfilador.enable()
+    codigo = fetcher.main(forcar=forcar,
+                          concorrencia=concorrencia or fetcher.CONCORRENCIA)
+    if perfilador:
+        perfilador.disable()
+        perfilador.dump_stats(perfil)
+    duracao = time.perf_counter() - inicio
+    pwa_client.fechar_cassete()
+
+    status = json.loads((dados / "last_update.json").read_text(encoding="utf-8"))
+    return {
+        "codigo":       codigo,
+        "duracao_s":    round(duracao, 2),
+        "coletados":    status.get("coletados", 0),
+        "tarefas":      status.get("tasks", 0),
+        "falhas":       len(status.get("errors") or []),
+        "concorrencia": status.get("concorrencia"),
+        "transporte":   status.get("transporte"),
+        "lista":        (status.get("lista_projetos") or {}).get("ultima"),
+        "pico_rss_mb":  _pico_rss_mb(),
+    }
+
+
+# ── Orquestração ──────────────────────────────────────────────────────────────
+
+def _estatisticas(url: str, zerar_pico: bool = False) -> dict:
+    raiz = url.split("/sites/")[0]
+    with urlopen(f"{raiz}/_bancada/estatisticas{'?zerar' if zerar_pico else ''}",
+                 timeout=10) as r:
+        return json.loads(r.read())
+
+
+def _subir_servidor(a) -> tuple[subprocess.Popen, str]:
+    cmd = [sys.executable, str(AQUI / "pwa_falso.py"), "--porta", "0",
+           "--projetos", str(a.projetos), "--tarefas", str(a.tarefas),
+           "--latencia", str(a.latencia), "--latencia-tarefa", str(a.latencia_tarefa),
+           "--vagas", str(a.vagas), "--estrangular", str(a.estrangular),
+           "--semente", str(a.semente)] + (["--projectdata"] if a.projectdata else [])
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    url = proc.stdout.readline().strip()
+    if not url:
+        proc.kill()
+        raise RuntimeError("O PWA falso não subiu.")
+    return proc, url
+
+
+def _medir(a) -> list[dict]:
+    proc, url = (None, "cassete") if a.cassete else _subir_servidor(a)
+    dados = Path(tempfile.mkdtemp(prefix="bancada_"))
+    medidas = []
+    try:
+        for i in range(a.rodadas):
+            full = i == 0 or bool(a.cassete)
+            antes = None if a.cassete else _estatisticas(url, zerar_pico=True)
+            cmd = [sys.executable, str(Path(__file__).resolve()), "--rodada", url,
+                   "--dados", str(dados)]
+            if full:
+                cmd.append("--full")
+            if a.cassete:
+                cmd += ["--cassete", str(Path(a.cassete).resolve())]
+            if a.perfil:
+                cmd += ["--perfil", a.perfil + (f".{i + 1}" if i else "")]
+            if a.concorrencia:
+                cmd += ["--concorrencia", str(a.concorrencia)]
+            if a.verboso:
+                cmd.append("--verboso")
+            saida = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True)
+            m = json.loads(saida.stdout.strip().splitlines()[-1])
+            servidor = None
+            if antes is not None:
+                depois = _estatisticas(url)
+                servidor = {k: depois[k] - antes[k] for k in depois if k != "em_voo_max"}
+                servidor["em_voo_max"] = depois["em_voo_max"]
+            d = m["duracao_s"] or 1e-9
+            tarefas = servidor["tarefas"] if servidor else m["tarefas"]
+            medidas.append({
+                "rodada":      i + 1,
+                "modo":        "full" if full else "incremental",
+                **m,
+                "projetos_s":  round(m["coletados"] / d, 2),
+                "tarefas_s":   round(tarefas / d, 1),
+                "servidor":    servidor,
+                "config":      {"cassete": a.cassete} if a.cassete else {k: getattr(a, k) for k in (
+                    "projetos", "tarefas", "latencia", "latencia_tarefa",
+                    "vagas", "estrangular", "semente", "concorrencia", "projectdata")},
+            })
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if a.manter:
+            print(f"Dados mantidos em {dados}", file=sys.stderr)
+        else:
+            shutil.rmtree(dados, ignore_errors=True)
+    return medidas
+
+
+def _imprimir(medidas: list[dict]) -> None:
+    for m in medidas:
+        s, c = m["servidor"], m["concorrencia"] or {}
+        print(f"Rodada {m['rodada']} ({m['modo']}): {m['duracao_s']:.2f}s"
+              + (f"  — código {m['codigo']}, {m['falhas']} falha(s)"
+                 if m["codigo"] or m["falhas"] else ""))
+        if s is None:
+            print(f"  {m['coletados']} projeto(s) reproduzido(s) da cassete, "
+                  f"{m['tarefas']} tarefa(s)  →  {m['projetos_s']} proj/s, "
+                  f"{m['tarefas_s']} tarefas/s")
+        else:
+            print(f"  {m['coletados']} projeto(s) coletado(s), {s['tarefas']} tarefa(s) "
+                  f"servidas  →  {m['projetos_s']} proj/s, {m['tarefas_s']} tarefas/s")
+            print(f"  {s['requisicoes']} requisição(ões) ({s['batches']} $batch), "
+                  f"{s['estrangulamentos']} × 429, pico de {s['em_voo_max']} em voo")
+            print(f"  {s['bytes'] / 2 ** 20:.2f} MB no fio, "
+                  f"{s['bytes_json'] / 2 ** 20:.2f} MB de JSON")
+        if m.get("lista"):
+            print(f"  lista de projetos: {m['lista']}")
+        rss = m["pico_rss_mb"]
+        print(f"  pico de RSS do fetcher: {f'{rss} MB' if rss is not None else 'não medido'}")
+        if c:
+            print(f"  concorrência: média {c['media']}, final {c['final']} "
+                  f"(teto {c['teto']})")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Mede o fetcher contra o PWA falso.")
+    ap.add_argument("--projetos", type=int, default=16)
+    ap.add_argument("--tarefas", type=int, default=800, help="média por cronograma")
+    ap.add_argument("--latencia", type=float, default=0.1)
+    ap.add_argument("--latencia-tarefa", type=float, default=0.0002)
+    ap.add_argument("--vagas", type=int, default=0)
+    ap.add_argument("--estrangular", type=float, default=0.0)
+    ap.add_argument("--semente", type=int, default=1)
+    ap.add_argument("--projectdata", action="store_true",
+                    help="o PWA falso serve o ProjectData (senão, 403 como no tenant)")
+    ap.add_argument("--concorrencia", type=int, default=None,
+                    help="teto do governador (padrão: o do fetcher)")
+    ap.add_argument("--rodadas", type=int, default=1)
+    ap.add_argument("--json", action="store_true", help="uma linha JSON por rodada")
+    ap.add_argument("--verboso", action="store_true", help="mostra o log do fetcher")
+    ap.add_argument("--manter", action="store_true", help="não apaga a pasta de dados")
+    ap.add_argument("--cassete", metavar="ARQ",
+                    help="reproduz a cassete em vez de subir o PWA falso")
+    ap.add_argument("--perfil", metavar="ARQ", help="grava o cProfile de cada rodada")
+    # Uso interno: o processo filho de cada rodada.
+    ap.add_argument("--rodada", metavar="URL", help=argparse.SUPPRESS)
+    ap.add_argument("--dados", help=argparse.SUPPRESS)
+    ap.add_argument("--full", action="store_true", help=argparse.SUPPRESS)
+    a = ap.parse_args(argv)
+
+    if a.rodada:
+        m = _rodada(None if a.cassete else a.rodada, Path(a.dados), a.full,
+                    a.concorrencia, a.verboso, a.cassete, a.perfil)
+        print(json.dumps(m, ensure_ascii=False))
+        return 0
+
+    medidas = _medir(a)
+    if a.json:
+        for m in medidas:
+            print(json.dumps(m, ensure_ascii=False))
+    else:
+        _imprimir(medidas)
+    return 0 if all(m["codigo"] == 0 and not m["falhas"] for m in medidas) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,532 @@
+"""
+pwa_falso.py — Um Project Server de mentira, para medir o fetcher sem o tenant.
+
+Serve, no mesmo formato do PWA, só o que o pwa_client pede:
+
+  GET  /sites/pwa/_api/ProjectServer/Projects          lista de Ids ($select=Id),
+                                                       batch de projetos com
+                                                       Draft/IncludeCustomFields,
+                                                       ou as tarefas de UM projeto
+                                                       ($expand=Tasks...)
+  GET  /sites/pwa/_api/ProjectServer/LookupTables      tabelas com Entries (todas,
+                                                       ou as do $filter por Id)
+  POST /sites/pwa/_api/$batch                          vários GETs num multipart
+  GET  /sites/pwa/_api/ProjectData/Projects            feed de relatórios, páginas
+                                                       de 100; 403 como no tenant,
+                                                       a menos que --projectdata
+  GET  /_bancada/estatisticas[?zerar]                  contadores (fora do PWA);
+                                                       ?zerar recomeça o pico em voo
+
+O portfólio é sintético e determinístico (mesma semente, mesmos projetos):
+tamanhos de cronograma espalhados em torno de `tarefas`, hierarquia, vínculos
+FS, atribuições, baseline faltando em parte das tarefas. Sem $select cada
+tarefa vem com os campos que o servidor de verdade manda a mais.
+
+O que se configura é o que pesa na coleta:
+
+  - latência: fixa por requisição + um tanto por tarefa do payload (cronograma
+    grande demora no servidor por ser grande);
+  - estrangulamento: `vagas` — acima de N requisições em voo, 429 com
+    Retry-After, como o SharePoint — e/ou uma fração aleatória de 429;
+  - formato: verboso ou JSON light, conforme o Accept; gzip se pedido;
+  - validadores: com --etag, cada GET leva ETag (hash do corpo) e o pedido
+    com If-None-Match igual volta 304, sem corpo e só com a latência fixa.
+    Sem ele, como o PWA de hoje: nada de ETag, e o condicional é ignorado.
+
+Só biblioteca padrão. Uso:
+    python bancada/pwa_falso.py --projetos 16 --tarefas 800 --latencia 0.2
+A primeira linha do stdout é a URL do PWA falso (com --porta 0, a porta é
+escolhida pelo sistema).
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+BASE = "/sites/pwa"
+
+# Os mesmos CF_PROJECT do pwa_client: o fetch_projects procura por estes Ids.
+CF_LOOKUP = {
+    "Cidade":      "bf41a3bd-bbd1-ee11-8cb9-00155de49236",
+    "Cliente":     "4bb21a18-69e1-ee11-b3a1-00155de44340",
+    "Coordenador": "58ddf97d-9bd4-ee11-a15a-00155de04e43",
+    "Status":      "d51e0c2e-42d2-ee11-ab3a-00155de43a39",
+    "TipoProjeto": "02ecf97c-26e2-ee11-9730-00155de09043",
+}
+CF_NUMERO = "0e73e9fa-58d2-ee11-bc6b-00155de08238"
+
+VALORES = {
+    "Cidade":      ["Belo Horizonte", "São Paulo", "Curitiba", "Recife", "Goiânia"],
+    "Cliente":     ["Construtora Alfa", "Grupo Beta", "Incorporadora Gama", "Prefeitura"],
+    "Coordenador": ["Ana Souza", "Bruno Lima", "Carla Dias", "Diego Reis"],
+    "Status":      ["Em andamento", "Concluído", "Pausado"],
+    "TipoProjeto": ["Arquitetura", "Interiores", "Urbanismo"],
+}
+RECURSOS = ["Ana", "Bia", "Caio", "Davi", "Elis", "Fábio", "Gil", "Hugo"]
+
+# Campos que só vêm quando o pedido não tem $select — o peso que ele corta.
+_EXTRAS = {"Notes": "", "Work": "PT40H", "ActualWork": "PT0S", "Cost": 0,
+           "Priority": 500, "ConstraintType": 0, "ConstraintStartEnd": None,
+           "IsManual": False, "IsSummary": False, "IsActive": True,
+           "ResumeDate": None, "StopDate": None, "Deadline": None,
+           "Created": "2024-02-01T10:00:00", "Modified": "2024-02-01T10:00:00"}
+
+
+# ── Portfólio sintético ───────────────────────────────────────────────────────
+
+def _guid(rnd: random.Random) -> str:
+    return str(uuid.UUID(int=rnd.getrandbits(128)))
+
+
+def _iso(d: date, hora: str = "08:00:00") -> str:
+    return f"{d.isoformat()}T{hora}"
+
+
+class Portfolio:
+    """Projetos, tarefas e tabelas de pesquisa, gerados uma vez pela semente."""
+
+    def __init__(self, projetos: int = 16, tarefas: int = 800, semente: int = 1):
+        rnd = random.Random(semente)
+        self.entradas: dict[str, list[tuple[str, str]]] = {
+            nome: [(_guid(rnd), v) for v in valores] for nome, valores in VALORES.items()
+        }
+        self.projetos: list[dict] = []
+        self._tarefas: dict[str, int] = {}
+        self._sementes: dict[str, int] = {}
+        for i in range(projetos):
+            pid = _guid(rnd)
+            # Média `tarefas`, de um quarto a quase o dobro: a carteira real
+            # mistura cronogramas de 150 e de 2.300 tarefas.
+            self._tarefas[pid] = max(5, rnd.randint(tarefas // 4, tarefas * 7 // 4))
+            self._sementes[pid] = rnd.getrandbits(32)
+            inicio = date(2025, 1, 6) + timedelta(days=rnd.randint(0, 300))
+            self.projetos.append({
+                "Id": pid, "Name": f"Projeto {i + 1:02d} — Sede {rnd.randint(1, 9)}",
+                "StartDate": _iso(inicio),
+                "FinishDate": _iso(inicio + timedelta(days=rnd.randint(200, 600)), "17:00:00"),
+                "LastPublishedDate": f"2026-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}"
+                                     f"T1{rnd.randint(0, 9)}:{rnd.randint(10, 59)}:00",
+                "_cf": {nome: rnd.choice(self.entradas[nome])[0] for nome in CF_LOOKUP},
+                "_numero": f"{rnd.randint(100, 999)}.000000",
+            })
+        self._por_id = {p["Id"]: p for p in self.projetos}
+
+    def existe(self, pid: str) -> bool:
+        return pid in self._por_id
+
+    def n_tarefas(self, pid: str) -> int:
+        return self._tarefas[pid]
+
+    # Entidades no formato verboso; o light sai delas por _light.
+
+    def projeto(self, pid: str) -> dict:
+        p = self._por_id[pid]
+        cfs = {f"Custom_x005f_{cf.replace('-', '')}":
+               {"__metadata": {"type": "Collection(Edm.String)"},
+                "results": [f"Entry_{p['_cf'][nome].replace('-', '')}"]}
+               for nome, cf in CF_LOOKUP.items()}
+        cfs[f"Custom_x005f_{CF_NUMERO.replace('-', '')}"] = p["_numero"]
+        return {
+            "__metadata": {"type": "PS.PublishedProject"},
+            "Id": pid, "Name": p["Name"], "StartDate": p["StartDate"],
+            "FinishDate": p["FinishDate"], "LastPublishedDate": p["LastPublishedDate"],
+            "ProjectSummaryTask": self._resumo(pid),
+            "Draft": {"__metadata": {"type": "PS.DraftProject"},
+                      "IncludeCustomFields": cfs},
+        }
+
+    def linha_relatorio(self, pid: str) -> dict:
+        """O projeto como linha do ProjectData: colunas planas, CF já em texto."""
+        p = self._por_id[pid]
+        r = self._resumo(pid)
+        linha = {"__metadata": {"type": "ReportingData.Project"},
+                 "ProjectId": pid, "ProjectName": p["Name"],
+                 "ProjectStartDate": r["Start"], "ProjectFinishDate": r["Finish"],
+                 "ProjectBaselineStartDate": r["BaselineStart"],
+                 "ProjectBaselineFinishDate": r["BaselineFinish"],
+                 "ProjectPercentCompleted": r["PercentComplete"],
+                 "ProjectLastPublishedDate": p["LastPublishedDate"],
+                 "Numero": p["_numero"]}
+        for nome in CF_LOOKUP:
+            linha[nome] = dict(self.entradas[nome])[p["_cf"][nome]]
+        return linha
+
+    def _resumo(self, pid: str) -> dict:
+        p = self._por_id[pid]
+        return {"__metadata": {"type": "PS.PublishedTask"},
+                "Id": pid, "Name": p["Name"], "Start": p["StartDate"],
+                "Finish": p["FinishDate"], "BaselineStart": p["StartDate"],
+                "BaselineFinish": p["FinishDate"], "PercentComplete": 40,
+                "IsCritical": False}
+
+    def tarefas(self, pid: str, com_select: bool) -> dict:
+        """O payload de $expand=Tasks de um projeto, como o PWA devolve."""
+        rnd = random.Random(self._sementes[pid])
+        p = self._por_id[pid]
+        base = date.fromisoformat(p["StartDate"][:10])
+        lista, ids, nivel = [], [], 1
+        for i in range(self._tarefas[pid]):
+            tid = _guid(rnd)
+            nivel = 1 if i == 0 else max(1, min(5, nivel + rnd.choice((-1, 0, 0, 1, 1))))
+            ini = base + timedelta(days=rnd.randint(0, 400))
+            dur = rnd.choice((0, 1, 3, 5, 10, 20, 40))
+            fim = ini + timedelta(days=dur)
+            vinculos = []
+            if ids and rnd.random() < 0.8:
+                for pred in rnd.sample(ids[-12:], min(len(ids[-12:]), rnd.randint(1, 2))):
+                    vinculos.append({"__metadata": {"type": "PS.TaskLink"},
+                                     "PredecessorTaskId": pred, "SuccessorTaskId": tid,
+                                     "DependencyType": 1,
+                                     "LinkLag": rnd.choice((0, 0, 0, 4800))})
+            atribuicoes = [{"__metadata": {"type": "PS.PublishedAssignment"},
+                            "Resource": {"__metadata": {"type": "PS.PublishedProjectResource"},
+                                         "Name": nome}}
+                           for nome in rnd.sample(RECURSOS, rnd.choice((0, 1, 1, 2)))]
+            t = {
+                "__metadata": {"type": "PS.PublishedTask"},
+                "Id": tid, "Name": f"Tarefa {i + 1} — execução",
+                "Start": _iso(ini), "Finish": _iso(fim, "17:00:00"),
+                "BaselineStart": "0001-01-01T00:00:00" if i % 9 == 0 else _iso(ini),
+                "BaselineFinish": "0001-01-01T00:00:00" if i % 9 == 0 else _iso(fim, "17:00:00"),
+                "OutlineLevel": nivel,
+                "PercentComplete": rnd.choice((0, 0, 25, 50, 100)),
+                "IsCritical": rnd.random() < 0.2, "IsMilestone": dur == 0,
+                "DurationMilliseconds": dur * 480 * 60 * 1000,
+                "Assignments": {"results": atribuicoes},
+                "Predecessors": {"results": vinculos},
+            }
+            if not com_select:
+                t.update(_EXTRAS)
+            lista.append(t)
+            ids.append(tid)
+        return {"d": {"results": [{
+            "__metadata": {"type": "PS.PublishedProject"},
+            "Id": pid, "ProjectSummaryTask": self._resumo(pid),
+            "Tasks": {"results": lista},
+        }]}}
+
+    def tabelas(self, ids: tuple[str, ...] = ()) -> dict:
+        """As tabelas de pesquisa — só as de `ids`, se vier o $filter."""
+        tabelas = [
+            {"__metadata": {"type": "PS.LookupTable"}, "Id": _guid(random.Random(nome)),
+             "Name": nome,
+             "Entries": {"results": [{"__metadata": {"type": "PS.LookupText"},
+                                      "Id": eid, "FullValue": valor}
+                                     for eid, valor in entradas]}}
+            for nome, entradas in self.entradas.items()]
+        return {"d": {"results": [t for t in tabelas if not ids or t["Id"] in ids]}}
+
+
+def _light(v):
+    """Verboso → JSON light: sem __metadata, coleções como lista direta."""
+    if isinstance(v, dict):
+        if "results" in v and set(v) <= {"results", "__metadata"}:
+            return [_light(x) for x in v["results"]]
+        return {k: _light(x) for k, x in v.items() if k != "__metadata"}
+    if isinstance(v, list):
+        return [_light(x) for x in v]
+    return v
+
+
+def _no_formato(payload: dict, light: bool) -> dict:
+    if not light:
+        return payload
+    return {"odata.metadata": f"{BASE}/_api/ProjectServer/$metadata",
+            "value": _light(payload["d"]["results"])}
+
+
+# ── Servidor ──────────────────────────────────────────────────────────────────
+
+class Config:
+    def __init__(self, latencia: float = 0.1, latencia_tarefa: float = 0.0002,
+                 vagas: int = 0, estrangular: float = 0.0, retry_after: int = 1,
+                 semente: int = 1, projectdata: bool = False, etag: bool = False):
+        self.latencia        = latencia          # s por requisição
+        self.latencia_tarefa = latencia_tarefa   # s a mais por tarefa do payload
+        self.vagas           = vagas             # 0 = sem limite de requisições em voo
+        self.estrangular     = estrangular       # fração de 429 aleatórios
+        self.retry_after     = retry_after
+        self.rnd             = random.Random(semente)
+        self.projectdata     = projectdata       # False = 403, como no tenant
+        self.etag            = etag              # ETag nas respostas e 304 no condicional
+
+
+class Estatisticas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dados = {"requisicoes": 0, "batches": 0, "estrangulamentos": 0,
+                      "bytes": 0, "bytes_json": 0, "tarefas": 0, "em_voo_max": 0,
+                      "nao_mudou": 0}
+        self.em_voo = 0
+
+    def somar(self, **valores) -> None:
+        with self._lock:
+            for k, v in valores.items():
+                self.dados[k] += v
+
+    def entrar(self) -> int:
+        with self._lock:
+            self.em_voo += 1
+            self.dados["em_voo_max"] = max(self.dados["em_voo_max"], self.em_voo)
+            return self.em_voo
+
+    def sair(self) -> None:
+        with self._lock:
+            self.em_voo -= 1
+
+    def copia(self, zerar_pico: bool = False) -> dict:
+        with self._lock:
+            dados = dict(self.dados)
+            if zerar_pico:
+                self.dados["em_voo_max"] = self.em_voo
+            return dados
+
+
+_GUID = re.compile(r"guid'([0-9a-fA-F-]{36})'")
+
+
+class PwaFalso(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, portfolio: Portfolio, config: Config):
+        super().__init__(endereco, _Atendente)
+        self.portfolio = portfolio
+        self.config    = config
+        self.stats     = Estatisticas()
+        self._corpos: dict[tuple, bytes] = {}   # payload serializado, por pedido
+        self._lock_corpos = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}{BASE}"
+
+    def responder(self, caminho: str, light: bool) -> tuple[int, bytes, int]:
+        """(status, corpo JSON, tarefas no payload) de um GET do PWA."""
+        partes = urlsplit(caminho)
+        rota = unquote(partes.path)
+        q = {k: v[0] for k, v in parse_qs(partes.query).items()}
+        ps = f"{BASE}/_api/ProjectServer/"
+        if rota == f"{BASE}/_api/ProjectData/Projects":
+            return self._relatorio(partes.query, q, light)
+        if rota == ps + "LookupTables":
+            ids = tuple(_GUID.findall(q.get("$filter", "")))
+            return 200, self._corpo(("tabelas", ids, light), lambda: _no_formato(
+                self.portfolio.tabelas(ids), light)), 0
+        if rota != ps + "Projects":
+            return 404, _erro("Recurso não existe no PWA falso."), 0
+        ids = _GUID.findall(q.get("$filter", ""))
+        expand = q.get("$expand", "")
+        if not ids:
+            topo = int(q.get("$top", 100))
+            lista = [{"__metadata": {"type": "PS.PublishedProject"}, "Id": p["Id"]}
+                     for p in self.portfolio.projetos[:topo]]
+            return 200, self._corpo(("ids", topo, light),
+                                    lambda: _no_formato({"d": {"results": lista}}, light)), 0
+        ids = [pid for pid in ids if self.portfolio.existe(pid)]
+        if "Tasks" in expand:
+            if len(ids) != 1:
+                return 400, _erro("$expand=Tasks só com um projeto no filtro."), 0
+            pid, com_select = ids[0], "$select" in q
+            corpo = self._corpo(("tarefas", pid, com_select, light), lambda: _no_formato(
+                self.portfolio.tarefas(pid, com_select), light))
+            return 200, corpo, self.portfolio.n_tarefas(pid)
+        if len(ids) > 20:
+            return 400, _erro("O limite de $expand é 20 projetos."), 0
+        chave = ("projetos", tuple(ids), light)
+        return 200, self._corpo(chave, lambda: _no_formato(
+            {"d": {"results": [self.portfolio.projeto(pid) for pid in ids]}}, light)), 0
+
+    def _relatorio(self, consulta: str, q: dict, light: bool) -> tuple[int, bytes, int]:
+        """Uma página do ProjectData/Projects — ou o 403 do tenant."""
+        if not self.config.projectdata:
+            return 403, _erro("GeneralSecurityAccessDenied"), 0
+        inicio = int(q.get("$skip", 0))
+        pagina = [self.portfolio.linha_relatorio(p["Id"])
+                  for p in self.portfolio.projetos[inicio:inicio + 100]]
+        payload = _no_formato({"d": {"results": pagina}}, light)
+        if inicio + 100 < len(self.portfolio.projetos):
+            consulta = re.sub(r"&?\$skip=\d+", "", consulta)
+            proxima = f"{self.url}/_api/ProjectData/Projects?{consulta}&$skip={inicio + 100}"
+            if light:
+                payload["odata.nextLink"] = proxima
+            else:
+                payload["d"]["__next"] = proxima
+        return 200, json.dumps(payload, ensure_ascii=False).encode("utf-8"), 0
+
+    def _corpo(self, chave: tuple, montar) -> bytes:
+        with self._lock_corpos:
+            corpo = self._corpos.get(chave)
+        if corpo is None:
+            corpo = json.dumps(montar(), ensure_ascii=False).encode("utf-8")
+            with self._lock_corpos:
+                self._corpos[chave] = corpo
+        return corpo
+
+    def estrangular(self, em_voo: int) -> bool:
+        c = self.config
+        if c.vagas and em_voo > c.vagas:
+            return True
+        return c.estrangular > 0 and c.rnd.random() < c.estrangular
+
+
+def _erro(mensagem: str) -> bytes:
+    return json.dumps({"error": {"code": "-1, Bancada",
+                                 "message": {"lang": "pt-BR", "value": mensagem}}},
+                      ensure_ascii=False).encode("utf-8")
+
+
+class _Atendente(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, como o SharePoint
+    server: PwaFalso
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _light(self) -> bool:
+        return "odata=minimalmetadata" in self.headers.get("Accept", "")
+
+    def _enviar(self, status: int, corpo: bytes, tipo: str = "application/json",
+                cabecalhos: dict | None = None) -> None:
+        n_json = len(corpo)
+        if "gzip" in self.headers.get("Accept-Encoding", "") and len(corpo) > 512:
+            corpo = gzip.compress(corpo, 6)
+            cabecalhos = {**(cabecalhos or {}), "Content-Encoding": "gzip"}
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+        self.server.stats.somar(bytes=len(corpo), bytes_json=n_json)
+
+    def _estrangulado(self) -> None:
+        self.server.stats.somar(estrangulamentos=1)
+        self._enviar(429, _erro("O servidor está ocupado."),
+                     cabecalhos={"Retry-After": str(self.server.config.retry_after)})
+
+    def _esperar(self, n_tarefas: int) -> None:
+        c = self.server.config
+        time.sleep(c.latencia + c.latencia_tarefa * n_tarefas)
+
+    def do_GET(self):
+        if self.path.startswith("/_bancada/estatisticas"):
+            zerar = "zerar" in self.path
+            self._enviar(200, json.dumps(self.server.stats.copia(zerar)).encode("utf-8"))
+            return
+        self.server.stats.somar(requisicoes=1)
+        em_voo = self.server.stats.entrar()
+        try:
+            if self.server.estrangular(em_voo):
+                self._estrangulado()
+                return
+            status, corpo, n = self.server.responder(self.path, self._light())
+            cabecalhos = None
+            if self.server.config.etag and status == 200:
+                etag = f'"{hashlib.sha1(corpo).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._esperar(0)
+                    self.server.stats.somar(nao_mudou=1)
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                cabecalhos = {"ETag": etag}
+            self._esperar(n)
+            self.server.stats.somar(tarefas=n)
+            self._enviar(status, corpo, f"application/json;odata="
+                         f"{'minimalmetadata' if self._light() else 'verbose'}", cabecalhos)
+        finally:
+            self.server.stats.sair()
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        pedido = self.rfile.read(tamanho)
+        if urlsplit(self.path).path != f"{BASE}/_api/$batch":
+            self._enviar(404, _erro("Recurso não existe no PWA falso."))
+            return
+        self.server.stats.somar(requisicoes=1, batches=1)
+        em_voo = self.server.stats.entrar()
+        try:
+            if self.server.estrangular(em_voo):
+                self._estrangulado()
+                return
+            m = re.search(r'boundary="?([^";]+)"?', self.headers.get("Content-Type", ""))
+            if not m:
+                self._enviar(400, _erro("$batch sem boundary."))
+                return
+            fronteira = "--" + m.group(1)
+            resposta, total = [], 0
+            for parte in pedido.decode("utf-8").split(fronteira)[1:]:
+                if parte.startswith("--"):
+                    break
+                linha = next(l for l in parte.splitlines() if l.startswith("GET "))
+                light = "odata=minimalmetadata" in parte
+                url = linha.split(" ")[1]
+                status, corpo, n = self.server.responder(urlsplit(url)._replace(
+                    scheme="", netloc="").geturl(), light)
+                total += n
+                resposta.append(
+                    "--batchresponse_bancada\r\n"
+                    "Content-Type: application/http\r\n"
+                    "Content-Transfer-Encoding: binary\r\n\r\n"
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Erro'}\r\n"
+                    "CONTENT-TYPE: application/json;odata="
+                    f"{'minimalmetadata' if light else 'verbose'}\r\n\r\n"
+                    + corpo.decode("utf-8") + "\r\n")
+            resposta.append("--batchresponse_bancada--\r\n")
+            self._esperar(total)
+            self._enviar(200, "".join(resposta).encode("utf-8"),
+                         "multipart/mixed; boundary=batchresponse_bancada")
+        finally:
+            self.server.stats.sair()
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Project Server falso para a bancada.")
+    ap.add_argument("--porta", type=int, default=8790, help="0 = o sistema escolhe")
+    ap.add_argument("--projetos", type=int, default=16)
+    ap.add_argument("--tarefas", type=int, default=800, help="média por cronograma")
+    ap.add_argument("--latencia", type=float, default=0.1, help="s por requisição")
+    ap.add_argument("--latencia-tarefa", type=float, default=0.0002,
+                    help="s a mais por tarefa do payload")
+    ap.add_argument("--vagas", type=int, default=0,
+                    help="acima disto em voo, 429 (0 = sem limite)")
+    ap.add_argument("--estrangular", type=float, default=0.0, help="fração de 429")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--semente", type=int, default=1)
+    ap.add_argument("--projectdata", action="store_true",
+                    help="serve o ProjectData em vez de responder 403")
+    ap.add_argument("--etag", action="store_true",
+                    help="ETag nas respostas e 304 para If-None-Match igual")
+    a = ap.parse_args(argv)
+
+    servidor = PwaFalso(("127.0.0.1", a.porta),
+                        Portfolio(a.projetos, a.tarefas, a.semente),
+                        Config(a.latencia, a.latencia_tarefa, a.vagas,
+                               a.estrangular, a.retry_after, a.semente,
+                               a.projectdata, a.etag))
+    print(servidor.url, flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
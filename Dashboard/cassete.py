@@ -0,0 +1,164 @@
+"""
+cassete.py — Respostas do PWA gravadas em disco e reproduzidas sem rede.
+
+Para medir o que o fetcher faz com os bytes (fetch_tasks, _extract_preds,
+_parse_date, o snapshot) sem o ruído da rede: um run grava as respostas do
+tenant de verdade numa cassete; os seguintes as reproduzem, iguais, quantas
+vezes for preciso, sem token e sem latência.
+
+A cassete é um .zip (deflate): um `indice.json` com status e cabeçalhos de cada
+resposta, e o corpo de cada uma num arquivo próprio — a reprodução lê só o
+corpo pedido, e um cronograma de dezenas de MB não precisa caber em memória
+com os outros. O corpo gravado é o já descomprimido do HTTP.
+
+A chave de cada resposta é a requisição normalizada (chave()): método, caminho
+sem o host, parâmetros ordenados e o formato OData pedido. Com isso
+_tasks_url(pid, com_select=True) e com_select=False são respostas diferentes,
+e uma cassete gravada no tenant reproduz com qualquer PWA_URL. No $batch a
+chave é a lista dos GETs das partes, na ordem — o corpo do POST tem uma
+fronteira aleatória.
+
+Não se grava 304, 401, 429 nem 5xx: reproduzidos, eles se repetiriam para
+sempre — e o 304 responderia, sem corpo, o mesmo pedido feito sem condição.
+Requisição sem resposta gravada levanta NaoGravado.
+
+A cassete tem os dados do portfólio (nomes, clientes, cronogramas): fica fora
+do controle de versão, como o .token_cache.json.
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+import zipfile
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+INDICE = "indice.json"
+_CABECALHOS = ("Content-Type", "Retry-After", "ETag", "Last-Modified")
+_ODATA = re.compile(r"odata=(\w+)")
+_LINHA_GET = re.compile(r"^GET (\S+) HTTP/1\.1", re.M)
+
+
+class NaoGravado(KeyError):
+    """A cassete não tem resposta para esta requisição."""
+
+
+def _gravavel(status: int) -> bool:
+    return status < 500 and status not in (304, 401, 429)
+
+
+def chave(metodo: str, url: str, accept: str | None = None,
+          corpo: bytes | str | None = None) -> str:
+    """A requisição normalizada que identifica a resposta na cassete."""
+    partes = urlsplit(url)
+    params = sorted(parse_qsl(partes.query, keep_blank_values=True))
+    formato = _ODATA.search(accept or "")
+    saida = f"{metodo.upper()} {unquote(partes.path)}"
+    if params:
+        saida += "?" + "&".join(f"{k}={v}" for k, v in params)
+    if corpo:
+        if isinstance(corpo, bytes):
+            corpo = corpo.decode("utf-8", "replace")
+        saida += " [" + " | ".join(chave("GET", u, _parte_accept(corpo))
+                                   for u in _LINHA_GET.findall(corpo)) + "]"
+    return saida + (f" ({formato.group(1)})" if formato else "")
+
+
+def _parte_accept(corpo: str) -> str | None:
+    m = _ODATA.search(corpo)
+    return m.group(0) if m else None
+
+
+class Cassete:
+    """Uma cassete aberta para gravar (`modo="gravar"`) ou reproduzir."""
+
+    def __init__(self, caminho: str | Path, modo: str):
+        if modo not in ("gravar", "reproduzir"):
+            raise ValueError(f"Modo de cassete desconhecido: {modo!r}")
+        self.caminho = Path(caminho)
+        self.modo    = modo
+        self.tocadas = 0
+        self._lock   = threading.Lock()
+        if modo == "gravar":
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._zip = zipfile.ZipFile(self.caminho, "w", zipfile.ZIP_DEFLATED)
+            self._indice: dict[str, dict] = {}
+        else:
+            self._zip = zipfile.ZipFile(self.caminho, "r")
+            self._indice = json.loads(self._zip.read(INDICE))
+
+    @property
+    def gravando(self) -> bool:
+        return self.modo == "gravar"
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def gravar(self, k: str, status: int, cabecalhos, corpo: bytes) -> None:
+        if not _gravavel(status):
+            return
+        cab = {n: cabecalhos[n] for n in _CABECALHOS if cabecalhos.get(n)}
+        with self._lock:
+            nome = f"corpos/{len(self._zip.namelist()):05d}"
+            self._zip.writestr(nome, corpo)
+            self._indice[k] = {"status": status, "cabecalhos": cab, "corpo": nome}
+
+    def tocar(self, k: str) -> tuple[int, dict, bytes]:
+        """(status, cabeçalhos, corpo) gravados para a chave `k`."""
+        g = self._indice.get(k)
+        if g is None:
+            raise NaoGravado(k)
+        with self._lock:
+            corpo = self._zip.read(g["corpo"])
+            self.tocadas += 1
+        return g["status"], dict(g["cabecalhos"]), corpo
+
+    def fechar(self) -> None:
+        with self._lock:
+            if self._zip is None:
+                return
+            if self.gravando:
+                self._zip.writestr(INDICE, json.dumps(self._indice, ensure_ascii=False,
+                                                      indent=1))
+            self._zip.close()
+            self._zip = None
+
+
+def adaptador(cassete: Cassete, base):
+    """HTTPAdapter do requests que grava ou reproduz pela cassete.
+
+    Gravando, passa a requisição ao `base` e guarda a resposta — lida inteira,
+    mesmo que o pedido fosse em fluxo. Reproduzindo, nem abre conexão.
+    """
+    import requests
+    from requests.adapters import BaseAdapter
+    from requests.structures import CaseInsensitiveDict
+
+    class _Adaptador(BaseAdapter):
+        # O resumo de transporte lê os pools daqui.
+        poolmanager = getattr(base, "poolmanager", None)
+
+        def send(self, request, **kwargs):
+            k = chave(request.method, request.url, request.headers.get("Accept"),
+                      request.body if request.method != "GET" else None)
+            if cassete.gravando:
+                resp = base.send(request, **kwargs)
+                cassete.gravar(k, resp.status_code, resp.headers, resp.content)
+                return resp
+            status, cab, corpo = cassete.tocar(k)
+            resp = requests.Response()
+            resp.status_code = status
+            resp.headers = CaseInsensitiveDict(cab)
+            resp.url = request.url
+            resp.request = request
+            resp.reason = "OK" if status < 400 else "Gravado"
+            resp.encoding = "utf-8"
+            resp._content = corpo
+            resp._content_consumed = True   # iter_content fatia o corpo
+            return resp
+
+        def close(self):
+            base.close()
+
+    return _Adaptador()
@@ -34,6 +34,7 @@ from __future__ import annotations
 from datetime import date
 
 TOPO_OFENSORES = 3   # tarefas em Principais Ofensores
+TOPO_FRENTES   = 3   # ramos em Atraso por Frente (só com dois ou mais)
 
 
 # ── Normalização ──────────────────────────────────────────────────────────────
@@ -171,11 +172,12 @@ def parear(anterior: list[dict], atual: list[dict]) -> dict:
 # ── Análise ───────────────────────────────────────────────────────────────────
 
 def comparar(anterior: list[dict], atual: list[dict],
-             brutos_atu: list[dict] | None = None) -> dict:
+             brutos_atu: list[dict] | None = None, grafo=None) -> dict:
     """Compara duas versões normalizadas.
 
     `brutos_atu` é a lista no formato do snapshot (com `preds`): sem ela não há
-    rede de dependências e, portanto, não há como apontar ofensores.
+    rede de dependências e, portanto, não há como apontar ofensores. `grafo` é
+    o rede.Grafo dela, se quem chama já o montou.
     """
     p = parear(anterior, atual)
 
@@ -203,15 +205,20 @@ def comparar(anterior: list[dict], atual: list[dict],
         # precisa deles como conduíte da propagação.
         deltas = {v["atu"]["id"]: v for v in variacoes if v["atu"]["id"]}
         causa  = rede.causa_do_prazo(saldo, raiz_b.get("termino"), deltas,
-                                     rede.indexar(brutos_atu),
-                                     ids_folha=rede.folhas(brutos_atu))
+                                     grafo or rede.indexar(brutos_atu))
         # A rede trabalha com os dicts brutos, que só têm o nome solto; o
-        # relatório precisa da grafia hierárquica e do término atual.
-        for g in causa["cadeia"]:
+        # relatório precisa da grafia hierárquica e do término atual. Os ramos
+        # (causa["ramos"]) ganham o mesmo, na raiz e nos geradores: a seção
+        # os lista em Atraso por Frente.
+        for g in causa["cadeia"] + [x for r in causa["ramos"] for x in r["geradores"]]:
             v = deltas.get(g["id"])
             if v:
                 g["rotulo"]  = rotulo(v["atu"])
                 g["termino"] = v["atu"].get("termino")
+        for r in causa["ramos"]:
+            v = deltas.get(r["raiz"])
+            if v:
+                r["rotulo"] = rotulo(v["atu"])
 
     return {
         "projeto": {
@@ -290,17 +297,33 @@ def secao_semanal(r: dict, data_ant: str) -> str:
             L.append("- Nenhuma tarefa aumentou de duração na cadeia que leva ao término: "
                      "o desvio veio de replanejamento, não de atraso de tarefa.")
 
+        # Os ofensores são só os da cadeia que chega ao término. Quando o
+        # aumento nasceu em mais de uma frente — cada ramo da floresta de
+        # empurradores (rede.Floresta) —, cada uma aparece com o que produziu
+        # e quem mais esticou nela. Com uma frente só, a lista repetiria os
+        # ofensores.
+        ramos = (causa or {}).get("ramos") or []
+        if len(ramos) >= 2:
+            L += ["", "🌳ATRASO POR FRENTE"]
+            for r in ramos[:TOPO_FRENTES]:
+                g = r["geradores"][0]
+                L.append("- %s: Aumento de %s somado em %d tarefa(s); a maior foi %s (%s)."
+                         % (r.get("rotulo") or r["nome"] or r["raiz"],
+                            dias_txt(r["aumento"]), len(r["geradores"]),
+                            g.get("rotulo") or g["nome"], dias_sinal(g["ddur"])))
+
     return "\n".join(L)
 
 
 # ── Construtor de alto nível ──────────────────────────────────────────────────
 
-def secao_desde_base(base: dict, tarefas_atuais: list[dict]) -> str:
+def secao_desde_base(base: dict, tarefas_atuais: list[dict], grafo=None) -> str:
     """Seção comparando o cronograma do último report com o de agora.
 
-    `base` é o que report_base.carregar() devolve.
+    `base` é o que report_base.carregar() devolve; `grafo`, o rede.Grafo de
+    `tarefas_atuais`, se quem chama já o tem.
     """
     import report_base
     r = comparar(de_base(base["tarefas"]), de_snapshot(tarefas_atuais),
-                 brutos_atu=tarefas_atuais)
+                 brutos_atu=tarefas_atuais, grafo=grafo)
     return secao_semanal(r, br(report_base.data(base)[:10]))
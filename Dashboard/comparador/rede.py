@@ -1,9 +1,9 @@
 """
 rede.py — Quem causou o deslocamento do término, pela rede de dependências.
 
-Por que não há cálculo de caminho crítico aqui
-----------------------------------------------
-A tentação seria reconstruir o CPM e distribuir o atraso ao longo da cadeia
+Por que a causa não sai do caminho crítico
+------------------------------------------
+A tentação seria usar o CPM e distribuir o atraso ao longo da cadeia
 crítica. Medido nos 17 cronogramas da Horizontes, não se sustenta:
 
   - as tarefas-folha marcadas como críticas cobrem de 3% a 17% do prazo do
@@ -33,6 +33,13 @@ As datas são de calendário e os vínculos são em dias úteis. Um empurrão de
 dias úteis aparece como 7 corridos, e feriados deslocam mais. Por isso o
 casamento entre o deslocamento de uma tarefa e o da sua predecessora usa
 TOL_DIAS de folga em vez de exigir igualdade exata.
+
+Folga
+-----
+Para a FOLGA o CPM é a conta certa, e Cpm a faz (ida e volta pela rede, em
+dias úteis): quanto cada tarefa pode escorregar antes de mover o término
+publicado. A saúde a usa no KPI de folga negativa; a causa, só para escolher
+a tarefa final quando o Project não marcou nenhuma como crítica.
 """
 from __future__ import annotations
 
@@ -54,25 +61,92 @@ def _dias(a: str | None, b: str | None) -> int | None:
 
 # ── Índice ────────────────────────────────────────────────────────────────────
 
-def indexar(tarefas: list[dict]) -> dict:
-    """Índice por id. `tarefas` no formato bruto do snapshot (com `preds`).
-
-    Guarda também a lista na ordem original: a hierarquia do MSP é posicional
-    (as filhas vêm logo depois da mãe, com nível maior), e é assim que se acha
-    a filha que manda no término de um resumo.
+class Grafo:
+    """O cronograma indexado uma vez, para todo mundo que anda pela rede.
+
+    `tarefas` no formato bruto do snapshot (com `preds`). A hierarquia do MSP é
+    posicional — as filhas vêm logo depois da mãe, com nível maior —, e antes
+    cada consumidor a reconstruía do seu jeito: _descendentes procurava a
+    posição do resumo varrendo a lista a cada predecessora-resumo, folhas()
+    comparava vizinhas, a saúde montava o próprio índice e os caminhos da EAP.
+    Aqui tudo sai de uma passada só, e a rede (causa do prazo) e a saúde leem
+    do mesmo objeto:
+
+      ordem        a lista, na ordem original
+      por_id       id → tarefa
+      pos          id → posição na ordem
+      fim          posição logo depois do bloco de cada tarefa: as descendentes
+                   de i são ordem[i + 1:fim[i]], e folha é quem tem fim == i + 1
+      folhas       ids das tarefas-folha
+      sucessoras   id → ids das tarefas que a têm como predecessora
+      caminhos     id → caminho na EAP, sem o projeto (montado no primeiro uso)
+      cpm          folgas e caminho condutor (Cpm, calculado no primeiro uso)
+
+    Não altera nem copia as tarefas: o app passa os snapshots do cache, que
+    são compartilhados entre requisições.
     """
-    return {"por_id": {str(t["id"]): t for t in tarefas if t.get("id")},
-            "ordem":  list(tarefas)}
 
-
-def folhas(tarefas: list[dict]) -> set[str]:
-    """Ids das tarefas-folha. Depende da ordem hierárquica da lista."""
-    out = set()
-    for i, t in enumerate(tarefas):
-        prox = tarefas[i + 1] if i + 1 < len(tarefas) else None
-        if prox is None or (prox.get("level") or 0) <= (t.get("level") or 0):
-            out.add(str(t["id"]))
-    return out
+    def __init__(self, tarefas):
+        self.ordem = list(tarefas)
+        self.por_id: dict[str, dict] = {}
+        self.pos: dict[str, int] = {}
+        self.sucessoras: dict[str, list[str]] = {}
+        n = len(self.ordem)
+        self.fim = [n] * n
+        abertos: list[tuple[int, int]] = []     # (nível, posição), nível crescente
+        for i, t in enumerate(self.ordem):
+            if t.get("id"):
+                self.por_id[str(t["id"])] = t
+                self.pos[str(t["id"])] = i
+            nivel = t.get("level") or 0
+            while abertos and abertos[-1][0] >= nivel:
+                self.fim[abertos.pop()[1]] = i
+            abertos.append((nivel, i))
+            tid = str(t.get("id"))
+            for pr in t.get("preds") or []:
+                self.sucessoras.setdefault(str(pr.get("id")), []).append(tid)
+        self.folhas = {str(t.get("id")) for i, t in enumerate(self.ordem)
+                       if self.fim[i] == i + 1}
+        self._caminhos: dict[str, list[str]] | None = None
+        self._cpm: Cpm | None = None
+
+    def descendentes(self, tid: str) -> list[dict]:
+        """Tarefas sob `tid` na hierarquia — o bloco contíguo de nível maior."""
+        i = self.pos.get(tid)
+        return [] if i is None else self.ordem[i + 1:self.fim[i]]
+
+    @property
+    def caminhos(self) -> dict[str, list[str]]:
+        """Caminho na EAP de cada tarefa, sem o nome do projeto.
+
+        Uma pilha indexada pelo nível reconstrói o caminho. Sem ele uma lista
+        de tarefas não identifica nada: um cronograma tem dezenas de tarefas
+        chamadas "Análise" e "R00", e o nome sozinho não diz qual é qual.
+        """
+        if self._caminhos is None:
+            caminhos: dict[str, list[str]] = {}
+            pilha: list[str] = []
+            for t in self.ordem:
+                nivel = t.get("level") or 0
+                pilha = pilha[:nivel]
+                pilha.append(t.get("name") or "")
+                caminhos[str(t.get("id"))] = list(pilha[1:-1])   # [0] é o projeto
+            self._caminhos = caminhos
+        return self._caminhos
+
+
+    @property
+    def cpm(self) -> "Cpm":
+        """O Cpm deste cronograma. O grafo é um por snapshot, então o cálculo
+        também: a saúde e o report de uma mesma publicação dividem o mesmo."""
+        if self._cpm is None:
+            self._cpm = Cpm(self)
+        return self._cpm
+
+
+def indexar(tarefas) -> Grafo:
+    """O Grafo de `tarefas`; um Grafo já montado passa direto."""
+    return tarefas if isinstance(tarefas, Grafo) else Grafo(tarefas)
 
 
 def _respeitado(pred: dict, sucessora: dict, vinculo: dict) -> bool:
@@ -94,22 +168,7 @@ def _respeitado(pred: dict, sucessora: dict, vinculo: dict) -> bool:
     return sucessora["start"] >= pred["end"]
 
 
-def _descendentes(sid: str, idx: dict) -> list[dict]:
-    """Tarefas sob `sid` na hierarquia — o bloco contíguo de nível maior."""
-    ordem = idx.get("ordem") or []
-    pos = next((i for i, t in enumerate(ordem) if str(t.get("id")) == sid), None)
-    if pos is None:
-        return []
-    nivel = ordem[pos].get("level") or 0
-    saida = []
-    for t in ordem[pos + 1:]:
-        if (t.get("level") or 0) <= nivel:
-            break
-        saida.append(t)
-    return saida
-
-
-def _condutora(sid: str, deltas: dict[str, dict], idx: dict) -> tuple[str, dict] | None:
+def _condutora(sid: str, deltas: dict[str, dict], g: Grafo) -> tuple[str, dict] | None:
     """A filha que manda no término do resumo `sid`.
 
     Resumo não tem variação própria — ele espelha as filhas, e por isso fica fora
@@ -118,11 +177,11 @@ def _condutora(sid: str, deltas: dict[str, dict], idx: dict) -> tuple[str, dict]
     dos 6 dias de atraso sem dono. Quem realmente empurra é a filha que termina
     junto com o resumo; é ela que a caminhada passa a seguir.
     """
-    p = idx["por_id"].get(sid)
+    p = g.por_id.get(sid)
     if not p or not p.get("end"):
         return None
     candidatas = [(str(t["id"]), deltas[str(t["id"])])
-                  for t in _descendentes(sid, idx)
+                  for t in g.descendentes(sid)
                   if t.get("end") == p["end"] and deltas.get(str(t["id"]))]
     if not candidatas:
         return None
@@ -132,32 +191,39 @@ def _condutora(sid: str, deltas: dict[str, dict], idx: dict) -> tuple[str, dict]
 
 # ── Causalidade ───────────────────────────────────────────────────────────────
 
-def empurrador(tid: str, deltas: dict[str, dict], idx: dict,
-               _saltos: int = 0) -> dict | None:
-    """Qual predecessora empurrou esta tarefa.
+def _escolha(tid: str, deltas: dict[str, dict], g: Grafo,
+             condutoras: dict | None = None) -> tuple[str, dict, dict] | None:
+    """(id, tarefa, delta) da predecessora que empurrou `tid`, sem atravessar marcos.
 
     Candidata é a predecessora cujo término se deslocou no mesmo sentido e com
     magnitude parecida à do início desta tarefa, ligada por vínculo respeitado.
-    Entre as compatíveis, vence a de maior deslocamento.
+    Entre as compatíveis, vence a de maior deslocamento. `condutoras` guarda a
+    filha que comanda cada resumo já resolvido (Floresta resolve todas as
+    tarefas, e o mesmo resumo é predecessora de várias).
     """
     v = deltas.get(tid)
     if not v or not v.get("dini"):
         return None
-    t = idx["por_id"].get(tid)
+    t = g.por_id.get(tid)
     if not t:
         return None
 
     candidatas = []
     for pr in t.get("preds") or []:
         pid = str(pr["id"])
-        p  = idx["por_id"].get(pid)
+        p  = g.por_id.get(pid)
         dv = deltas.get(pid)
         if p and not dv:
             # Predecessora sem delta é resumo: segue pela filha que o comanda.
-            alt = _condutora(pid, deltas, idx)
+            if condutoras is None:
+                alt = _condutora(pid, deltas, g)
+            elif pid in condutoras:
+                alt = condutoras[pid]
+            else:
+                alt = condutoras[pid] = _condutora(pid, deltas, g)
             if alt:
                 pid, dv = alt
-                p = idx["por_id"].get(pid)
+                p = g.por_id.get(pid)
         if not p or not dv or not dv.get("dfim") or not _respeitado(p, t, pr):
             continue
         if dv["dfim"] * v["dini"] > 0 and abs(dv["dfim"] - v["dini"]) <= TOL_DIAS:
@@ -167,40 +233,186 @@ def empurrador(tid: str, deltas: dict[str, dict], idx: dict,
 
     candidatas.sort(reverse=True, key=lambda c: c[0])
     _, pid, p, dv = candidatas[0]
+    return pid, p, dv
+
+
+def _registro(pid: str, p: dict, dv: dict) -> dict:
+    return {"id": pid, "nome": p.get("name"), "recurso": p.get("resources") or "",
+            "dfim": dv["dfim"], "ddur": dv.get("ddur"), "marco": bool(p.get("marco"))}
+
+
+def empurrador(tid: str, deltas: dict[str, dict], g: Grafo,
+               _saltos: int = 0) -> dict | None:
+    """Qual predecessora empurrou esta tarefa (ver _escolha).
+
+    Para uma tarefa avulsa. Quem precisa de muitas usa Floresta, que resolve
+    todas de uma vez com o mesmo resultado.
+    """
+    achada = _escolha(tid, deltas, g)
+    if achada is None:
+        return None
+    pid, p, dv = achada
 
     # Marco tem duração zero: nunca gera atraso, só transmite. Apontá-lo
     # esconderia a causa, que está atrás dele.
     if p.get("marco") and _saltos < MAX_SALTOS:
-        atras = empurrador(pid, deltas, idx, _saltos + 1)
+        atras = empurrador(pid, deltas, g, _saltos + 1)
         if atras:
             return atras
-    return {"id": pid, "nome": p.get("name"), "recurso": p.get("resources") or "",
-            "dfim": dv["dfim"], "ddur": dv.get("ddur"), "marco": bool(p.get("marco"))}
+    return _registro(pid, p, dv)
+
+
+def _ordem(elos: dict[str, str]) -> tuple[list[str], list[list[str]]]:
+    """Os nós de `elos` (nó → o nó de que ele depende), cada um depois do seu alvo.
+
+    Cada nó tem no máximo um alvo, então a relação é uma floresta — a menos
+    que feche um ciclo. Os ciclos voltam à parte, cada um na ordem em que se
+    anda por ele; os nós deles também entram na ordem, sem garantia.
+    """
+    ordem: list[str] = []
+    ciclos: list[list[str]] = []
+    estado: dict[str, int] = {}         # 1 = no caminho atual, 2 = pronto
+    for inicio in elos:
+        caminho, x = [], inicio
+        while x in elos and x not in estado:
+            estado[x] = 1
+            caminho.append(x)
+            x = elos[x]
+        if estado.get(x) == 1:
+            ciclos.append(caminho[caminho.index(x):])
+        for y in reversed(caminho):
+            estado[y] = 2
+            ordem.append(y)
+    return ordem, ciclos
+
+
+class Floresta:
+    """Quem empurrou cada tarefa deslocada, resolvido para todas de uma vez.
+
+    empurrador() responde por uma tarefa e refaz a escolha a cada chamada —
+    inclusive ao atravessar marcos, e a condutora de cada resumo a cada
+    sucessora dele. Aqui cada escolha é feita uma vez, e as tarefas são
+    resolvidas numa passada em ordem topológica da relação "foi empurrada
+    por": quem empurrou vem antes, e quem foi empurrada por um marco herda o
+    empurrador já resolvido dele. A travessia continua limitada a MAX_SALTOS
+    marcos; onde o limite corta a cadeia, ou onde a relação fecha um ciclo,
+    a tarefa cai no empurrador() de sempre. O resultado é o mesmo dele.
+
+      empurrador   id → o registro de empurrador(), ou ausente se ninguém a
+                   empurrou. Registros são compartilhados entre tarefas.
+      filhos       id → quem ele empurrou
+      raiz         id → o topo da árvore dela (quem originou o ramo)
+      ciclos       as voltas da relação, se houver — a caminhada de
+                   causa_do_prazo para nelas
+
+    ramos() dá o atraso produzido em cada árvore sem andar de novo pela rede.
+    """
+
+    def __init__(self, deltas: dict[str, dict], g: Grafo):
+        self.deltas, self.g = deltas, g
+        condutoras: dict = {}
+        escolhas = {}
+        for tid in deltas:
+            achada = _escolha(tid, deltas, g, condutoras)
+            if achada is not None:
+                escolhas[tid] = achada
+
+        ordem, ciclos = _ordem({tid: e[0] for tid, e in escolhas.items()})
+        presos = {x for c in ciclos for x in c}
+        self.empurrador: dict[str, dict] = {}
+        saltos: dict[str, int] = {}     # marcos atravessados até o empurrador
+        for tid in ordem:
+            pid, p, dv = escolhas[tid]
+            if tid in presos:
+                achado, n = empurrador(tid, deltas, g), MAX_SALTOS
+            elif not p.get("marco") or pid not in escolhas:
+                achado, n = _registro(pid, p, dv), 0
+            elif saltos[pid] < MAX_SALTOS:
+                achado, n = self.empurrador[pid], saltos[pid] + 1
+            else:
+                # O marco já gastou o limite: daqui o corte cai num ponto
+                # diferente do dele, e só a caminhada sabe qual.
+                achado, n = empurrador(tid, deltas, g), MAX_SALTOS
+            self.empurrador[tid], saltos[tid] = achado, n
+
+        pais = {tid: e["id"] for tid, e in self.empurrador.items()}
+        self.filhos: dict[str, list[str]] = {}
+        for tid, pai in pais.items():
+            self.filhos.setdefault(pai, []).append(tid)
+        ordem, self.ciclos = _ordem(pais)
+        volta = {x: c[0] for c in self.ciclos for x in c}
+        self.raiz: dict[str, str] = {}
+        for tid in ordem:
+            self.raiz[tid] = volta.get(tid) or self.raiz.get(pais[tid], pais[tid])
+
+    def aumento(self, tid: str) -> int:
+        """O que `tid` acrescentou de duração — o que faz dela geradora."""
+        t = self.g.por_id.get(tid) or {}
+        v = self.deltas.get(tid) or {}
+        return 0 if t.get("marco") else max(0, v.get("ddur") or 0)
+
+    def ramos(self) -> list[dict]:
+        """O atraso produzido em cada árvore, da que mais produziu para a que menos.
+
+        Ramo é o empurrador de origem e tudo o que ele empurrou, direta ou
+        indiretamente. `aumento` soma o que as tarefas do ramo esticaram — é o
+        atraso que nasceu ali, qualquer que seja a tarefa final que ele
+        alcança. Ramo sem aumento (só deslocamento herdado) não entra.
+        """
+        membros: dict[str, list[str]] = {}
+        for tid, r in self.raiz.items():
+            membros.setdefault(r, []).append(tid)
+        saida = []
+        for r, tids in membros.items():
+            if r not in self.raiz:
+                tids = [r] + tids           # a raiz não foi empurrada por ninguém
+            geradores = sorted((x for x in tids if self.aumento(x) > 0),
+                               key=lambda x: -self.aumento(x))
+            if not geradores:
+                continue
+            t = self.g.por_id.get(r) or {}
+            saida.append({
+                "raiz": r, "nome": t.get("name"), "tarefas": len(tids),
+                "aumento": sum(self.aumento(x) for x in geradores),
+                "geradores": [{"id": x, "nome": (self.g.por_id.get(x) or {}).get("name"),
+                               "ddur": self.aumento(x)} for x in geradores],
+            })
+        return sorted(saida, key=lambda r: -r["aumento"])
 
 
 def causa_do_prazo(saldo: int | None, fim_atual: str | None,
-                   deltas: dict[str, dict], idx: dict,
-                   ids_folha: set[str] | None = None) -> dict:
+                   deltas: dict[str, dict], g: Grafo,
+                   floresta: Floresta | None = None) -> dict:
     """Cadeia que leva ao término do projeto, e quem esticou dentro dela.
 
     Percorre a cadeia inteira em vez de parar no primeiro que esticou: o atraso
     costuma ser a soma de vários aumentos pequenos na mesma cadeia.
 
     A tarefa-resumo do projeto compartilha o término com o projeto e não pode
-    ser tomada como marco final — daí `ids_folha`. E `saldo` vem calculado de
+    ser tomada como marco final — daí só folhas. E `saldo` vem calculado de
     fora, das listas normalizadas.
+
+    A caminhada lê os empurradores da Floresta (montada aqui se não vier), e
+    `ramos` sai junto: o atraso que nasceu em cada árvore, não só na cadeia.
     """
     if not saldo:
-        return {"saldo": saldo or 0, "tipo": "sem_mudanca", "cadeia": [], "geradores": []}
+        return {"saldo": saldo or 0, "tipo": "sem_mudanca", "cadeia": [], "geradores": [],
+                "ramos": []}
 
-    finais = [t for t in idx["por_id"].values()
-              if t.get("end") == fim_atual
-              and (ids_folha is None or str(t["id"]) in ids_folha)]
+    finais = [t for t in g.por_id.values()
+              if t.get("end") == fim_atual and str(t["id"]) in g.folhas]
     if not finais:
-        return {"saldo": saldo, "tipo": "indeterminado", "cadeia": [], "geradores": []}
-
-    # Preferir a que o Project marcou como crítica, se houver.
-    final = next((t for t in finais if t.get("critical")), finais[0])
+        return {"saldo": saldo, "tipo": "indeterminado", "cadeia": [], "geradores": [],
+                "ramos": []}
+    floresta = floresta or Floresta(deltas, g)
+
+    # Preferir a que o Project marcou como crítica. Sem nenhuma (é o comum:
+    # o flag é raro nesses cronogramas), a que fecha o caminho condutor do
+    # CPM — antes era a primeira da lista.
+    final = next((t for t in finais if t.get("critical")), None)
+    if final is None:
+        condutor = set(g.cpm.condutor) if len(finais) > 1 else ()
+        final = next((t for t in finais if str(t["id"]) in condutor), finais[0])
 
     cadeia: list[dict] = []
     atual, vistos = final, set()
@@ -214,8 +426,8 @@ def causa_do_prazo(saldo: int | None, fim_atual: str | None,
                            "marco": bool(atual.get("marco")),
                            "ddur": v.get("ddur"), "dini": v.get("dini"),
                            "dfim": v.get("dfim")})
-        emp = empurrador(tid, deltas, idx)
-        atual = idx["por_id"].get(emp["id"]) if emp else None
+        emp = floresta.empurrador.get(tid)
+        atual = g.por_id.get(emp["id"]) if emp else None
 
     # Maior aumento primeiro. No empate vence quem está mais atrás na cadeia:
     # entre duas contribuições iguais, a de montante é a origem.
@@ -226,4 +438,299 @@ def causa_do_prazo(saldo: int | None, fim_atual: str | None,
                        key=lambda c: (-(c["ddur"] or 0), -pos[id(c)]))
     return {"saldo": saldo,
             "tipo": "propagacao" if geradores else "indeterminado",
-            "cadeia": cadeia, "geradores": geradores}
+            "cadeia": cadeia, "geradores": geradores, "ramos": floresta.ramos()}
+
+
+# ── Caminho crítico e folgas ──────────────────────────────────────────────────
+#
+# Folga negativa é o sinal clássico de data segurando contra a rede:
+# restrição, data digitada, vínculo incoerente.
+
+DIAS_UTEIS = "1111100"      # seg–sex; o calendário de feriados não vem no snapshot
+_TIPOS = {"FS": 0, "SS": 1, "FF": 2, "SF": 3}
+
+
+class Cpm:
+    """Passadas de ida e volta pela rede de `preds`, em dias úteis.
+
+    Cada folha é um nó; cada resumo vira dois nós de duração zero, abertura e
+    fechamento — a abertura vem antes de cada filha (SS), o fechamento depois
+    (FS). Vínculo que aponta para um resumo liga na abertura ou no fechamento
+    conforme o tipo, como o Project faz. Assim a rede cresce em arestas na
+    medida da hierarquia, em vez de ligar cada filha de um resumo a cada filha
+    do outro.
+
+    Datas do snapshot viram ordinais de dia útil (numpy.busday_count). Tarefa
+    não iniciada começa no que a rede manda, mas não antes da própria data
+    publicada: o que a segura ali (restrição, nivelamento) não vem no
+    snapshot. Tarefa iniciada tem data de fato — os vínculos que chegam nela
+    não contam, pelo mesmo motivo de _respeitado(). O prazo do recuo é o
+    término publicado do projeto.
+
+    A rede é camada por camada (ordem topológica): cada passada anda nas
+    camadas e resolve todas as arestas de uma camada de uma vez. Nó em ciclo
+    fica sem camada e sem resultado. Folha sem a data de que precisa (término;
+    e início, se não é marco), ausente ou ilegível, também: não há onde
+    ancorá-la, e uma data inventada daria folga inventada.
+
+      folga_total   id → dias úteis (tarde_fim − cedo_fim), folhas e resumos
+      folga_livre   id → dias úteis até atrasar a primeira sucessora, folhas
+      condutor      ids das folhas que decidem o fim da ida, do início ao fim
+      ciclos        nós que ficaram de fora por ciclo
+      sem_data      folhas que ficaram de fora por falta de data
+      datas(id)     cedo/tarde início/término, em ISO
+    """
+
+    def __init__(self, g: Grafo):
+        import numpy as np
+
+        ordem = g.ordem
+        n = len(ordem)
+        self.folga_total: dict[str, float] = {}
+        self.folga_livre: dict[str, float] = {}
+        self.condutor: list[str] = []
+        self.ciclos = 0
+        self.sem_data = 0
+        ini_d = self._converter([t.get("start") for t in ordem])
+        fim_d = self._converter([t.get("end") for t in ordem])
+        datas = np.concatenate([ini_d, fim_d])
+        datas = datas[~np.isnat(datas)]
+        self.g = g
+        self.epoca = (np.busday_offset(datas.min(), 0, roll="forward", weekmask=DIAS_UTEIS)
+                      if datas.size else np.datetime64("2000-01-03"))
+
+        # Nós: folha → um; resumo → abertura e fechamento.
+        ini_no, fim_no = [0] * n, [0] * n
+        total = 0
+        for i in range(n):
+            ini_no[i] = total
+            total += 1 if g.fim[i] == i + 1 else 2
+            fim_no[i] = total - 1
+
+        dur    = np.zeros(total)
+        limite = np.full(total, -np.inf)
+        fixo   = np.zeros(total, dtype=bool)
+        folha  = np.zeros(total, dtype=bool)
+        sem_data = np.zeros(total, dtype=bool)
+        src, dst, tipo, lag, vinculo = [], [], [], [], []
+
+        def aresta(a, b, t, l, v):
+            src.append(a); dst.append(b); tipo.append(t); lag.append(l); vinculo.append(v)
+
+        inicios, fins = self._ordinais(ini_d, fim_d)
+        abertos: list[int] = []
+        for i, t in enumerate(ordem):
+            nivel = t.get("level") or 0
+            while abertos and (ordem[abertos[-1]].get("level") or 0) >= nivel:
+                abertos.pop()
+            if abertos:
+                mae = abertos[-1]
+                aresta(ini_no[mae], ini_no[i], 1, 0.0, False)
+                aresta(fim_no[i], fim_no[mae], 0, 0.0, False)
+            abertos.append(i)
+            if ini_no[i] == fim_no[i]:
+                no = ini_no[i]
+                folha[no] = True
+                sem_data[no] = np.isnat(fim_d[i]) or (not t.get("marco")
+                                                      and np.isnat(ini_d[i]))
+                if t.get("marco"):
+                    limite[no] = fins[i]
+                else:
+                    limite[no] = inicios[i]
+                    dur[no] = max(0.0, fins[i] - inicios[i])
+                fixo[no] = (t.get("pct") or 0) > 0
+            for pr in t.get("preds") or []:
+                p = g.pos.get(str(pr.get("id")))
+                k = _TIPOS.get(pr.get("tipo"))
+                if p is None or k is None:
+                    continue
+                # FS/FF partem do término da predecessora; FS/SS chegam no início.
+                aresta(fim_no[p] if k in (0, 2) else ini_no[p],
+                       ini_no[i] if k in (0, 1) else fim_no[i],
+                       k, float(pr.get("lag") or 0), True)
+
+        src, dst = np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+        tipo, lag, vinculo = np.array(tipo), np.array(lag), np.array(vinculo, dtype=bool)
+        # Iniciada não recebe: a data dela é fato.
+        vale = ~fixo[dst] if dst.size else np.zeros(0, dtype=bool)
+        src, dst, tipo, lag, vinculo = src[vale], dst[vale], tipo[vale], lag[vale], vinculo[vale]
+        parte_fim = (tipo == 0) | (tipo == 2)       # lado da predecessora
+        chega_fim = (tipo == 2) | (tipo == 3)       # lado da sucessora
+
+        if not total:
+            return
+        camada = self._camadas(total, src, dst)
+        self.ciclos = int((camada < 0).sum())
+        # Folha sem data sai como o nó em ciclo: sem camada, e as arestas dela
+        # não levam nem trazem nada.
+        self.sem_data = int((sem_data & (camada >= 0)).sum())
+        camada[sem_data] = -1
+        ok = (camada[src] >= 0) & (camada[dst] >= 0)
+        src, dst, lag, vinculo = src[ok], dst[ok], lag[ok], vinculo[ok]
+        parte_fim, chega_fim = parte_fim[ok], chega_fim[ok]
+
+        # Ida: camada a camada, na ordem das sucessoras.
+        es = limite.copy()
+        ef = es + dur
+        por_dst = np.argsort(camada[dst], kind="stable")
+        cortes = np.searchsorted(camada[dst][por_dst], np.arange(camada.max() + 2))
+        for k in range(1, camada.max() + 1):
+            e = por_dst[cortes[k]:cortes[k + 1]]
+            if not e.size:
+                continue
+            s, d = src[e], dst[e]
+            val = np.where(parte_fim[e], ef[s], es[s]) + lag[e] - np.where(chega_fim[e], dur[d], 0)
+            np.maximum.at(es, d, val)
+            ef[d] = es[d] + dur[d]
+
+        resolvido = camada >= 0
+        fins_folha = ef[folha & resolvido]
+        raiz = next((i for i, t in enumerate(ordem) if (t.get("level") or 0) == 0), None)
+        if raiz is not None and not np.isnat(fim_d[raiz]):
+            prazo = fins[raiz]
+        else:
+            prazo = fins_folha.max() if fins_folha.size else 0.0
+
+        # O que cada aresta exige da sucessora, já com as datas da ida. A aresta
+        # que não sobra nada é a que manda (o caminho condutor).
+        with np.errstate(invalid="ignore"):     # abertura sem vínculo: −inf − −inf
+            val = np.where(parte_fim, ef[src], es[src]) + lag - np.where(chega_fim, dur[dst], 0)
+            sobra = es[dst] - val
+        motor = np.full(total, -1)
+        manda = sobra <= 1e-9
+        motor[dst[manda]] = src[manda]
+
+        # Volta: camada a camada, da última para a primeira, pelas predecessoras.
+        # Folga livre vem junto: a sobra até a sucessora mais apertada — e, pela
+        # aresta até o fechamento do resumo, a sobra até ele somada à folga livre
+        # dele (vínculo no resumo é vínculo de todas as filhas).
+        lf = np.full(total, prazo)
+        ls = lf - dur
+        livre = prazo - ef
+        sobe = ~vinculo & parte_fim
+        por_src = np.argsort(camada[src], kind="stable")
+        cortes = np.searchsorted(camada[src][por_src], np.arange(camada.max() + 2))
+        for k in range(camada.max(), -1, -1):
+            e = por_src[cortes[k]:cortes[k + 1]]
+            if not e.size:
+                continue
+            s, d = src[e], dst[e]
+            val = np.where(chega_fim[e], lf[d], ls[d]) - lag[e] + np.where(parte_fim[e], 0, dur[s])
+            np.minimum.at(lf, s, val)
+            ls[s] = lf[s] - dur[s]
+            v, h = e[vinculo[e]], e[sobe[e]]
+            with np.errstate(invalid="ignore"):
+                np.minimum.at(livre, src[v], sobra[v])
+                np.minimum.at(livre, src[h], sobra[h] + livre[dst[h]])
+
+        self._es, self._ef, self._ls, self._lf = es, ef, ls, lf
+        self._ini_no, self._fim_no = ini_no, fim_no
+        self.prazo = prazo
+        dono = [None] * total
+        for i, t in enumerate(ordem):
+            tid = str(t.get("id"))
+            dono[fim_no[i]] = tid
+            if not resolvido[fim_no[i]]:
+                continue
+            self.folga_total[tid] = round(float(lf[fim_no[i]] - ef[fim_no[i]]), 2)
+            if folha[fim_no[i]]:
+                self.folga_livre[tid] = round(float(livre[fim_no[i]]), 2)
+
+        # Condutor: da folha que termina por último, de volta pelas arestas que
+        # mandam. Os nós de resumo entram no caminho, mas não na lista.
+        candidatas = np.flatnonzero(folha & resolvido)
+        if candidatas.size:
+            # No empate, a de baixo: o marco final vem depois da tarefa que ele fecha.
+            ultima = np.flatnonzero(ef[candidatas] == ef[candidatas].max())[-1]
+            no, vistos = int(candidatas[ultima]), set()
+            while no >= 0 and no not in vistos:
+                vistos.add(no)
+                if folha[no]:
+                    self.condutor.append(dono[no])
+                no = int(motor[no])
+            self.condutor.reverse()
+
+    @staticmethod
+    def _converter(datas):
+        """As datas do snapshot em datetime64[D]. Sem data, ou com uma que não se
+        lê ("01/03/2025", "2025-02-30"), fica NaT: conta como ausente.
+
+        A conversão é em bloco; só quando ela tropeça é que se vai data a data.
+        """
+        import numpy as np
+
+        textos = [x if isinstance(x, str) and x else "NaT" for x in datas]
+        try:
+            return np.array(textos, dtype="datetime64[D]")
+        except ValueError:
+            pass
+
+        def uma(x):
+            try:
+                return np.datetime64(x, "D")
+            except ValueError:
+                return np.datetime64("NaT", "D")
+
+        return np.array([uma(x) for x in textos], dtype="datetime64[D]")
+
+    def _ordinais(self, inicios, fins):
+        """Dia útil de início (rola para frente) e fim exclusivo (rola para trás).
+
+        `inicios` e `fins` já convertidos (ver _converter); NaT vira 0.
+        """
+        import numpy as np
+
+        def conta(d, mais_um):
+            vazio = np.isnat(d)
+            d = np.where(vazio, self.epoca, d) + (1 if mais_um else 0)
+            return np.where(vazio, 0.0, np.busday_count(self.epoca, d, weekmask=DIAS_UTEIS))
+
+        return conta(inicios, False), conta(fins, True)
+
+    @staticmethod
+    def _camadas(total, src, dst):
+        """Camada topológica de cada nó (Kahn, uma fronteira por vez). −1 em ciclo.
+
+        Em Python puro: é uma visita por aresta, e a fronteira de cronograma
+        costuma ter poucos nós — numpy a cada camada custaria mais que a conta.
+        """
+        import numpy as np
+
+        saem: list[list[int]] = [[] for _ in range(total)]
+        for a, b in zip(src.tolist(), dst.tolist()):
+            saem[a].append(b)
+        grau = np.bincount(dst, minlength=total).tolist()
+        camada = [-1] * total
+        frente = [x for x in range(total) if not grau[x]]
+        k = 0
+        while frente:
+            proxima = []
+            for x in frente:
+                camada[x] = k
+                for y in saem[x]:
+                    grau[y] -= 1
+                    if not grau[y]:
+                        proxima.append(y)
+            frente, k = proxima, k + 1
+        return np.array(camada)
+
+    def datas(self, tid: str) -> dict | None:
+        """Cedo e tarde, início e término de `tid`, como datas ISO."""
+        import numpy as np
+
+        i = self.g.pos.get(tid)
+        if i is None or str(tid) not in self.folga_total:
+            return None
+        a, b = self._ini_no[i], self._fim_no[i]
+        marco = bool(self.g.ordem[i].get("marco"))
+
+        def dia(x, fim):
+            if not np.isfinite(x):          # abertura de resumo que nada prende
+                return None
+            x = int(np.floor(x)) - (1 if fim else 0)
+            return str(np.busday_offset(self.epoca, x, roll="forward", weekmask=DIAS_UTEIS))
+
+        return {"cedo_inicio": dia(self._ef[b], True) if marco else dia(self._es[a], False),
+                "cedo_termino": dia(self._ef[b], True),
+                "tarde_inicio": dia(self._lf[b], True) if marco else dia(self._ls[a], False),
+                "tarde_termino": dia(self._lf[b], True)}
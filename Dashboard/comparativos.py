@@ -0,0 +1,238 @@
+"""
+comparativos.py — O comparativo de cada projeto com o último report, já calculado.
+
+A seção "O que mudou desde X?" só era montada quando alguém gerava o report de
+um projeto (/api/report-json), um projeto por vez. A revisão de carteira da
+segunda-feira quer a pergunta inversa — quais projetos se mexeram desde o
+último report, e por causa de quem — e para isso precisava abrir os projetos
+um a um.
+
+Agora o fetcher, logo depois da saúde, compara o snapshot de cada projeto com
+a base dele (data/report_base_<pid>.json) e guarda um resumo curto num índice
+só, data/comparativos.json:
+
+  {"atualizadoEm": ..., "projetos": {pid: {
+      "pid", "publicadoEm", "desde", "saldo", "termino_ant", "termino_atu",
+      "duracao_ant", "duracao_atu", "removidas", "inseridas", "tipo",
+      "geradores": [{"id", "rotulo", "recurso", "ddur", "termino"}, ...],
+      "arquivos", "versao"}}}
+
+  - O resumo sai da mesma comparar() do report — os geradores são os
+    Principais Ofensores, cortados no mesmo TOPO_OFENSORES. O texto do report
+    continua sendo montado na hora, do cronograma inteiro.
+  - Cada resumo vale para UMA versão da base e do snapshot: `arquivos` é a
+    assinatura (mtime, tamanho) dos três arquivos de que ele saiu. Sem report
+    novo e sem coleta nova, o resumo fica como está e não é refeito.
+  - Projeto sem base (nunca saiu report) não entra no índice.
+  - A comparação de um projeto é CPU pura — parear, montar a rede, andar a
+    floresta — e os projetos não dependem uns dos outros: com vários a
+    refazer, eles vão para um pool de processos (PROCESSOS). Cada processo lê
+    do disco o que compara e devolve só o resumo; o cronograma não atravessa
+    a fronteira.
+  - O pool sobe sempre com spawn, também no Linux: o fetcher tem threads
+    vivas (log, coleta), e fork com threads copia locks no estado em que
+    estavam. Spawn reimporta o módulo de entrada em cada processo — o
+    fetcher.py aguenta (o run fica atrás do __main__), o app.py não: ele
+    monta o Flask ao ser importado. Por isso o app põe PROCESSOS = 1, e a
+    coleta que roda dentro dele compara na própria thread, um projeto por
+    vez.
+
+Comparativo é acessório: projeto que falha sai do índice com WARNING, pool que
+não sobe vira laço serial, e nada disso derruba o run.
+
+Importa `comparador` e `report_base` só na hora de comparar: quem chamar
+precisa ter comparador/ no sys.path (app.py e fetcher.py já inserem).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import snapshot
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR  = Path(__file__).parent / "data"
+ARQUIVO   = "comparativos.json"
+VERSAO    = 1       # sobe quando muda o que vai no resumo
+PROCESSOS = 4       # teto do pool; abaixo de 2 (o app põe 1), compara no processo
+
+# O fetcher pode rodar dentro do app, e o report regrava uma entrada enquanto
+# ele grava as dele: a leitura-alteração-gravação do índice é uma por vez.
+_lock = threading.Lock()
+
+
+def caminho() -> Path:
+    return DATA_DIR / ARQUIVO
+
+
+def carregar() -> dict:
+    """{atualizadoEm, projetos} do índice. Ausente ou ilegível: índice vazio."""
+    try:
+        return json.loads(caminho().read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        pass
+    except Exception as exc:
+        logger.warning("%s ilegível (%s) — será refeito.", ARQUIVO, exc)
+    return {"atualizadoEm": None, "projetos": {}}
+
+
+def _arquivos(pid: str) -> list | None:
+    """Assinatura da base e do snapshot de `pid`. None se não há base."""
+    assinatura = []
+    for nome in (f"report_base_{pid}.json", f"tasks_{pid}.json",
+                 snapshot.caminho(DATA_DIR, pid).name):
+        try:
+            st = (DATA_DIR / nome).stat()
+            assinatura.append([st.st_mtime_ns, st.st_size])
+        except FileNotFoundError:
+            if not assinatura:
+                return None
+            assinatura.append(None)
+    return assinatura
+
+
+def resumir(pid: str, base: dict, tarefas, publicado_em: str | None = None) -> dict:
+    """O resumo de `tarefas` contra `base` (o que report_base.carregar devolve)."""
+    import comparador
+    import report_base
+
+    r = comparador.comparar(comparador.de_base(base["tarefas"]),
+                            comparador.de_snapshot(tarefas), brutos_atu=tarefas)
+    causa = r["causa"] or {}
+    return {
+        "pid":         pid,
+        "publicadoEm": publicado_em,
+        "desde":       report_base.data(base),
+        **r["projeto"],
+        "removidas":   len(r["reconciliacao"]["removidas"]),
+        "inseridas":   len(r["reconciliacao"]["inseridas"]),
+        # None quando não há rede para apontar culpados (cronograma sem preds).
+        "tipo":        causa.get("tipo"),
+        "geradores":   [{"id": g["id"], "rotulo": g.get("rotulo") or g["nome"],
+                         "recurso": g["recurso"], "ddur": g["ddur"],
+                         "termino": g.get("termino")}
+                        for g in (causa.get("geradores") or [])[:comparador.TOPO_OFENSORES]],
+        "versao":      VERSAO,
+    }
+
+
+def _comparar(pid: str, publicado_em: str | None) -> tuple[str, dict | None, str | None]:
+    """(pid, resumo, erro) de um projeto, lendo base e snapshot do disco.
+
+    Roda nos processos do pool: a exceção volta como texto, para um projeto
+    ruim não levar o pool junto.
+    """
+    import report_base
+
+    try:
+        arquivos = _arquivos(pid)
+        base = report_base.carregar(pid) if arquivos else None
+        tarefas = snapshot.carregar(DATA_DIR, pid) if base else None
+        if not base or not tarefas:
+            return pid, None, None
+        return pid, {**resumir(pid, base, tarefas, publicado_em),
+                     "arquivos": arquivos}, None
+    except Exception as exc:
+        return pid, None, str(exc)
+
+
+def _iniciar(pasta: str) -> None:
+    """Inicializador dos processos do pool: a pasta de dados do processo pai.
+
+    O pool sobe sempre com spawn: cada processo começa do zero, e os DATA_DIR
+    voltariam ao padrão — o que vale para o Agendador, mas não para a
+    bancada, que aponta tudo para uma pasta temporária.
+    """
+    global DATA_DIR
+    import report_base
+
+    DATA_DIR = report_base.DATA_DIR = Path(pasta)
+
+
+def atualizar(projects: list[dict], ao_avancar=None) -> int:
+    """Deixa o índice em dia com `projects`. Devolve quantos projetos comparou.
+
+    Reaproveita o resumo cuja assinatura ainda bate; refaz os outros, em
+    paralelo quando são vários e PROCESSOS deixa. Entradas de projeto que
+    saiu da lista, ou que perdeu a base, são descartadas. `ao_avancar(feitos,
+    total)` é chamado a cada projeto concluído.
+    """
+    indice = carregar().get("projetos") or {}
+    publicados = {p["id"]: p.get("publicadoEm") for p in projects}
+    assinaturas = {pid: _arquivos(pid) for pid in publicados}
+    novo = {pid: r for pid, r in indice.items()
+            if assinaturas.get(pid) and r.get("arquivos") == assinaturas[pid]
+            and r.get("versao") == VERSAO}
+    fila = [pid for pid, a in assinaturas.items() if a and pid not in novo]
+
+    feitos = 0
+
+    def _receber(pid: str, resumo: dict | None, erro: str | None) -> None:
+        nonlocal feitos
+        feitos += 1
+        if erro:
+            logger.warning("Comparativo não calculado para %s: %s", pid[:8], erro)
+        elif resumo:
+            novo[pid] = resumo
+        if ao_avancar:
+            ao_avancar(feitos, len(fila))
+
+    pendentes = list(fila)
+    if len(fila) >= 2 and PROCESSOS >= 2:
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=min(PROCESSOS, os.cpu_count() or 1, len(fila)),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_iniciar, initargs=(str(DATA_DIR),)) as pool:
+                futuros = [pool.submit(_comparar, pid, publicados[pid]) for pid in fila]
+                for fut in as_completed(futuros):
+                    pid, resumo, erro = fut.result()
+                    pendentes.remove(pid)
+                    _receber(pid, resumo, erro)
+        except Exception as exc:
+            # Pool que não sobe (ou morre) não impede o comparativo: o que
+            # faltou é feito aqui mesmo, um por vez.
+            logger.warning("Pool de comparativos indisponível (%s) — %d projeto(s) "
+                           "no processo atual.", exc, len(pendentes))
+    for pid in pendentes:
+        _receber(*_comparar(pid, publicados[pid]))
+
+    with _lock:
+        # Report gerado durante a comparação: a entrada que o app gravou (ver
+        # gravar) retrata a base nova, e a daqui, a antiga.
+        for pid, r in (carregar().get("projetos") or {}).items():
+            if pid in novo and r.get("arquivos") != novo[pid].get("arquivos") \
+                    and r.get("arquivos") == _arquivos(pid):
+                novo[pid] = r
+        _gravar({"atualizadoEm": datetime.now().isoformat(timespec="seconds"),
+                 "projetos": novo})
+    return len(fila)
+
+
+def gravar(pid: str, resumo: dict | None) -> None:
+    """Troca (ou tira, com None) a entrada de um projeto no índice."""
+    with _lock:
+        conteudo = carregar()
+        projetos = conteudo.setdefault("projetos", {})
+        if resumo is None:
+            projetos.pop(pid, None)
+        else:
+            projetos[pid] = {**resumo, "arquivos": _arquivos(pid)}
+        _gravar(conteudo)
+
+
+def _gravar(conteudo: dict) -> None:
+    DATA_DIR.mkdir(exist_ok=True)
+    alvo = caminho()
+    fd, tmp = tempfile.mkstemp(dir=DATA_DIR, prefix=alvo.name + ".", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(json.dumps(conteudo, ensure_ascii=False))
+    os.replace(tmp, alvo)
@@ -0,0 +1,102 @@
+"""
+escalonador.py — Em que ordem o fetcher pede as tarefas, e quanto isso deve levar.
+
+A coleta das tarefas é um problema de escalonamento: N cronogramas, de 150 a
+2.300 tarefas, em k vagas (o governador). A ordem decide o fim. Se o maior
+cronograma sai por último, ele corre sozinho depois que todos os outros
+acabaram, e a barra do dashboard fica parada nele.
+
+A regra é LPT (longest processing time first): cada vaga livre pega o projeto
+de maior duração prevista entre os que faltam. Como as vagas são uma fila só
+e saem na ordem dos pedidos (governador.py), toda vaga que vaga pega o próximo
+da lista — ninguém fica ocioso enquanto houver projeto, e o gigante começa
+no primeiro instante.
+
+A previsão de cada projeto, em ordem de preferência:
+
+  1. medida: o tempo de serviço das últimas coletas (telemetria.duracoes);
+  2. estimada: latência + tarefas × segundos-por-tarefa, ajustados por mínimos
+     quadrados em todo o histórico da telemetria (coletas de todos os
+     projetos). Com menos de 3 pontos distintos, só a razão mediana;
+  3. desconhecida (projeto novo, sem tarefas conhecidas): vai na frente —
+     pode ser o maior, e começar cedo é o que não atrasa o run.
+
+`makespan` simula a lista em k vagas e dá o fim previsto da fase. O fetcher
+compara com o real no fim do run (log, last_update.json e telemetria).
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import statistics
+
+import telemetria
+
+
+class Previsao:
+    """Duração prevista da coleta de cada projeto, a partir da telemetria."""
+
+    def __init__(self, runs: list[dict] | None = None):
+        runs = telemetria.carregar(telemetria.RETER) if runs is None else runs
+        self.medidas = telemetria.duracoes(runs)
+        # Coleta sem mudança fica de fora (ver telemetria.servico): o tempo de
+        # um 304 com as tarefas da coleta anterior puxaria a reta para baixo.
+        pontos = []
+        for r in runs:
+            for p in r.get("projetos") or []:
+                s = telemetria.servico(p)
+                if s is not None and p.get("tarefas"):
+                    pontos.append((p["tarefas"], s))
+        self.latencia, self.por_tarefa = _ajustar(pontos)
+
+    def __call__(self, p: dict, state: dict) -> tuple[float, str]:
+        """(segundos, origem) para o projeto `p`; origem: medida/estimada/desconhecida."""
+        if p["id"] in self.medidas:
+            return self.medidas[p["id"]], "medida"
+        n = (state.get(p["id"]) or {}).get("tarefas")
+        if n is None or self.por_tarefa is None:
+            return math.inf, "desconhecida"
+        return self.latencia + n * self.por_tarefa, "estimada"
+
+
+def _ajustar(pontos: list[tuple[int, float]]) -> tuple[float, float | None]:
+    """(latência, s por tarefa) do histórico. Sem histórico, (0, None)."""
+    if not pontos:
+        return 0.0, None
+    xs = [x for x, _ in pontos]
+    if len(set(xs)) >= 3:
+        inclinacao, intercepto = statistics.linear_regression(xs, [y for _, y in pontos])
+        if inclinacao > 0:
+            return max(0.0, intercepto), inclinacao
+    return 0.0, statistics.median(y / x for x, y in pontos)
+
+
+def ordenar(a_coletar: list[dict], state: dict,
+            previsao: Previsao | None = None) -> tuple[list[dict], dict[str, float]]:
+    """LPT: a fila da coleta, do maior previsto para o menor, e a previsão de cada um.
+
+    Sem telemetria nenhuma, ordena pelo nº de tarefas da última coleta (o
+    critério antigo) e não há previsão.
+    """
+    previsao = previsao or Previsao()
+    if not previsao.medidas and previsao.por_tarefa is None:
+        ordem = sorted(a_coletar, key=lambda p: (state.get(p["id"]) or {}).get(
+            "tarefas", 10 ** 6), reverse=True)
+        return ordem, {}
+    previsto = {p["id"]: previsao(p, state)[0] for p in a_coletar}
+    return sorted(a_coletar, key=lambda p: previsto[p["id"]], reverse=True), previsto
+
+
+def makespan(duracoes: list[float], vagas: int) -> float:
+    """Fim da coleta de `duracoes`, na ordem dada, com `vagas` em paralelo.
+
+    Cada vaga livre pega o próximo da lista (escalonamento de lista). Duração
+    infinita (desconhecida) não entra: a previsão é a do que se sabe.
+    """
+    livres = [0.0] * max(1, vagas)
+    for d in duracoes:
+        if math.isinf(d):
+            continue
+        inicio = heapq.heappop(livres)
+        heapq.heappush(livres, inicio + d)
+    return max(livres)
@@ -2,41 +2,78 @@
 fetcher.py — Job batch que coleta todos os dados do PWA e salva em data/*.json.
 
 Executado pelo Windows Task Scheduler (9:15, 14:15, 16:45 todos os dias).
-Roda standalone — não precisa do Flask, não tem servidor.
+Roda standalone — não precisa do Flask, não tem servidor. O botão Atualizar
+do dashboard roda o mesmo main() numa thread do app (app.py, _Coleta).
 
 Coleta incremental: a lista de projetos é sempre atualizada (é barata e traz o
 LastPublishedDate de todos), mas as tarefas — o grosso do tempo — só são
 buscadas nos projetos republicados desde a última coleta bem-sucedida. Rode com
 `--full` para forçar a recoleta de tudo.
 
+As tarefas são coletadas por um cliente assíncrono (aiohttp). Quantas
+requisições ficam em voo é o governador (governador.py) que decide, subindo
+enquanto o servidor responde bem e recuando nos 429/503; CONCORRENCIA é o teto —
+`--concorrencia N` muda. Sem aiohttp instalado, o fetcher coleta com threads.
+
+`--record [ARQ]` grava as respostas do PWA numa cassete (cassete.py; padrão
+data/cassete.zip) e `--replay [ARQ]` roda sem rede, reproduzindo-as. Para
+perfilar a normalização com o portfólio real — reproduzindo, use --full, senão
+o fetch_state.json gravado junto diz que não há nada a coletar.
+
 Saída:
   data/projects.json     — lista de todos os projetos
   data/tasks_<pid>.json  — tarefas de cada projeto
+  data/tasks_<pid>.col   — as mesmas, em formato colunar compacto (snapshot.py)
+  data/saude_<pid>.json  — análise de saúde já calculada (saude_calculada.py)
   data/fetch_state.json  — publicação já coletada com sucesso, por projeto
   data/last_update.json  — timestamp + status do último run
-  data/fetch_progress.json — andamento do run em curso (lido pela barra do dashboard)
+  data/fetch_progress.json — andamento do run em curso, a cada fase (progresso.py)
+  data/telemetria.jsonl  — tempos de cada run, por fase e por projeto (telemetria.py)
   data/fetcher.log       — log rotativo (até 1MB)
 """
+import asyncio
 import json
 import logging
 import logging.handlers
 import os
 import sys
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import pwa_client
-
 # ── Setup ─────────────────────────────────────────────────────────────────────
 HERE          = Path(__file__).parent
+
+# saude.py mora em saude/ e depende de rede.py, em comparador/ — mesmas pastas
+# que o app.py põe no sys.path.
+sys.path.insert(0, str(HERE / "comparador"))
+sys.path.insert(0, str(HERE / "saude"))
+
+import comparativos
+import escalonador
+import governador
+import progresso
+import pwa_client
+import saude_calculada
+import snapshot
+import telemetria
+
 DATA_DIR      = HERE / "data"
 LOG_FILE      = DATA_DIR / "fetcher.log"
 STATE_FILE    = DATA_DIR / "fetch_state.json"
 PROGRESS_FILE = DATA_DIR / "fetch_progress.json"
 DATA_DIR.mkdir(exist_ok=True)
 
+CONCORRENCIA    = 16   # teto de requisições em voo ao mesmo tempo
+CONC_INICIAL    = 4    # ponto de partida do governador no primeiro run
+TIMEOUT_TAREFAS = 90   # segundos por requisição de tarefas
+TENTATIVAS      = 3    # por projeto, com espera crescente entre elas
+ESTRANGULOS     = 8    # 429/503 tolerados por projeto sem gastar tentativa
+ESTRATEGIA_LISTA = "auto"   # ou uma de pwa_client.ESTRATEGIAS, fixa
+REAVALIAR_DIAS   = 7        # medida (ou recusa) mais velha que isto é refeita
+
 handler_file = logging.handlers.RotatingFileHandler(
     LOG_FILE, maxBytes=1_000_000, backupCount=2, encoding="utf-8"
 )
@@ -50,6 +87,29 @@ logging.basicConfig(
 )
 log = logging.getLogger("fetcher")
 
+# Quem escreve no fetcher.log quando a coleta roda dentro do app (log_no_app).
+MODULOS_DO_LOG = ("fetcher", "pwa_client", "saude_calculada", "snapshot",
+                  "telemetria", "progresso", "comparativos")
+
+
+class _SoDaColeta(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.name.split(".")[0] in MODULOS_DO_LOG
+
+
+def log_no_app() -> None:
+    """Leva o log da coleta ao fetcher.log também quando ela roda no app.
+
+    O basicConfig acima não faz nada num processo que já configurou o log —
+    o do app. Aí o arquivo entra como handler da raiz, filtrado para só
+    receber os módulos da coleta, não cada requisição do dashboard.
+    """
+    raiz = logging.getLogger()
+    if handler_file in raiz.handlers:
+        return
+    handler_file.addFilter(_SoDaColeta())
+    raiz.addHandler(handler_file)
+
 
 # ── Persistência ──────────────────────────────────────────────────────────────
 
@@ -60,6 +120,43 @@ def _write_json(path: Path, data) -> None:
     tmp.replace(path)
 
 
+def _delta(antes, depois: list[dict]) -> dict:
+    """O que mudou nas tarefas entre o snapshot gravado e a coleta de agora."""
+    a = {t["id"]: t for t in antes}
+    d = {t["id"]: t for t in depois}
+    return {
+        "novas":      sum(1 for tid in d if tid not in a),
+        "removidas":  sum(1 for tid in a if tid not in d),
+        "alteradas":  sum(1 for tid, t in d.items() if tid in a and a[tid] != t),
+        "reordenado": [t["id"] for t in antes if t["id"] in d]
+                      != [t["id"] for t in depois if t["id"] in a],
+    }
+
+
+def _gravar_tarefas(pid: str, tasks: list[dict]) -> dict | None:
+    """Snapshot de tarefas: o JSON de sempre e, ao lado, o colunar do app.py.
+
+    O .col vem depois de propósito: o leitor só o aceita se ele não for mais
+    velho que o JSON.
+
+    Devolve o delta em relação ao snapshot anterior (None se não havia). Se
+    nada mudou — republicação que não mexeu em nenhuma tarefa — os arquivos
+    não são regravados: o mtime fica, e o cache do app continua valendo.
+    """
+    js, col = DATA_DIR / f"tasks_{pid}.json", snapshot.caminho(DATA_DIR, pid)
+    try:
+        antes = snapshot.carregar(DATA_DIR, pid)
+    except Exception:
+        antes = None        # snapshot ilegível: regrava do zero
+    delta = _delta(antes, tasks) if antes is not None else None
+    if (delta is not None and list(antes) == tasks
+            and col.exists() and col.stat().st_mtime_ns >= js.stat().st_mtime_ns):
+        return delta
+    _write_json(js, tasks)
+    snapshot.gravar(DATA_DIR, pid, tasks)
+    return delta
+
+
 def _save_status(ok: bool, started: float, **extra) -> None:
     """Grava data/last_update.json com sumário do run."""
     status = {
@@ -74,28 +171,41 @@ def _save_status(ok: bool, started: float, **extra) -> None:
 
 # ── Andamento (barra de progresso do dashboard) ───────────────────────────────
 
+_fase_gravada: tuple[str, str] | None = None    # (run_id, fase) já no arquivo
+
+
 def _save_progress(run_id: str, fase: str, rotulo: str,
                    feito: int = 0, total: int = 0, ativo: bool = True) -> None:
-    """Grava data/fetch_progress.json com o andamento do run em curso.
+    """Publica o andamento do run em curso: ao app, e em fetch_progress.json.
 
     `total = 0` significa fase sem denominador conhecido (autenticação, lista de
     projetos, limpeza): o dashboard mostra a barra indeterminada. `run_id` é o
     carimbo de início — é ele que distingue este run de um arquivo esquecido de
     uma coleta anterior.
 
+    Cada andamento vai ao app pelo socket (progresso.py). O arquivo só é
+    regravado quando a fase muda ou o run termina — ou sempre, se não há app
+    ouvindo: aí é ele o único canal.
+
     Andamento é acessório: se a escrita falhar, a coleta continua. Perder a barra
     é irrelevante perto de perder o snapshot.
     """
+    global _fase_gravada
+    evento = {
+        "run_id":        run_id,
+        "fase":          fase,
+        "rotulo":        rotulo,
+        "feito":         feito,
+        "total":         total,
+        "ativo":         ativo,
+        "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+    enviado = progresso.enviar(evento)
+    if enviado and ativo and _fase_gravada == (run_id, fase):
+        return
     try:
-        _write_json(PROGRESS_FILE, {
-            "run_id":        run_id,
-            "fase":          fase,
-            "rotulo":        rotulo,
-            "feito":         feito,
-            "total":         total,
-            "ativo":         ativo,
-            "atualizado_em": datetime.now().isoformat(timespec="seconds"),
-        })
+        _write_json(PROGRESS_FILE, evento)
+        _fase_gravada = (run_id, fase)
     except Exception as exc:
         log.debug("Falha ao gravar andamento (%s): %s", fase, exc)
 
@@ -144,34 +254,354 @@ def _precisa_coletar(p: dict, state: dict, forcar: bool) -> tuple[bool, str]:
     return False, ""
 
 
+def _conc_anterior() -> float:
+    """Onde o governador assentou no último run — o ponto de partida deste.
+
+    Começar do zero a cada run desperdiçaria a rampa inteira; começar do teto
+    arriscaria um estrangulamento logo na largada.
+    """
+    try:
+        blob = json.loads((DATA_DIR / "last_update.json").read_text(encoding="utf-8"))
+        return float(blob["concorrencia"]["final"])
+    except Exception:
+        return CONC_INICIAL
+
+
+def _estrategias_anteriores() -> dict:
+    """Tempo (ou falha) de cada estratégia da lista de projetos, dos runs anteriores."""
+    try:
+        blob = json.loads((DATA_DIR / "last_update.json").read_text(encoding="utf-8"))
+        return dict(blob.get("lista_projetos") or {})
+    except Exception:
+        return {}
+
+
+def _escolher_estrategia(historico: dict) -> str:
+    """Qual estratégia busca a lista de projetos neste run.
+
+    Estratégia sem medida recente — nunca usada, ou medida/recusada há mais de
+    REAVALIAR_DIAS — é experimentada primeiro: é assim que o ProjectData volta
+    a ser tentado se a permissão for consertada, e que a perdedora não fica
+    com um tempo velho para sempre. Entre as medidas, a mais rápida.
+    """
+    if ESTRATEGIA_LISTA != "auto":
+        return ESTRATEGIA_LISTA
+    limite = datetime.now().timestamp() - REAVALIAR_DIAS * 86400
+    medidas = {}
+    for nome in pwa_client.ESTRATEGIAS:
+        h = historico.get(nome) or {}
+        try:
+            recente = datetime.fromisoformat(h["em"]).timestamp() >= limite
+        except (KeyError, TypeError, ValueError):
+            recente = False
+        if not recente:
+            return nome
+        if "segundos" in h:
+            medidas[nome] = h["segundos"]
+    return min(medidas, key=medidas.get) if medidas else pwa_client.ESTRATEGIAS[0]
+
+
+def _buscar_projetos(historico: dict) -> list[dict]:
+    """fetch_projects pela estratégia escolhida, anotando o tempo em `historico`.
+
+    Falha da estratégia experimental cai na padrão no mesmo run — a lista de
+    projetos não pode ficar sem vir por causa de um experimento.
+    """
+    estrategia = _escolher_estrategia(historico)
+    agora = datetime.now().isoformat(timespec="seconds")
+    inicio = time.perf_counter()
+    try:
+        projects = pwa_client.fetch_projects(estrategia)
+    except Exception as exc:
+        padrao = pwa_client.ESTRATEGIAS[0]
+        if estrategia == padrao:
+            raise
+        motivo = ("recusada" if pwa_client.recusou_projectdata(exc) else "falhou")
+        log.warning("Lista de projetos por %s %s (%s) — usando %s.",
+                    estrategia, motivo, exc, padrao)
+        historico[estrategia] = {"em": agora, motivo: str(exc)[:200]}
+        estrategia, inicio = padrao, time.perf_counter()
+        projects = pwa_client.fetch_projects(estrategia)
+    segundos = time.perf_counter() - inicio
+    anterior = (historico.get(estrategia) or {}).get("segundos")
+    # Média móvel: um run lento por acaso não troca a estratégia sozinho.
+    historico[estrategia] = {
+        "em": agora,
+        "segundos": round(segundos if anterior is None else (anterior + segundos) / 2, 2),
+    }
+    historico["ultima"] = estrategia
+    log.info("Lista de projetos por %s em %.1fs.", estrategia, segundos)
+    return projects
+
+
+# ── Saúde dos cronogramas ─────────────────────────────────────────────────────
+
+def _calcular_saude(projects: list[dict], recoletados: set[str], run_id: str,
+                    inalterados: set[str] = frozenset()) -> int:
+    """Deixa pronta a análise de saúde de cada projeto. Devolve quantas calculou.
+
+    Projeto recoletado neste run é sempre recalculado. O reaproveitado mantém a
+    análise que já tem — o cronograma dele é o mesmo — a menos que ela não
+    valha mais (saude_calculada.vale: outra publicação, regras de saúde
+    mudadas) ou não exista (primeiro run depois da atualização, arquivo
+    ilegível).
+
+    `inalterados` são recoletados cujas tarefas vieram idênticas ao snapshot
+    (ver _gravar_tarefas): a análise deles é a mesma, e só ganha a chave da
+    publicação nova (saude_calculada.rechavear) em vez de ser refeita.
+
+    Saúde é acessória: falha aqui não derruba o run. A análise antiga daquele
+    projeto é apagada, porque já não retrata o snapshot, e o dashboard calcula
+    na hora.
+    """
+    for p in projects:
+        if p["id"] in inalterados:
+            saude_calculada.rechavear(p["id"], p.get("publicadoEm"))
+    fila = [p for p in projects
+            if (p["id"] in recoletados and p["id"] not in inalterados)
+            or not saude_calculada.vale(saude_calculada.carregar(p["id"]),
+                                        p.get("publicadoEm"))]
+    for i, p in enumerate(fila):
+        pid = p["id"]
+        # Sem denominador de propósito: a barra é da coleta, e voltar a 0% depois
+        # de 100% pareceria um segundo run.
+        _save_progress(run_id, "saude", f"Saúde: {i} de {len(fila)} projeto(s)")
+        try:
+            tarefas = snapshot.carregar(DATA_DIR, pid)
+            if not tarefas:
+                continue        # sem cronograma o painel já ignora o projeto
+            saude_calculada.calcular(pid, tarefas, p.get("name", ""),
+                                     p.get("publicadoEm"))
+        except Exception as exc:
+            log.warning("Saúde não calculada para '%s' (%s): %s",
+                        p.get("name", ""), pid[:8], exc)
+            saude_calculada.remover(pid)
+    return len(fila)
+
+
 # ── Fetch ─────────────────────────────────────────────────────────────────────
 
-def _fetch_tasks_safe(p: dict) -> tuple[str, int, str | None]:
+def _arredondar(segundos: float | None) -> float | None:
+    """Segundos para o JSON: infinito (sem previsão) vira None."""
+    if segundos is None or segundos == float("inf"):
+        return None
+    return round(segundos, 2)
+
+
+def _estrangulado(exc: Exception) -> bool:
+    """429/503 do servidor, venha do requests ou do aiohttp."""
+    resp = getattr(exc, "response", None)
+    status = getattr(resp, "status_code", None) or getattr(exc, "status", None)
+    return status in governador.ESTRANGULADO
+
+def _medida(m: dict, inicio: float, gravacao: float | None, tentativas: int) -> dict:
+    """O que a telemetria guarda de um projeto (`m` é o de pwa_client.medir)."""
+    fim = time.perf_counter()
+    return {
+        "s":           round(fim - inicio, 3),
+        "gravacao_s":  round(fim - gravacao, 3) if gravacao is not None else None,
+        "espera_s":    round(m["espera_s"], 3),
+        "bytes":       m["bytes"],
+        "requisicoes": m["requisicoes"],
+        "tentativas":  tentativas,
+    }
+
+
+SEM_MUDANCA = {"novas": 0, "removidas": 0, "alteradas": 0, "reordenado": False}
+
+
+def _validador(pid: str, state: dict, forcar: bool) -> dict:
+    """O que a coleta anterior de `pid` viu, para o pedido condicional.
+
+    Vazio — pedido sem condição, mas que anota os validadores da resposta —
+    com --full ou sem o snapshot em disco: "não mudou" só serve se há o que
+    reaproveitar.
+    """
+    anterior = (state.get(pid) or {}).get("validadores")
+    if (forcar or not anterior or not (DATA_DIR / f"tasks_{pid}.json").exists()
+            or not snapshot.caminho(DATA_DIR, pid).exists()):
+        return {}
+    return dict(anterior)
+
+
+def _fetch_tasks_safe(p: dict, validador: dict) -> tuple[str, int | None, str | None,
+                                                          dict | None, dict]:
     """Wrapper de fetch_tasks com retry — projetos grandes às vezes dão timeout.
 
-    Devolve (pid, nº de tarefas, erro).
+    Devolve (pid, nº de tarefas, erro, delta — ver _gravar_tarefas, medida —
+    ver _medida). `validador` (ver _validador) é atualizado com o da resposta;
+    payload igual ao da coleta anterior volta com nº de tarefas None e delta
+    SEM_MUDANCA, sem tocar no snapshot.
+
+    Cada tentativa confere contra uma cópia do validador, e ele só fica com o
+    da resposta depois de o snapshot ser gravado: gravação que falhou (arquivo
+    preso no Windows) não pode deixar o hash novo para trás, senão a tentativa
+    seguinte veria "sem mudança" e o snapshot ficaria com as tarefas antigas.
     """
+    with pwa_client.medir() as m:
+        return _fetch_tasks_medido(p, validador, m)
+
+
+def _fetch_tasks_medido(p: dict, validador: dict,
+                        m: dict) -> tuple[str, int | None, str | None, dict | None, dict]:
     pid, name = p["id"], p["name"]
+    inicio = time.perf_counter()
     last_exc = None
-    for attempt in (1, 2, 3):
+    attempt = estrangulos = 0
+    while attempt < TENTATIVAS:
         try:
-            tasks = pwa_client.fetch_tasks(pid)
-            _write_json(DATA_DIR / f"tasks_{pid}.json", tasks)
-            return pid, len(tasks), None
+            tentativa = dict(validador)
+            tasks = pwa_client.fetch_tasks(pid, tentativa)
+            gravacao = time.perf_counter()
+            if tasks is None:
+                validador.update(tentativa)
+                return (pid, None, None, SEM_MUDANCA,
+                        _medida(m, inicio, None, attempt + estrangulos + 1))
+            delta = _gravar_tarefas(pid, tasks)
+            validador.update(tentativa)
+            return (pid, len(tasks), None, delta,
+                    _medida(m, inicio, gravacao, attempt + estrangulos + 1))
         except Exception as exc:
             last_exc = exc
-            log.warning("Tentativa %d/3 falhou em '%s' (%s): %s",
-                        attempt, name, pid[:8], exc)
+            if _estrangulado(exc) and estrangulos < ESTRANGULOS:
+                # Não é falha do projeto: o servidor pediu calma. A espera é a
+                # do Retry-After, e quem a cumpre é o governador ao liberar a
+                # próxima vaga.
+                estrangulos += 1
+                log.info("'%s' (%s) estrangulado pelo servidor — nova vaga após "
+                         "o Retry-After.", name, pid[:8])
+                continue
+            attempt += 1
+            log.warning("Tentativa %d/%d falhou em '%s' (%s): %s",
+                        attempt, TENTATIVAS, name, pid[:8], exc)
             time.sleep(2 * attempt)  # backoff
-    return pid, 0, str(last_exc)
+    return pid, 0, str(last_exc), None, _medida(m, inicio, None, attempt + estrangulos)
 
 
-def main(forcar: bool = False, run_id: str | None = None) -> int:
+async def _fetch_tasks_async(cliente, p: dict,
+                             validador: dict) -> tuple[str, int | None, str | None,
+                                                       dict | None, dict]:
+    """_fetch_tasks_safe sobre o cliente assíncrono — mesmo retry, mesmo retorno.
+
+    Só a requisição roda no laço; a gravação do snapshot vai para uma thread.
+    """
+    with pwa_client.medir() as m:
+        return await _fetch_tasks_async_medido(cliente, p, validador, m)
+
+
+async def _fetch_tasks_async_medido(cliente, p: dict, validador: dict,
+                                    m: dict) -> tuple[str, int | None, str | None,
+                                                      dict | None, dict]:
+    pid, name = p["id"], p["name"]
+    inicio = time.perf_counter()
+    last_exc = None
+    attempt = estrangulos = 0
+    while attempt < TENTATIVAS:
+        try:
+            tentativa = dict(validador)
+            tasks = await cliente.fetch_tasks(pid, tentativa)
+            gravacao = time.perf_counter()
+            if tasks is None:
+                validador.update(tentativa)
+                return (pid, None, None, SEM_MUDANCA,
+                        _medida(m, inicio, None, attempt + estrangulos + 1))
+            # A gravação é disco e CPU (JSON, .col, delta): numa thread, para
+            # não parar o laço — e as outras coletas — enquanto ela dura.
+            delta = await asyncio.to_thread(_gravar_tarefas, pid, tasks)
+            validador.update(tentativa)
+            return (pid, len(tasks), None, delta,
+                    _medida(m, inicio, gravacao, attempt + estrangulos + 1))
+        except Exception as exc:
+            last_exc = exc
+            if _estrangulado(exc) and estrangulos < ESTRANGULOS:
+                estrangulos += 1
+                log.info("'%s' (%s) estrangulado pelo servidor — nova vaga após "
+                         "o Retry-After.", name, pid[:8])
+                continue
+            attempt += 1
+            # Timeout do aiohttp chega sem mensagem: o nome da classe é o que
+            # diz alguma coisa no log.
+            log.warning("Tentativa %d/%d falhou em '%s' (%s): %s",
+                        attempt, TENTATIVAS, name, pid[:8], exc or type(exc).__name__)
+            await asyncio.sleep(2 * attempt)  # backoff
+    return (pid, 0, str(last_exc or type(last_exc).__name__), None,
+            _medida(m, inicio, None, attempt + estrangulos))
+
+
+async def _coletar_async(ordem: list[dict], ao_concluir, gov: governador.Governador,
+                         cancelar: threading.Event | None, validadores: dict) -> None:
+    """Coleta as tarefas de `ordem` com as vagas que o governador liberar.
+
+    `validadores` é o de cada projeto (ver _validador), atualizado na coleta.
+    `ao_concluir(pid, n, erro, delta, medida)` é chamado a cada projeto
+    terminado, na ordem em que terminam. Se `cancelar` for sinalizado, o que
+    está em voo é abortado e cada projeto pendente volta como erro "cancelado"
+    — o estado dele não avança e o próximo run tenta de novo.
+    """
+    async with pwa_client.ClienteAssincrono(gov, TIMEOUT_TAREFAS) as cliente:
+        pendentes = {asyncio.create_task(
+                         _fetch_tasks_async(cliente, p, validadores[p["id"]])): p["id"]
+                     for p in ordem}
+        while pendentes:
+            feitos, _ = await asyncio.wait(pendentes, timeout=0.5,
+                                           return_when=asyncio.FIRST_COMPLETED)
+            for fut in feitos:
+                pendentes.pop(fut)
+                ao_concluir(*fut.result())
+            if cancelar is not None and cancelar.is_set() and pendentes:
+                log.warning("Coleta cancelada — %d projeto(s) interrompido(s).",
+                            len(pendentes))
+                for fut in pendentes:
+                    fut.cancel()
+                await asyncio.gather(*pendentes, return_exceptions=True)
+                for pid in pendentes.values():
+                    ao_concluir(pid, 0, "cancelado")
+                return
+
+
+def _coletar_threads(ordem: list[dict], ao_concluir, gov: governador.Governador,
+                     cancelar: threading.Event | None, validadores: dict) -> None:
+    """Caminho antigo, para quando o aiohttp não está instalado.
+
+    Uma thread por vaga possível; quantas trabalham de fato é o governador que
+    decide, dentro de pwa_client._get.
+    """
+    with ThreadPoolExecutor(max_workers=gov.maximo) as pool:
+        futures = {pool.submit(_fetch_tasks_safe, p, validadores[p["id"]]): p
+                   for p in ordem}
+        for fut in as_completed(futures):
+            ao_concluir(*fut.result())
+            if cancelar is not None and cancelar.is_set():
+                log.warning("Coleta cancelada — aguardando as requisições em voo.")
+                for f in futures:
+                    if f.cancel():
+                        ao_concluir(futures[f]["id"], 0, "cancelado")
+                break
+
+
+def _coletar(ordem: list[dict], ao_concluir, gov: governador.Governador,
+             cancelar: threading.Event | None = None,
+             validadores: dict | None = None) -> None:
+    validadores = validadores if validadores is not None else {p["id"]: {} for p in ordem}
+    try:
+        import aiohttp  # noqa: F401 — só para saber se o motor assíncrono existe
+    except ImportError:
+        log.warning("aiohttp não instalado — coletando com threads.")
+        _coletar_threads(ordem, ao_concluir, gov, cancelar, validadores)
+        return
+    asyncio.run(_coletar_async(ordem, ao_concluir, gov, cancelar, validadores))
+
+
+def main(forcar: bool = False, run_id: str | None = None,
+         concorrencia: int = CONCORRENCIA,
+         cancelar: threading.Event | None = None) -> int:
     started = time.time()
     # Quando o run nasce do botão do dashboard, o Flask já gravou um andamento
     # inicial e passa o mesmo identificador aqui — é ele que amarra os dois
     # arquivos ao mesmo run e faz o browser ignorar sobras de coletas antigas.
     run_id  = run_id or datetime.fromtimestamp(started).isoformat(timespec="seconds")
+    medicao = telemetria.Run(run_id)
+    pwa_client.novo_run()
     log.info("=" * 60)
     log.info("Fetcher iniciado — %s%s", datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
              "  [--full]" if forcar else "")
@@ -182,19 +612,31 @@ def main(forcar: bool = False, run_id: str | None = None) -> int:
         log.error("Sem token MSAL válido — rode: python -c "
                   "\"import pwa_client; pwa_client.start_device_flow()\"")
         _save_status(False, started, error="no_token", projects=0, tasks=0)
+        medicao.marcar("autenticacao")
+        medicao.gravar(False, erro="no_token")
         _save_progress(run_id, "erro", "Sem token válido — refaça o login no PWA",
                        ativo=False)
         return 1
 
+    # Um governador para o run inteiro: o que ele aprende na lista de projetos
+    # já vale para as tarefas.
+    gov = governador.Governador(inicial=_conc_anterior(), maximo=concorrencia)
+    pwa_client.definir_governador(gov)
+    medicao.marcar("autenticacao")
+
     # 2) Busca projetos (sempre — é barato e traz o LastPublishedDate de todos)
     _save_progress(run_id, "projetos", "Buscando lista de projetos…")
+    estrategias = _estrategias_anteriores()
     try:
-        projects = pwa_client.fetch_projects()
+        projects = _buscar_projetos(estrategias)
         _write_json(DATA_DIR / "projects.json", projects)
         log.info("Projetos salvos: %d", len(projects))
     except Exception as exc:
         log.exception("Erro ao buscar projetos:")
-        _save_status(False, started, error=str(exc), projects=0, tasks=0)
+        _save_status(False, started, error=str(exc), projects=0, tasks=0,
+                     lista_projetos=estrategias)
+        medicao.marcar("projetos")
+        medicao.gravar(False, erro=str(exc)[:200])
         _save_progress(run_id, "erro", f"Falha ao buscar projetos: {exc}", ativo=False)
         return 2
 
@@ -212,12 +654,15 @@ def main(forcar: bool = False, run_id: str | None = None) -> int:
              len(a_coletar), len(reaproveitados))
 
     # 4) Busca tarefas apenas dos projetos republicados (paralelo).
-    #    Maiores primeiro: evita o projeto grande sozinho no fim da fila.
     total_tasks = sum((state.get(p["id"]) or {}).get("tarefas", 0) for p in reaproveitados)
     errors      = []
-    ordem = sorted(a_coletar,
-                   key=lambda p: (state.get(p["id"]) or {}).get("tarefas", 10 ** 6),
-                   reverse=True)
+    # Maiores primeiro (LPT, escalonador.py): o projeto mais demorado começa
+    # já, em vez de correr sozinho no fim da fila.
+    ordem, previsto = escalonador.ordenar(a_coletar, state)
+    vagas_previstas = int(gov.inicial)
+    makespan_previsto = (escalonador.makespan([previsto[p["id"]] for p in ordem],
+                                              vagas_previstas) if previsto else None)
+    medicao.marcar("projetos")
 
     # A barra do dashboard mede esta fase: é aqui que o tempo do run vai. O
     # denominador são os projetos a coletar — os reaproveitados entram só como
@@ -230,48 +675,123 @@ def main(forcar: bool = False, run_id: str | None = None) -> int:
     concluidos = 0
     _save_progress(run_id, "tarefas", _rotulo_tarefas(0), 0, len(a_coletar))
 
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        futures = {pool.submit(_fetch_tasks_safe, p): p for p in ordem}
-        for fut in as_completed(futures):
-            pid, n_tasks, err = fut.result()
-            p = futures[fut]
-            concluidos += 1
-            _save_progress(run_id, "tarefas", _rotulo_tarefas(concluidos),
-                           concluidos, len(a_coletar))
-            if err:
-                errors.append({"pid": pid, "error": err})
-                continue
-            total_tasks += n_tasks
-            # Só aqui o estado avança: falha volta a ser tentada no próximo run.
-            state[pid] = {
-                "publicadoEm": p.get("publicadoEm"),
-                "coletadoEm":  datetime.now().isoformat(timespec="seconds"),
-                "tarefas":     n_tasks,
-            }
-
-    log.info("Tarefas: %d no total (%d projeto(s) recoletado(s))",
-             total_tasks, len(a_coletar) - len(errors))
+    por_pid = {p["id"]: p for p in ordem}
+    # Pedido condicional (ETag / hash do payload): republicação que não mexeu
+    # nas tarefas volta como "sem mudança" e o snapshot fica como está.
+    validadores = {p["id"]: _validador(p["id"], state, forcar) for p in ordem}
+    sem_mudanca = 0
+
+    inalterados: set[str] = set()
+
+    def _ao_concluir(pid: str, n_tasks: int | None, err: str | None,
+                     delta: dict | None = None, medida: dict | None = None) -> None:
+        nonlocal concluidos, total_tasks, sem_mudanca
+        concluidos += 1
+        _save_progress(run_id, "tarefas", _rotulo_tarefas(concluidos),
+                       concluidos, len(a_coletar))
+        if n_tasks is None and not err:
+            n_tasks = (state.get(pid) or {}).get("tarefas", 0)
+            sem_mudanca += 1
+        medicao.projeto(pid=pid, nome=por_pid[pid]["name"], tarefas=n_tasks,
+                        erro=err, previsto=_arredondar(previsto.get(pid)),
+                        sem_mudanca=delta is SEM_MUDANCA, **(medida or {}))
+        if err:
+            errors.append({"pid": pid, "error": err})
+            return
+        total_tasks += n_tasks
+        if delta is not None:
+            if any(delta.values()):
+                log.info("  %s: %d nova(s), %d alterada(s), %d removida(s)%s.",
+                         por_pid[pid]["name"][:42], delta["novas"], delta["alteradas"],
+                         delta["removidas"], ", reordenado" if delta["reordenado"] else "")
+            else:
+                inalterados.add(pid)
+        # Só aqui o estado avança: falha volta a ser tentada no próximo run.
+        state[pid] = {
+            "publicadoEm": por_pid[pid].get("publicadoEm"),
+            "coletadoEm":  datetime.now().isoformat(timespec="seconds"),
+            "tarefas":     n_tasks,
+            "delta":       delta,
+            "validadores": {k: v for k, v in validadores[pid].items() if v},
+        }
+
+    _coletar(ordem, _ao_concluir, gov, cancelar, validadores)
+    medicao.marcar("tarefas")
+    escalonamento = {
+        "previsto_s":   _arredondar(makespan_previsto),
+        "real_s":       medicao.fases["tarefas"],
+        "vagas":        vagas_previstas,
+        "sem_previsao": sum(1 for p in ordem
+                            if _arredondar(previsto.get(p["id"])) is None),
+    }
+    if makespan_previsto is not None and ordem:
+        log.info("Fase de tarefas: %.1fs (previsto %.1fs com %d vaga(s); %d projeto(s) "
+                 "sem previsão).", escalonamento["real_s"], makespan_previsto,
+                 vagas_previstas, escalonamento["sem_previsao"])
+
+    log.info("Tarefas: %d no total (%d projeto(s) recoletado(s), %d sem mudança "
+             "nas tarefas, %d com o payload da coleta anterior)", total_tasks,
+             len(a_coletar) - len(errors), len(inalterados), sem_mudanca)
     if errors:
         log.warning("Falhas: %d projetos", len(errors))
+    conc = gov.resumo()
+    log.info("Concorrência: assentou em %.1f (média %.1f, faixa %.1f–%.1f, "
+             "%d estrangulamento(s), %.0fs em pausa).",
+             conc["final"], conc["media"], conc["minima"], conc["maxima"],
+             conc["estrangulamentos"], conc["pausado_s"])
+    transp = pwa_client.resumo_transporte()
+    log.info("Transporte: %d requisição(ões) em %d conexão(ões) (%d reaproveitada(s)), "
+             "odata=%s, codificação %s.", transp["requisicoes"], transp["conexoes"],
+             transp["reaproveitadas"], transp["odata"],
+             ", ".join(f"{k}={v}" for k, v in sorted(transp["codificacao"].items())) or "—")
+
+    # 5) Análise de saúde dos cronogramas que mudaram
+    falhos = {e["pid"] for e in errors}
+    n_saude = _calcular_saude(
+        projects, {p["id"] for p in a_coletar if p["id"] not in falhos}, run_id,
+        inalterados)
+    log.info("Saúde: %d projeto(s) analisado(s), %d reaproveitado(s).",
+             n_saude, len(projects) - n_saude)
+    medicao.marcar("saude")
+
+    # 5b) Comparativo de cada projeto com o último report (índice da carteira)
+    _save_progress(run_id, "comparativos", "Comparativos com o último report…")
+    try:
+        n_comp = comparativos.atualizar(projects, lambda feito, total: _save_progress(
+            run_id, "comparativos", f"Comparativos: {feito} de {total} projeto(s)"))
+        log.info("Comparativos: %d projeto(s) comparado(s) com o último report.", n_comp)
+    except Exception as exc:
+        log.warning("Índice de comparativos não atualizado: %s", exc)
+    medicao.marcar("comparativos")
 
-    # 5) Limpa arquivos de projetos que não existem mais
+    # 6) Limpa arquivos de projetos que não existem mais
     _save_progress(run_id, "limpeza", "Organizando snapshot…",
                    len(a_coletar), len(a_coletar))
     valid_ids = {p["id"] for p in projects}
     for padrao, rotulo in (("tasks_*.json", "tarefas"),
-                           ("report_base_*.json", "base do report")):
+                           ("tasks_*.col", "tarefas compactas"),
+                           ("report_base_*.json", "base do report"),
+                           ("saude_*.json", "saúde calculada")):
         prefixo = padrao.split("*")[0]
         for f in DATA_DIR.glob(padrao):
             pid = f.stem.replace(prefixo, "")
             if pid not in valid_ids:
                 log.info("Removendo %s (%s de projeto inexistente)", f.name, rotulo)
                 f.unlink()
+    # .tmp de análise de saúde (ou do índice de comparativos) que ficou para
+    # trás (processo morto no meio da gravação). Só os velhos: o app pode estar
+    # gravando um agora.
+    for padrao in ("saude_*.tmp", "comparativos.json.*.tmp"):
+        for f in DATA_DIR.glob(padrao):
+            if time.time() - f.stat().st_mtime > 3600:
+                f.unlink(missing_ok=True)
     for pid in [pid for pid in state if pid not in valid_ids]:
         del state[pid]
 
     _save_state(state)
+    medicao.marcar("limpeza")
 
-    # 6) Grava status final
+    # 7) Grava status final
     _save_status(
         True, started,
         projects=len(projects),
@@ -279,6 +799,10 @@ def main(forcar: bool = False, run_id: str | None = None) -> int:
         coletados=len(a_coletar) - len(errors),
         reaproveitados=len(reaproveitados),
         errors=errors,
+        concorrencia=conc,
+        transporte=transp,
+        lista_projetos=estrategias,
+        escalonamento=escalonamento,
     )
     duracao = time.time() - started
     falhas  = f" · {len(errors)} falha(s)" if errors else ""
@@ -288,6 +812,8 @@ def main(forcar: bool = False, run_id: str | None = None) -> int:
         f"{total_tasks} tarefas{falhas}",
         len(a_coletar), len(a_coletar), ativo=False,
     )
+    medicao.gravar(True, concorrencia=conc["final"], estrategia=estrategias.get("ultima"),
+                   escalonamento=escalonamento)
     log.info("Fetcher concluído em %.1fs.", duracao)
     return 0
 
@@ -298,4 +824,21 @@ if __name__ == "__main__":
         _i = sys.argv.index("--run-id")
         if _i + 1 < len(sys.argv):
             _rid = sys.argv[_i + 1]
-    sys.exit(main(forcar="--full" in sys.argv, run_id=_rid))
+    _conc = CONCORRENCIA
+    if "--concorrencia" in sys.argv:
+        _i = sys.argv.index("--concorrencia")
+        if _i + 1 < len(sys.argv) and sys.argv[_i + 1].isdigit():
+            _conc = int(sys.argv[_i + 1])
+    for _flag, _modo in (("--record", "gravar"), ("--replay", "reproduzir")):
+        if _flag in sys.argv:
+            _i = sys.argv.index(_flag)
+            _arq = (sys.argv[_i + 1] if _i + 1 < len(sys.argv)
+                    and not sys.argv[_i + 1].startswith("--")
+                    else str(DATA_DIR / "cassete.zip"))
+            pwa_client.usar_cassete(_arq, _modo)
+            log.info("Cassete: %s (%s)", _arq, _modo)
+    try:
+        _codigo = main(forcar="--full" in sys.argv, run_id=_rid, concorrencia=_conc)
+    finally:
+        pwa_client.fechar_cassete()
+    sys.exit(_codigo)
@@ -0,0 +1,208 @@
+"""
+fluxo.py — Leitura de JSON em fluxo, item a item, de um array escolhido.
+
+O payload de tarefas de um cronograma grande (Sede 2: 2.286 tarefas) chega com
+várias dezenas de MB de OData verboso. `resp.json()` monta a árvore inteira em
+memória antes de fetch_tasks descartar quase tudo. Aqui o array de tarefas é
+entregue item a item, à medida que os bytes chegam: cada tarefa crua vira a
+tarefa do snapshot e é descartada, e o pico de memória passa a ser o de UMA
+tarefa crua, não o do payload.
+
+Só o array em `alvo` é lido em fluxo. O resto do documento é montado normal —
+no payload de tarefas é pouca coisa (o projeto e a tarefa-resumo) — e fica em
+`resto`, com o array-alvo trocado por uma lista vazia.
+
+Sem dependência: o trabalho pesado continua com json.JSONDecoder.raw_decode, um
+valor completo de cada vez. O que este módulo faz é só andar pela estrutura até
+o alvo e saber quando falta byte.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+
+_BRANCOS = " \t\r\n"
+_COMPACTAR = 1 << 16        # descarta o prefixo já lido a cada 64 KB
+
+
+class JsonIncompleto(ValueError):
+    """O fluxo acabou antes de o documento fechar — onde quer que o corte caia:
+    no meio de um valor, depois de uma chave, antes de um `}`, `]` ou `,`."""
+
+
+class LeitorEmFluxo:
+    """Parser incremental (push): `alimentar(bytes)` devolve os itens prontos.
+
+    `alvo` é o caminho até o array, com chaves e índices — no payload verboso
+    de tarefas, ("d", "results", 0, "Tasks", "results"). Depois do último
+    pedaço, `fechar()` devolve os itens que sobraram e preenche `resto`.
+    """
+
+    def __init__(self, alvo: tuple):
+        self.alvo   = tuple(alvo)
+        self.resto  = None
+        self._dec   = codecs.getincrementaldecoder("utf-8")()
+        self._json  = json.JSONDecoder()
+        self._buf   = ""
+        self._pos   = 0
+        self._fim   = False
+        self._itens: list = []
+        self._g     = self._documento()
+        next(self._g)               # anda até precisar do primeiro byte
+
+    # ── Interface ─────────────────────────────────────────────────────────────
+
+    def alimentar(self, dados: bytes) -> list:
+        self._buf += self._dec.decode(dados)
+        return self._andar()
+
+    def fechar(self) -> list:
+        try:
+            self._buf += self._dec.decode(b"", final=True)
+        except UnicodeDecodeError as exc:
+            raise JsonIncompleto("O fluxo terminou no meio de um caractere.") from exc
+        self._fim = True
+        try:
+            itens = self._andar()
+        except json.JSONDecodeError as exc:
+            raise JsonIncompleto("O fluxo terminou no meio de um valor JSON.") from exc
+        if self.resto is None:
+            raise JsonIncompleto("O fluxo terminou antes do fim do documento JSON.")
+        return itens
+
+    def _andar(self) -> list:
+        if self._g is not None:
+            try:
+                next(self._g)
+            except StopIteration:
+                self._g = None
+        itens, self._itens = self._itens, []
+        return itens
+
+    # ── Leitura (geradores: cada `yield` é "preciso de mais bytes") ───────────
+
+    def _documento(self):
+        self.resto = yield from self._valor(())
+        yield from self._char(no_fim=True)
+        if self._pos < len(self._buf):
+            raise ValueError("Conteúdo depois do fim do documento JSON.")
+
+    def _char(self, no_fim: bool = False):
+        """Pula brancos e devolve o próximo caractere.
+
+        Fluxo encerrado sem mais nada é JsonIncompleto: todo chamador ainda
+        espera um pedaço do documento. Só depois do documento inteiro
+        (`no_fim`) o fim é bem-vindo, e aí volta ''.
+        """
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _BRANCOS:
+                pos += 1
+            self._pos = pos
+            if pos > _COMPACTAR:
+                self._buf, self._pos = buf[pos:], 0
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._fim:
+                if no_fim:
+                    return ""
+                raise JsonIncompleto("O fluxo terminou antes do fim do documento JSON.")
+            yield
+
+    def _esperar(self, c: str):
+        achado = yield from self._char()
+        if achado != c:
+            raise ValueError("JSON inválido: esperado %r, veio %r na posição %d."
+                             % (c, achado, self._pos))
+        self._pos += 1
+
+    def _bruto(self):
+        """Um valor JSON completo, decodificado de uma vez.
+
+        Um valor que ainda não terminou de chegar falha no raw_decode. A nova
+        tentativa só vem depois de o trecho pendente dobrar de tamanho — sem
+        isso, um valor grande seria decodificado de novo a cada pedaço.
+        """
+        yield from self._char()
+        minimo = 0
+        while True:
+            pendente = len(self._buf) - self._pos
+            if pendente >= minimo or self._fim:
+                try:
+                    valor, fim = self._json.raw_decode(self._buf, self._pos)
+                except json.JSONDecodeError:
+                    if self._fim:
+                        raise
+                else:
+                    # Número no fim do buffer pode estar cortado ("12" de "125"):
+                    # só vale se houver algo depois dele, ou se o fluxo acabou.
+                    if fim < len(self._buf) or self._fim:
+                        self._pos = fim
+                        return valor
+                minimo = 2 * pendente
+            yield
+
+    def _valor(self, caminho: tuple):
+        n = len(caminho)
+        if caminho == self.alvo:
+            c = yield from self._char()
+            if c == "[":
+                yield from self._array_alvo()
+                return []
+            return (yield from self._bruto())
+        if self.alvo[:n] != caminho:
+            return (yield from self._bruto())
+
+        # Ainda no caminho até o alvo: desce um nível.
+        c = yield from self._char()
+        if c == "{":
+            self._pos += 1
+            obj = {}
+            c = yield from self._char()
+            if c == "}":
+                self._pos += 1
+                return obj
+            while True:
+                chave = yield from self._bruto()
+                yield from self._esperar(":")
+                obj[chave] = yield from self._valor(caminho + (chave,))
+                c = yield from self._char()
+                self._pos += 1
+                if c == "}":
+                    return obj
+                if c != ",":
+                    raise ValueError("JSON inválido na posição %d." % self._pos)
+        if c == "[":
+            self._pos += 1
+            lista = []
+            c = yield from self._char()
+            if c == "]":
+                self._pos += 1
+                return lista
+            while True:
+                lista.append((yield from self._valor(caminho + (len(lista),))))
+                c = yield from self._char()
+                self._pos += 1
+                if c == "]":
+                    return lista
+                if c != ",":
+                    raise ValueError("JSON inválido na posição %d." % self._pos)
+        return (yield from self._bruto())
+
+    def _array_alvo(self):
+        self._pos += 1                                  # o "["
+        c = yield from self._char()
+        if c == "]":
+            self._pos += 1
+            return
+        while True:
+            # Decodifica antes de anexar: `_andar` troca a lista de itens
+            # enquanto o gerador está suspenso no meio do valor.
+            item = yield from self._bruto()
+            self._itens.append(item)
+            c = yield from self._char()
+            self._pos += 1
+            if c == "]":
+                return
+            if c != ",":
+                raise ValueError("JSON inválido na posição %d." % self._pos)
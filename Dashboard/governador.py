@@ -0,0 +1,223 @@
+"""
+governador.py — Quantas requisições o PWA aguenta em voo, medido na hora.
+
+O número de requisições simultâneas era fixo (4 no fetcher, 4 no
+fetch_projects). Fixo ou é baixo demais quando o SharePoint está folgado ou é
+alto demais quando ele começa a estrangular — e estrangulamento no SharePoint é
+429/503 com Retry-After, que as threads ignoravam e tratavam como falha comum.
+
+O controle é AIMD, o mesmo do TCP:
+
+  - aumento aditivo: cada resposta saudável soma 1/limite, ou seja, o limite
+    sobe uma vaga a cada "janela" inteira de respostas boas;
+  - redução multiplicativa: 429/503, timeout ou queda de conexão multiplicam o
+    limite por REDUCAO — recua rápido, volta devagar;
+  - Retry-After é obedecido à risca: nenhuma vaga nova é liberada antes dele.
+
+Latência entra como freio, não como sinal de corte. Cronograma grande demora
+por ser grande, então o que se compara é a vazão (bytes/s) de cada resposta com
+a melhor já vista no run: abaixo de VAZAO_LENTA dela o servidor está sofrendo,
+e o limite para de subir.
+
+O mesmo governador serve threads (`with g.vaga()`) e corrotinas
+(`async with g.vaga_async()`); o estado é um só, protegido por lock.
+
+As vagas saem na ordem em que foram pedidas (fila de senhas): quem pede
+primeiro entra primeiro, não quem acorda primeiro. É o que faz a ordem da fila
+de coleta do fetcher (escalonador.py) valer de fato.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+REDUCAO      = 0.5    # fator do corte multiplicativo
+VAZAO_LENTA  = 0.4    # fração da melhor vazão abaixo da qual o limite não sobe
+PAUSA_PADRAO = 5.0    # segundos de pausa num 429/503 sem Retry-After
+PAUSA_MAXIMA = 120.0  # teto para um Retry-After exagerado
+
+ESTRANGULADO = (429, 503)
+
+
+def retry_after(valor: str | None) -> float | None:
+    """Segundos pedidos pelo cabeçalho Retry-After (número ou data HTTP)."""
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        quando = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if quando.tzinfo is None:
+        quando = quando.replace(tzinfo=timezone.utc)
+    return max(0.0, (quando - datetime.now(timezone.utc)).total_seconds())
+
+
+class Governador:
+    """Limite adaptativo de requisições em voo (AIMD)."""
+
+    def __init__(self, inicial: float = 4, minimo: int = 1, maximo: int = 16):
+        self.minimo  = max(1, int(minimo))
+        self.maximo  = max(self.minimo, int(maximo))
+        self.inicial = min(self.maximo, max(self.minimo, float(inicial)))
+        self.limite  = self.inicial
+
+        self._lock       = threading.Lock()
+        self._livre      = threading.Condition(self._lock)
+        self._em_voo     = 0
+        self._senhas     = itertools.count()
+        self._fila: deque[int] = deque()    # senhas esperando vaga, em ordem
+        self._pausa_ate  = 0.0          # time.monotonic() do fim do Retry-After
+        self._melhor_bps = 0.0
+
+        self.estrangulamentos = 0
+        self.falhas           = 0
+        self.pausado_s        = 0.0
+        self._inicio          = time.monotonic()
+        self._marca           = self._inicio
+        self._area            = 0.0     # integral do limite no tempo
+        self._pico            = self.limite
+        self._vale            = self.limite
+
+    # ── Sinais ────────────────────────────────────────────────────────────────
+
+    def _mudar(self, novo: float) -> None:
+        """Troca o limite acumulando a média ponderada no tempo. Com lock."""
+        agora = time.monotonic()
+        self._area  += self.limite * (agora - self._marca)
+        self._marca  = agora
+        self.limite  = min(self.maximo, max(self.minimo, novo))
+        self._pico   = max(self._pico, self.limite)
+        self._vale   = min(self._vale, self.limite)
+        self._livre.notify_all()
+
+    def registrar(self, latencia: float, status: int | None,
+                  n_bytes: int | None = None, espera: float | None = None) -> None:
+        """Resultado de uma requisição. `status` None = timeout/conexão caiu."""
+        with self._lock:
+            if status in ESTRANGULADO:
+                self.estrangulamentos += 1
+                self._mudar(self.limite * REDUCAO)
+                pausa = min(PAUSA_MAXIMA, espera if espera is not None else PAUSA_PADRAO)
+                fim = time.monotonic() + pausa
+                if fim > self._pausa_ate:
+                    self.pausado_s += fim - max(self._pausa_ate, time.monotonic())
+                    self._pausa_ate = fim
+                return
+            if status is None or status >= 500:
+                self.falhas += 1
+                self._mudar(self.limite * REDUCAO)
+                return
+            if status >= 400:
+                return      # erro do pedido, não do servidor: não mexe no limite
+            if n_bytes and latencia > 0:
+                bps = n_bytes / latencia
+                if bps < self._melhor_bps * VAZAO_LENTA:
+                    return
+                self._melhor_bps = max(self._melhor_bps, bps)
+            self._mudar(self.limite + 1.0 / self.limite)
+
+    # ── Vagas ─────────────────────────────────────────────────────────────────
+
+    def _senha(self) -> int:
+        """Lugar na fila de vagas. Com lock."""
+        senha = next(self._senhas)
+        self._fila.append(senha)
+        return senha
+
+    def _tentar_entrar(self, senha: int) -> float:
+        """Ocupa uma vaga e devolve 0, ou devolve quanto esperar. Com lock.
+
+        Só a senha mais antiga da fila entra; as outras esperam a vez dela.
+        """
+        pausa = self._pausa_ate - time.monotonic()
+        if pausa > 0:
+            return pausa
+        if self._fila[0] != senha or self._em_voo >= int(self.limite):
+            return -1.0                 # sem prazo: espera alguém sair
+        self._fila.popleft()
+        self._em_voo += 1
+        self._livre.notify_all()        # o próximo da fila pode caber também
+        return 0.0
+
+    def _desistir(self, senha: int) -> None:
+        """Tira da fila quem parou de esperar (cancelado). Com lock."""
+        if senha in self._fila:
+            self._fila.remove(senha)
+            self._livre.notify_all()
+
+    def _sair(self) -> None:
+        with self._lock:
+            self._em_voo -= 1
+            self._livre.notify_all()
+
+    @contextlib.contextmanager
+    def vaga(self):
+        """Bloqueia a thread até haver vaga dentro do limite atual."""
+        with self._lock:
+            senha = self._senha()
+            try:
+                while True:
+                    espera = self._tentar_entrar(senha)
+                    if espera == 0:
+                        break
+                    self._livre.wait(espera if espera > 0 else None)
+            except BaseException:
+                self._desistir(senha)
+                raise
+        try:
+            yield
+        finally:
+            self._sair()
+
+    @contextlib.asynccontextmanager
+    async def vaga_async(self):
+        """Mesma vaga, para corrotinas. Espera sem segurar o event loop."""
+        with self._lock:
+            senha = self._senha()
+        try:
+            while True:
+                with self._lock:
+                    espera = self._tentar_entrar(senha)
+                if espera == 0:
+                    break
+                # Vaga liberada por outra corrotina chega em milissegundos; o
+                # passo curto evita amarrar o lock de thread a um
+                # asyncio.Condition.
+                await asyncio.sleep(espera if espera > 0 else 0.05)
+        except BaseException:
+            with self._lock:
+                self._desistir(senha)
+            raise
+        try:
+            yield
+        finally:
+            self._sair()
+
+    # ── Relatório ─────────────────────────────────────────────────────────────
+
+    def resumo(self) -> dict:
+        """Onde o limite assentou — vai para o last_update.json."""
+        with self._lock:
+            self._mudar(self.limite)
+            duracao = self._marca - self._inicio
+            media = self._area / duracao if duracao > 0 else self.limite
+            return {
+                "inicial":          round(self.inicial, 1),
+                "final":            round(self.limite, 1),
+                "media":            round(media, 1),
+                "minima":           round(self._vale, 1),
+                "maxima":           round(self._pico, 1),
+                "teto":             self.maximo,
+                "estrangulamentos": self.estrangulamentos,
+                "falhas":           self.falhas,
+                "pausado_s":        round(self.pausado_s, 1),
+            }
@@ -0,0 +1,187 @@
+"""
+progresso.py — O andamento do fetcher empurrado para o app, sem passar pelo disco.
+
+Antes o fetcher regravava data/fetch_progress.json (tmp + replace) a cada
+projeto concluído, e o browser pesquisava /api/progress a cada segundo: um
+rename por projeto, uma requisição por segundo, e até um segundo de atraso.
+
+Agora o app abre um socket UDP em 127.0.0.1 (porta escolhida pelo sistema) e
+deixa a porta em data/progresso.porta. O fetcher — disparado pelo botão ou
+pelo Agendador, tanto faz — manda cada andamento como um datagrama JSON para
+essa porta, e o app o repassa por SSE em /api/progress/stream.
+
+  - Datagrama, não conexão: o fetcher nunca espera pelo app, e app fechado é
+    só um datagrama que ninguém lê. Andamento é acessório.
+  - O arquivo continua: o fetcher ainda o grava a cada MUDANÇA DE FASE e no
+    fim (meia dúzia de escritas por run). É o que /api/progress devolve quando
+    o app não estava ouvindo, e o que sobra para quem abrir o dashboard depois.
+  - A porta é relida quando o arquivo muda: app reiniciado no meio do run
+    volta a receber do andamento seguinte em diante.
+  - O app tira o arquivo ao sair (atexit). App derrubado sem chance de
+    limpar deixa o arquivo para trás: por isso a porta lida só vale se
+    houver alguém nela — se o fetcher consegue ocupá-la, o app se foi, e o
+    fetcher volta a gravar o arquivo a cada andamento.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent / "data"
+ARQUIVO  = "progresso.porta"
+HOST     = "127.0.0.1"
+TAMANHO  = 8192     # um andamento tem ~200 bytes; rótulo longo cabe com folga
+
+
+def caminho() -> Path:
+    return DATA_DIR / ARQUIVO
+
+
+# ── Lado do app: ouve e guarda o último ───────────────────────────────────────
+
+class Canal:
+    """O socket do app e o último andamento recebido.
+
+    Quem quer acompanhar guarda a `versao` que já viu e chama esperar(): a
+    chamada volta assim que chega andamento mais novo (ou no timeout).
+    """
+
+    def __init__(self):
+        self._cond   = threading.Condition()
+        self._ultimo: dict | None = None
+        self._versao = 0
+        self._sock: socket.socket | None = None
+
+    @property
+    def porta(self) -> int | None:
+        return self._sock.getsockname()[1] if self._sock else None
+
+    def abrir(self) -> None:
+        """Abre o socket, anuncia a porta em data/ e começa a ouvir."""
+        if self._sock is not None:
+            return
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((HOST, 0))
+        DATA_DIR.mkdir(exist_ok=True)
+        tmp = caminho().with_suffix(".porta.tmp")
+        tmp.write_text(str(self.porta), encoding="utf-8")
+        os.replace(tmp, caminho())
+        atexit.register(self.fechar)
+        threading.Thread(target=self._ouvir, name="progresso", daemon=True).start()
+        logger.info("Andamento do fetcher: ouvindo em %s:%d", HOST, self.porta)
+
+    def fechar(self) -> None:
+        """Tira o anúncio da porta — se ainda for o desta instância — e fecha."""
+        if self._sock is None:
+            return
+        try:
+            if caminho().read_text(encoding="utf-8").strip() == str(self.porta):
+                caminho().unlink()
+        except (OSError, ValueError):
+            pass
+        self._sock.close()
+        self._sock = None
+
+    def _ouvir(self) -> None:
+        sock = self._sock
+        while True:
+            try:
+                dados = sock.recv(TAMANHO)
+            except OSError:
+                if sock.fileno() < 0:       # fechado (fechar)
+                    return
+                # No Windows, datagrama anterior recusado volta como erro aqui.
+                continue
+            try:
+                evento = json.loads(dados)
+            except ValueError:
+                continue
+            if isinstance(evento, dict):
+                self.publicar(evento)
+
+    def publicar(self, evento: dict) -> None:
+        """Toma `evento` como o andamento atual e acorda quem espera."""
+        with self._cond:
+            self._ultimo = evento
+            self._versao += 1
+            self._cond.notify_all()
+
+    def atual(self) -> tuple[int, dict | None]:
+        with self._cond:
+            return self._versao, self._ultimo
+
+    def esperar(self, versao: int, timeout: float) -> tuple[int, dict | None]:
+        """(versão, andamento) assim que houver versão depois de `versao`."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._versao != versao, timeout)
+            return self._versao, self._ultimo
+
+
+# ── Lado do fetcher: manda, sem esperar ───────────────────────────────────────
+
+LOCAL: Canal | None = None      # o fetcher roda dentro do app: publica direto
+_destino: tuple[int, int | None] | None = None     # (mtime_ns do arquivo, porta)
+_sock_envio: socket.socket | None = None
+
+
+def _ocupada(porta: int) -> bool:
+    """Alguém ouve em `porta`? Se o bind passa, não: o app que a anunciou morreu."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            s.bind((HOST, porta))
+        except OSError:
+            return True
+    return False
+
+
+def _porta() -> int | None:
+    """A porta anunciada pelo app, relida só quando o arquivo muda.
+
+    Na releitura confere se ela está ocupada: arquivo de app derrubado (sem
+    o atexit) vale como app ausente.
+    """
+    global _destino
+    try:
+        mtime = caminho().stat().st_mtime_ns
+    except OSError:
+        return None
+    if _destino is None or _destino[0] != mtime:
+        try:
+            porta = int(caminho().read_text(encoding="utf-8").strip())
+            _destino = (mtime, porta if _ocupada(porta) else None)
+        except (OSError, ValueError):
+            _destino = (mtime, None)
+    return _destino[1]
+
+
+def enviar(evento: dict) -> bool:
+    """Manda `evento` ao app. False se não há app anunciado (ou o envio falhou).
+
+    True não garante que alguém leu — é datagrama. Por isso quem chama ainda
+    grava o arquivo nas mudanças de fase. Com LOCAL (coleta dentro do app), o
+    andamento vai direto ao canal.
+    """
+    global _sock_envio
+    if LOCAL is not None:
+        LOCAL.publicar(evento)
+        return True
+    porta = _porta()
+    if porta is None:
+        return False
+    try:
+        if _sock_envio is None:
+            _sock_envio = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _sock_envio.sendto(json.dumps(evento, ensure_ascii=False).encode("utf-8"),
+                           (HOST, porta))
+        return True
+    except OSError as exc:
+        # Porta de um app que já fechou: o Linux devolve a recusa no envio.
+        logger.debug("Andamento não enviado: %s", exc)
+        return False
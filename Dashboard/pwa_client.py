@@ -10,17 +10,29 @@ Descobertas-chave:
 Autenticação: MSAL device flow (OAuth2 + AllSites.Read), suporta MFA.
 """
 
+import contextlib
+import contextvars
+import functools
+import hashlib
 import json
 import logging
 import os
 import re
 import threading
-from urllib.parse import urlencode
-from datetime import datetime, timedelta, timezone
+import time
+import uuid
+from collections import Counter
+from urllib.parse import urlencode, urljoin
+from datetime import date, datetime, timedelta, timezone
 
 import msal
 import requests
 
+import cassete
+import fluxo
+import governador
+import tabelas_pesquisa
+
 # ── Configuração ──────────────────────────────────────────────────────────────
 PWA_URL    = "https://horizontesarq.sharepoint.com/sites/pwa"
 SP_HOST    = "https://horizontesarq.sharepoint.com"
@@ -33,10 +45,10 @@ AUTHORITY  = f"https://login.microsoftonline.com/{TENANT_ID}"
 SCOPES     = ["https://horizontesarq.sharepoint.com/AllSites.Read"]
 CACHE_FILE = os.path.join(os.path.dirname(__file__), ".token_cache.json")
 
-# Cache em disco das tabelas de pesquisa (Cliente/Cidade/Coordenador/...).
-# Esses valores mudam raramente — sem o cache, cada processo baixava todas as
-# tabelas com todas as entradas antes de qualquer coisa útil.
-LOOKUP_CACHE_FILE = os.path.join(os.path.dirname(__file__), "data", "lookup_cache.json")
+# Índice em disco das tabelas de pesquisa (Cliente/Cidade/Coordenador/...),
+# ver tabelas_pesquisa.py. Esses valores mudam raramente: cada tabela em uso é
+# conferida com o servidor depois de LOOKUP_CACHE_TTL, uma a uma.
+LOOKUP_CACHE_FILE = os.path.join(os.path.dirname(__file__), "data", "lookup_cache.sqlite")
 LOOKUP_CACHE_TTL  = timedelta(days=7)
 
 # ── Mapeamento de Custom Fields (Project entity) ──────────────────────────────
@@ -56,8 +68,12 @@ _session: requests.Session | None = None
 _pending_flow: dict | None = None
 _pending_app: msal.PublicClientApplication | None = None
 _flow_lock = threading.Lock()
-_lookup_cache: dict[str, str] = {}  # entry_id (sem hifens) → FullValue
-_lookup_refetched = False           # já forçou recarga do servidor neste processo?
+_lookup: tabelas_pesquisa.Indice | None = None   # aberto por _build_lookup_cache
+_lookup_conferido = False           # tabelas vencidas já atualizadas neste processo?
+_lookup_refetched: set[str | None] = set()   # recargas por entry desconhecida (None = todas)
+_governador: governador.Governador | None = None   # quem dita as vagas (fetcher)
+_token_fixo: str | None = None      # servidor local (apontar_para): sem MSAL
+_cassete: cassete.Cassete | None = None   # gravação/reprodução (usar_cassete)
 
 
 # ── Cache de token ────────────────────────────────────────────────────────────
@@ -83,6 +99,8 @@ def _make_app(cache: msal.SerializableTokenCache) -> msal.PublicClientApplicatio
 # ── Autenticação MSAL (device flow) ──────────────────────────────────────────
 
 def get_token_silent() -> str | None:
+    if _token_fixo is not None:
+        return _token_fixo
     cache = _load_cache()
     app = _make_app(cache)
     accounts = app.get_accounts()
@@ -141,17 +159,100 @@ def is_authenticated() -> bool:
 
 
 # ── Sessão HTTP ───────────────────────────────────────────────────────────────
+#
+# Transporte: um HTTPAdapter com pool do tamanho da concorrência (o padrão do
+# requests é 10 conexões, e com o governador subindo até 16 as excedentes eram
+# abertas e descartadas a cada resposta), retry do urllib3 para falha de
+# conexão e 502/504 em GET, e compressão pedida explicitamente. 429/503 ficam
+# FORA do retry do urllib3 de propósito: quem cuida deles é o governador, que
+# precisa ver cada estrangulamento para recuar.
+#
+# Formato: `odata=minimalmetadata` (JSON light) corta o __metadata e os
+# envelopes {"results": [...]} de cada coleção — o payload verboso tem quase o
+# dobro do tamanho. Os leitores abaixo aceitam os dois formatos (_colecao,
+# _resultados). Se o servidor recusar o JSON light (406/415), o processo
+# volta para o verboso, como o $select das tarefas.
+
+ODATA           = "minimalmetadata"     # "verbose" volta ao formato antigo
+CONEXOES_PADRAO = 16                    # pool sem governador
+TENTATIVAS_HTTP = 3                     # retry do urllib3 (conexão, 502, 504)
+
+_odata_light_ok = True
+_lock_transporte = threading.Lock()
+_codificacoes: Counter = Counter()      # Content-Encoding das respostas
+_conexoes_antigas = {"requisicoes": 0, "conexoes": 0}   # de sessões descartadas
+_conexoes_async   = {"requisicoes": 0, "conexoes": 0}
+
+
+def _odata() -> str:
+    return ODATA if _odata_light_ok else "verbose"
+
+
+def _aceita_codificacao(assincrono: bool = False) -> str:
+    # O que o cliente sabe descomprimir — pedir o que ele não lê seria receber
+    # um corpo ilegível. O urllib3 diz o que aceita (gzip e deflate sempre, br
+    # com o pacote Brotli, zstd com o zstandard). O aiohttp 3.9 não decodifica
+    # zstd: para ele a lista é montada aqui, com br só se o Brotli (ou o
+    # brotlicffi) estiver instalado — a mesma condição com que ele o lê.
+    if not assincrono:
+        from urllib3.util.request import ACCEPT_ENCODING
+        return ACCEPT_ENCODING.replace(",", ", ")
+    codificacoes = ["gzip", "deflate"]
+    try:
+        import brotlicffi  # noqa: F401
+        codificacoes.append("br")
+    except ImportError:
+        try:
+            import brotli  # noqa: F401
+            codificacoes.append("br")
+        except ImportError:
+            pass
+    return ", ".join(codificacoes)
+
+
+def _headers(token: str, assincrono: bool = False) -> dict:
+    return {
+        "Authorization": f"Bearer {token}",
+        "Accept": f"application/json;odata={_odata()}",
+        "Content-Type": "application/json;odata=verbose",
+        "Accept-Encoding": _aceita_codificacao(assincrono),
+    }
+
+
+def _recusou_formato(status: int | None) -> bool:
+    """Trata a recusa do JSON light. Devolve False se o erro é outro."""
+    global _odata_light_ok
+    if status not in (406, 415) or not _odata_light_ok or ODATA == "verbose":
+        return False
+    _odata_light_ok = False
+    logger.warning("Servidor recusou odata=%s (HTTP %s) — seguindo com "
+                   "odata=verbose pelo resto do processo.", ODATA, status)
+    reset_session()
+    return True
+
 
 def _build_session() -> requests.Session:
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
     token = get_token_silent()
     if not token:
         raise RuntimeError("Não autenticado.")
+    conexoes = _governador.maximo if _governador else CONEXOES_PADRAO
+    retry = Retry(
+        total=TENTATIVAS_HTTP, connect=TENTATIVAS_HTTP, read=TENTATIVAS_HTTP,
+        status=TENTATIVAS_HTTP, status_forcelist=(502, 504),
+        allowed_methods=frozenset({"GET"}), backoff_factor=1.0,
+        respect_retry_after_header=True, raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=conexoes,
+                            pool_block=True, max_retries=retry)
+    if _cassete is not None:
+        adaptador = cassete.adaptador(_cassete, adaptador)
     session = requests.Session()
-    session.headers.update({
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json;odata=verbose",
-        "Content-Type": "application/json;odata=verbose",
-    })
+    session.mount("https://", adaptador)
+    session.mount("http://", adaptador)
+    session.headers.update(_headers(token))
     return session
 
 
@@ -162,49 +263,444 @@ def get_session() -> requests.Session:
     return _session
 
 
+def _conexoes_da_sessao(session: requests.Session | None) -> dict:
+    """Requisições feitas e conexões abertas pelos pools do urllib3 da sessão."""
+    total = {"requisicoes": 0, "conexoes": 0}
+    if session is None:
+        return total
+    for adaptador in set(session.adapters.values()):
+        gerente = getattr(adaptador, "poolmanager", None)
+        if gerente is None:
+            continue
+        for chave in list(gerente.pools.keys()):
+            pool = gerente.pools.get(chave)
+            if pool is not None:
+                total["requisicoes"] += pool.num_requests
+                total["conexoes"]    += pool.num_connections
+    return total
+
+
 def reset_session():
     global _session
+    with _lock_transporte:
+        velhas = _conexoes_da_sessao(_session)
+        for k in _conexoes_antigas:
+            _conexoes_antigas[k] += velhas[k]
     _session = None
 
 
+def apontar_para(pwa_url: str, token: str | None = None) -> None:
+    """Passa a falar com outro servidor PWA — o falso da bancada, por exemplo.
+
+    Com `token`, o MSAL sai de cena: é ele que vai no Authorization, e o
+    processo se considera autenticado. Para o tenant de verdade não se usa.
+    """
+    global PWA_URL, PS_BASE, PDATA_BASE, BATCH_URL, _token_fixo
+    PWA_URL    = pwa_url.rstrip("/")
+    PS_BASE    = f"{PWA_URL}/_api/ProjectServer"
+    PDATA_BASE = f"{PWA_URL}/_api/ProjectData"
+    BATCH_URL  = f"{PWA_URL}/_api/$batch"
+    _token_fixo = token
+    reset_session()
+
+
+def usar_cassete(caminho: str, modo: str) -> cassete.Cassete:
+    """Grava (`modo="gravar"`) ou reproduz as respostas do PWA numa cassete.
+
+    Reproduzindo, nada sai para a rede e o MSAL não é consultado. Quem abriu
+    fecha com fechar_cassete() — gravando, é lá que o índice vai para o disco.
+    """
+    global _cassete, _token_fixo
+    fechar_cassete()
+    _cassete = cassete.Cassete(caminho, modo)
+    if modo == "reproduzir" and _token_fixo is None:
+        _token_fixo = "cassete"
+    reset_session()
+    return _cassete
+
+
+def fechar_cassete() -> None:
+    global _cassete
+    if _cassete is not None:
+        _cassete.fechar()
+        _cassete = None
+        reset_session()
+
+
+def _anotar(codificacao: str | None) -> None:
+    with _lock_transporte:
+        _codificacoes[(codificacao or "identity").lower()] += 1
+
+
+def resumo_transporte() -> dict:
+    """Reaproveitamento de conexão e compressão do processo — para o log do run.
+
+    `reaproveitadas` é requisição que saiu por conexão já aberta (keep-alive):
+    quanto mais perto de `requisicoes`, menos handshakes TLS.
+    """
+    with _lock_transporte:
+        atual = _conexoes_da_sessao(_session)
+        req = atual["requisicoes"] + _conexoes_antigas["requisicoes"] + _conexoes_async["requisicoes"]
+        con = atual["conexoes"] + _conexoes_antigas["conexoes"] + _conexoes_async["conexoes"]
+        return {
+            "odata":         _odata(),
+            "requisicoes":   req,
+            "conexoes":      con,
+            "reaproveitadas": max(0, req - con),
+            "codificacao":   dict(_codificacoes),
+        }
+
+
+def novo_run() -> None:
+    """Zera o que é de um run só, para o fetcher que roda dentro do app.
+
+    O fetcher avulso começa cada run num processo novo. Dentro do app os runs
+    dividem o processo, e o que fica de um para o outro — imports, índice das
+    tabelas de pesquisa aberto, datas já convertidas — é justamente o ganho.
+    Mas os contadores do resumo de transporte, a conferência das tabelas
+    vencidas, as recargas por entry desconhecida e as recusas de formato e de
+    $batch valem por run, como valiam por processo.
+    """
+    global _lookup_conferido, _odata_light_ok, _batch_ok
+    reset_session()
+    with _lock_transporte:
+        _codificacoes.clear()
+        for contadores in (_conexoes_antigas, _conexoes_async):
+            for k in contadores:
+                contadores[k] = 0
+    _lookup_conferido = False
+    _lookup_refetched.clear()
+    _odata_light_ok = _batch_ok = True
+
+
 def logout():
-    global _session, _pending_flow, _pending_app, _lookup_cache
+    global _session, _pending_flow, _pending_app, _lookup, _lookup_conferido
     _session = _pending_flow = _pending_app = None
-    _lookup_cache = {}
+    if _lookup is not None:
+        _lookup.fechar()
+    _lookup, _lookup_conferido = None, False
     if os.path.exists(CACHE_FILE):
         os.remove(CACHE_FILE)
 
 
 # ── HTTP helpers ──────────────────────────────────────────────────────────────
 
-def _get(url: str, timeout: int = 90) -> dict:
-    resp = get_session().get(url, timeout=timeout)
-    if resp.status_code == 401:
-        logger.warning("Token expirado, reconstruindo sessão...")
-        reset_session()
-        resp = get_session().get(url, timeout=timeout)
+def definir_governador(g: governador.Governador | None) -> None:
+    """Passa a controlar as requisições deste processo pelo governador `g`.
+
+    Sem governador (uso avulso, export_campos, shell) nada é limitado além do
+    tamanho fixo dos pools — é o comportamento de antes.
+    """
+    global _governador
+    _governador = g
+    reset_session()         # o pool da sessão é dimensionado pelo teto do governador
+
+
+def _vaga():
+    return _governador.vaga() if _governador else contextlib.nullcontext()
+
+
+# Medida em curso (ver medir): cada tarefa asyncio e cada thread enxerga a sua.
+_medida: contextvars.ContextVar[dict | None] = contextvars.ContextVar("medida", default=None)
+
+
+@contextlib.contextmanager
+def medir():
+    """Soma o que as requisições feitas dentro do bloco custaram.
+
+    `with pwa_client.medir() as m:` — ao fim, m tem `requisicoes`, `bytes`
+    (do corpo, já descomprimido) e `espera_s`, o tempo esperando vaga do
+    governador. É como o fetcher mede cada projeto para a telemetria.
+    """
+    m = {"requisicoes": 0, "bytes": 0, "espera_s": 0.0}
+    marca = _medida.set(m)
+    try:
+        yield m
+    finally:
+        _medida.reset(marca)
+
+
+def _medir(espera: float, n_bytes: int | None) -> None:
+    m = _medida.get()
+    if m is not None:
+        m["requisicoes"] += 1
+        m["bytes"] += n_bytes or 0
+        m["espera_s"] += espera
+
+
+def _registrar(inicio: float, resp: requests.Response | None,
+               n_bytes: int | None = None) -> None:
+    """Informa o governador da latência e do desfecho de uma requisição.
+
+    `n_bytes` é para resposta lida em fluxo, cujo `.content` já foi consumido.
+    """
+    if _governador is None:
+        return
+    if resp is None:
+        _governador.registrar(time.monotonic() - inicio, None)
+        return
+    _governador.registrar(
+        time.monotonic() - inicio, resp.status_code,
+        n_bytes if n_bytes is not None else len(resp.content),
+        governador.retry_after(resp.headers.get("Retry-After")),
+    )
+
+
+def _get(url: str, timeout: int = 90, validador: dict | None = None,
+         recusas: tuple = ()) -> dict | None:
+    """GET com vaga do governador. Com `validador`, condicional (ver _conferir):
+    None se a resposta é a mesma da coleta anterior.
+
+    `recusas` são os status que quem chama espera e trata (a sondagem do
+    ProjectData): ainda sobem como HTTPError, mas vão ao log como INFO.
+    """
+    pedido = time.monotonic()
+    condicional = _condicional(validador)
+    with _vaga():
+        inicio = time.monotonic()
+        try:
+            resp = get_session().get(url, timeout=timeout, headers=condicional)
+            if resp.status_code == 401:
+                logger.warning("Token expirado, reconstruindo sessão...")
+                reset_session()
+                resp = get_session().get(url, timeout=timeout, headers=condicional)
+            if _recusou_formato(resp.status_code):
+                resp = get_session().get(url, timeout=timeout, headers=condicional)
+        except requests.RequestException:
+            _registrar(inicio, None)
+            raise
+        _registrar(inicio, resp)
+    _medir(inicio - pedido, len(resp.content))
+    _anotar(resp.headers.get("Content-Encoding"))
+    if resp.status_code == NAO_MUDOU:
+        return None
     if not resp.ok:
-        logger.error("HTTP %s — %s", resp.status_code, resp.text[:400])
+        # Estrangulamento é o servidor pedindo calma, não erro: o governador
+        # já recuou e a requisição volta depois do Retry-After. Recusa que o
+        # chamador espera também não é: ele avisa, do jeito dele.
+        if resp.status_code in recusas:
+            nivel = logging.INFO
+        elif resp.status_code in governador.ESTRANGULADO:
+            nivel = logging.WARNING
+        else:
+            nivel = logging.ERROR
+        logger.log(nivel, "HTTP %s — %s", resp.status_code, resp.text[:400])
         resp.raise_for_status()
+    if _conferir(validador, resp.headers, _assinatura(resp.content)):
+        return None
     return resp.json()
 
 
-def _get_all(base_url: str, params: dict | None = None) -> list:
-    """Busca todos os registros com paginação automática."""
+def _resultados(r: dict) -> list:
+    """A coleção de topo de uma resposta: d.results (verboso) ou value (light)."""
+    d = r.get("d")
+    if isinstance(d, dict):
+        return d.get("results", [])
+    return r.get("value") or []
+
+
+def _colecao(v) -> list:
+    """Coleção expandida: {"results": [...]} no verboso, lista direta no light."""
+    if isinstance(v, list):
+        return v
+    if isinstance(v, dict):
+        return v.get("results", [])
+    return []
+
+
+def _get_all(base_url: str, params: dict | None = None, recusas: tuple = ()) -> list:
+    """Busca todos os registros com paginação automática. `recusas`: ver _get."""
     qs  = ("?" + urlencode(params, safe="$,()'")) if params else ""
     url = f"{base_url}{qs}"
     results = []
     while url:
-        data = _get(url)
+        data = _get(url, recusas=recusas)
         d    = data.get("d") or {}
-        page = d.get("results")
-        if page is None:
-            page = data.get("value") or []
-        results.extend(page)
-        url = d.get("__next") or data.get("@odata.nextLink")
+        results.extend(_resultados(data))
+        proxima = (d.get("__next") or data.get("odata.nextLink")
+                   or data.get("@odata.nextLink"))
+        # No JSON light o link da próxima página pode vir relativo.
+        url = urljoin(url, proxima) if proxima else None
     return results
 
 
+# ── $batch ────────────────────────────────────────────────────────────────────
+#
+# O SharePoint aceita várias requisições num POST só para /_api/$batch
+# (multipart/mixed, uma requisição HTTP inteira em cada parte). Uma ida e volta
+# no lugar de N — e, do escritório, cada ida e volta a mais é um handshake TLS
+# e uma latência transatlântica. Cada parte responde com o próprio status: uma
+# parte que falha não derruba as outras.
+
+LOTE_BATCH = 10                          # GETs por $batch
+BATCH_URL  = f"{PWA_URL}/_api/$batch"
+
+# Vira False se o servidor recusar o $batch — aí _get_many faz um GET por URL,
+# como antes, pelo resto do processo.
+_batch_ok = True
+_BATCH_RECUSADO = (400, 403, 404, 405, 501)     # servidor sem $batch
+
+
+def _erro_da_parte(url: str, status: int, cabecalhos: dict, corpo: bytes) -> requests.HTTPError:
+    """HTTPError igual ao do _get, para quem trata erro não saber de onde veio."""
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(cabecalhos)
+    resp._content = corpo
+    resp.url = url
+    return requests.HTTPError(f"HTTP {status} numa parte do $batch", response=resp)
+
+
+def _montar_batch(urls: list[str], fronteira: str) -> bytes:
+    partes = []
+    for url in urls:
+        partes.append(
+            f"--{fronteira}\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-Transfer-Encoding: binary\r\n"
+            "\r\n"
+            # Na linha de requisição a URL vai codificada, como o requests
+            # faria num GET avulso: o $filter tem espaços e aspas.
+            f"GET {requests.utils.requote_uri(url)} HTTP/1.1\r\n"
+            f"Accept: application/json;odata={_odata()}\r\n"
+            "\r\n"
+        )
+    partes.append(f"--{fronteira}--\r\n")
+    return "".join(partes).encode("utf-8")
+
+
+_LINHA_VAZIA = re.compile(rb"\r?\n\r?\n")
+
+
+def _ler_batch(tipo: str, corpo: bytes) -> list[tuple[int, dict, bytes]]:
+    """Resposta multipart do $batch → [(status, cabeçalhos, corpo)] na ordem."""
+    m = re.search(r'boundary="?([^";]+)"?', tipo or "")
+    if not m:
+        raise ValueError(f"Resposta do $batch sem boundary ({tipo!r}).")
+    fronteira = b"--" + m.group(1).encode("ascii")
+    saida = []
+    for parte in corpo.split(fronteira)[1:]:
+        if parte.startswith(b"--"):
+            break                                   # fecho do multipart
+        # Cada parte: cabeçalhos MIME, linha vazia, a resposta HTTP embutida
+        # (linha de status, cabeçalhos, linha vazia, corpo).
+        _, http = _LINHA_VAZIA.split(parte.lstrip(b"\r\n"), maxsplit=1)
+        cab_http, corpo_http = (_LINHA_VAZIA.split(http, maxsplit=1) + [b""])[:2]
+        linhas = cab_http.decode("iso-8859-1").splitlines()
+        status = int(linhas[0].split()[1])
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            nome, _, valor = linha.partition(":")
+            cabecalhos[nome.strip()] = valor.strip()
+        saida.append((status, cabecalhos, corpo_http.rstrip(b"\r\n")))
+    return saida
+
+
+def _post_batch(urls: list[str]) -> list:
+    """Um $batch. Devolve, na ordem de `urls`, o JSON de cada parte ou o erro dela."""
+    fronteira = f"batch_{uuid.uuid4()}"
+    corpo = _montar_batch(urls, fronteira)
+    cab = {"Content-Type": f"multipart/mixed; boundary={fronteira}",
+           "Accept": "multipart/mixed"}
+    pedido = time.monotonic()
+    with _vaga():
+        inicio = time.monotonic()
+        try:
+            resp = get_session().post(BATCH_URL, data=corpo, headers=cab, timeout=90)
+            if resp.status_code == 401:
+                logger.warning("Token expirado, reconstruindo sessão...")
+                reset_session()
+                resp = get_session().post(BATCH_URL, data=corpo, headers=cab, timeout=90)
+        except requests.RequestException:
+            _registrar(inicio, None)
+            raise
+        _registrar(inicio, resp)
+    _medir(inicio - pedido, len(resp.content))
+    _anotar(resp.headers.get("Content-Encoding"))
+    if not resp.ok:
+        if resp.status_code not in _BATCH_RECUSADO:
+            nivel = (logging.WARNING if resp.status_code in governador.ESTRANGULADO
+                     else logging.ERROR)
+            logger.log(nivel, "HTTP %s no $batch — %s", resp.status_code, resp.text[:400])
+        resp.raise_for_status()
+    partes = _ler_batch(resp.headers.get("Content-Type", ""), resp.content)
+    if len(partes) != len(urls):
+        raise ValueError(f"$batch devolveu {len(partes)} parte(s) para {len(urls)} GET(s).")
+    saida = []
+    for url, (status, cabecalhos, corpo_parte) in zip(urls, partes):
+        if 200 <= status < 300:
+            saida.append(json.loads(corpo_parte))
+            continue
+        if status in governador.ESTRANGULADO and _governador is not None:
+            # A parte estrangulada conta como uma resposta estrangulada: o
+            # governador recua e cumpre o Retry-After dela.
+            _governador.registrar(time.monotonic() - inicio, status, None,
+                                  governador.retry_after(cabecalhos.get("Retry-After")))
+        saida.append(_erro_da_parte(url, status, cabecalhos, corpo_parte))
+    return saida
+
+
+def _recusou_batch(status: int | None) -> None:
+    global _batch_ok
+    if _batch_ok:
+        _batch_ok = False
+        logger.warning("Servidor recusou o $batch (HTTP %s) — seguindo com um "
+                       "GET por requisição pelo resto do processo.", status)
+
+
+def _um(url: str):
+    try:
+        return _get(url)
+    except Exception as exc:
+        return exc
+
+
+def _get_many(urls: list[str], lote: int | None = None) -> list:
+    """Vários GETs, empacotados em $batch de `lote` (padrão LOTE_BATCH).
+
+    Devolve uma lista na ordem de `urls`: o JSON de cada resposta ou a exceção
+    daquela requisição (HTTPError com `.response`, como o _get levantaria).
+    Quem chama decide o que fazer com as partes que falharam — uma não
+    contamina as outras.
+
+    Os pacotes saem em paralelo, nas vagas do governador — menos o primeiro,
+    que vai sozinho e serve de sonda. Recusa do $batch (_BATCH_RECUSADO)
+    desliga o empacotamento para o processo e o mesmo pedido segue em GETs
+    avulsos.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    lote = max(1, lote or LOTE_BATCH)
+    workers = _governador.maximo if _governador else 4
+    if not _batch_ok or len(urls) <= 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_um, urls))
+
+    def _pacote(us: list[str]) -> list | None:
+        try:
+            return _post_batch(us)
+        except requests.HTTPError as exc:
+            status = exc.response.status_code if exc.response is not None else None
+            if status in _BATCH_RECUSADO:
+                _recusou_batch(status)
+                return None
+            return [exc] * len(us)
+        except Exception as exc:
+            return [exc] * len(us)
+
+    pacotes = [urls[i:i + lote] for i in range(0, len(urls), lote)]
+    primeiro = _pacote(pacotes[0])
+    if primeiro is None:
+        return _get_many(urls, lote)        # agora com _batch_ok = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        respostas = [primeiro] + list(pool.map(_pacote, pacotes[1:]))
+    saida = []
+    for us, r in zip(pacotes, respostas):
+        # Pacote recusado depois da sonda ter passado: refeito em GETs avulsos.
+        saida.extend(r if r is not None else [_um(u) for u in us])
+    return saida
+
+
 # ── Conversão de datas e durações ────────────────────────────────────────────
 
 _DATE_RE = re.compile(r"/Date\((-?\d+)(?:[+-]\d+)?\)/")
@@ -226,6 +722,34 @@ def _parse_date(raw) -> str | None:
         return str(raw)[:10]
 
 
+# Num cronograma, as mesmas datas se repetem muito (o início da obra, a data de
+# status, as baselines copiadas): o texto cru vira a data uma vez só. Cada
+# entrada é (ISO do snapshot, date) — o date é o que alimenta dias corridos e %
+# previsto, sem voltar a passar o ISO pelo strptime.
+@functools.lru_cache(maxsize=1 << 16)
+def _data_memo(raw: str) -> tuple[str | None, date | None]:
+    iso = _parse_date(raw)
+    if iso is None:
+        return None, None
+    try:
+        return iso, datetime.strptime(iso, "%Y-%m-%d").date()
+    except ValueError:
+        return iso, None        # texto que _parse_date não entendeu, cortado em 10
+
+
+def _data(raw) -> tuple[str | None, date | None]:
+    """_parse_date com a data junto, memorizado pelo texto cru."""
+    if isinstance(raw, str):
+        return _data_memo(raw)
+    iso = _parse_date(raw)
+    if iso is None:
+        return None, None
+    try:
+        return iso, datetime.strptime(iso, "%Y-%m-%d").date()
+    except ValueError:
+        return iso, None
+
+
 def _parse_datetime(raw) -> str | None:
     """Igual a _parse_date, mas preserva a hora (ISO, sem timezone).
 
@@ -262,11 +786,8 @@ def _parse_lag(raw) -> float:
 
 def _extract_preds(t: dict) -> list[dict]:
     """Vínculos em que esta tarefa é a sucessora, ordenados para diff estável."""
-    brutos = (t.get("Predecessors") or {})
-    if not isinstance(brutos, dict):
-        return []
     saida = []
-    for L in brutos.get("results", []):
+    for L in _colecao(t.get("Predecessors")):
         pid = L.get("PredecessorTaskId")
         if not pid:
             continue
@@ -293,114 +814,125 @@ def _parse_duration_ms(raw_ms) -> int | None:
 
 
 def _calendar_days(start: str | None, end: str | None) -> int | None:
-    if not start or not end:
-        return None
-    try:
-        return max(0, (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days + 1)
-    except Exception:
+    return _dias_corridos(_data(start)[1] if start else None, _data(end)[1] if end else None)
+
+
+def _dias_corridos(inicio: date | None, fim: date | None) -> int | None:
+    if inicio is None or fim is None:
         return None
+    return max(0, (fim - inicio).days + 1)
 
 
 def _pct_previsto(start: str | None, end: str | None, ref_date: datetime | None = None) -> int:
     """Calcula % Previsto: tempo decorrido / tempo total * 100."""
     if not start or not end:
         return 0
-    try:
-        ref = ref_date or datetime.now()
-        d_start = datetime.strptime(start, "%Y-%m-%d")
-        d_end   = datetime.strptime(end,   "%Y-%m-%d")
-        if ref <= d_start:
-            return 0
-        if ref >= d_end:
-            return 100
-        total    = (d_end   - d_start).days or 1
-        elapsed  = (ref     - d_start).days
-        return max(0, min(100, round(elapsed / total * 100)))
-    except Exception:
-        return 0
-
-
-# ── Lookup table cache ───────────────────────────────────────────────────────
+    return _pct_previsto_datas(_data(start)[1], _data(end)[1], ref_date or datetime.now())
 
-def _load_lookup_disk() -> dict[str, str] | None:
-    """Lê o cache de lookup do disco, se existir e ainda estiver na validade."""
-    try:
-        with open(LOOKUP_CACHE_FILE, "r", encoding="utf-8") as f:
-            blob = json.load(f)
-        saved = datetime.fromisoformat(blob["saved_at"])
-        if datetime.now() - saved > LOOKUP_CACHE_TTL:
-            return None
-        return blob.get("entries") or None
-    except Exception:
-        return None
-
-
-def _save_lookup_disk(entries: dict[str, str]) -> None:
-    try:
-        os.makedirs(os.path.dirname(LOOKUP_CACHE_FILE), exist_ok=True)
-        tmp = LOOKUP_CACHE_FILE + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump({"saved_at": datetime.now().isoformat(timespec="seconds"),
-                       "entries": entries}, f, ensure_ascii=False)
-        os.replace(tmp, LOOKUP_CACHE_FILE)
-    except Exception as exc:
-        logger.warning("Não foi possível gravar o cache de lookup: %s", exc)
 
+def _pct_previsto_datas(inicio: date | None, fim: date | None, ref: datetime) -> int:
+    """_pct_previsto a partir das datas já convertidas (None = sem data)."""
+    if inicio is None or fim is None:
+        return 0
+    d_start = datetime(inicio.year, inicio.month, inicio.day)
+    d_end   = datetime(fim.year, fim.month, fim.day)
+    if ref <= d_start:
+        return 0
+    if ref >= d_end:
+        return 100
+    total    = (d_end   - d_start).days or 1
+    elapsed  = (ref     - d_start).days
+    return max(0, min(100, round(elapsed / total * 100)))
 
-def _fetch_lookup_entries() -> dict[str, str]:
-    """Baixa todas as tabelas de pesquisa do servidor."""
-    logger.info("Baixando tabelas de pesquisa do PWA...")
-    entries: dict[str, str] = {}
-    lts = _get_all(f"{PS_BASE}/LookupTables", {"$select": "Id,Name", "$expand": "Entries"})
-    for lt in lts:
-        for e in lt.get("Entries", {}).get("results", []):
-            entries[e["Id"].replace("-", "")] = e.get("FullValue", "")
-    logger.info("  %d entries baixadas.", len(entries))
-    return entries
 
+# ── Lookup table cache ───────────────────────────────────────────────────────
 
-def _build_lookup_cache() -> dict[str, str]:
-    """Cache global de entry_id (sem hifens) → FullValue.
+def _fetch_lookup_tables(ids: list[str] | None = None) -> list[tuple[str, str, dict[str, str]]]:
+    """Baixa as tabelas de pesquisa `ids` (todas, se None) com as entries.
 
-    Ordem: memória → disco (dentro da validade) → servidor.
+    Devolve (id, nome, {entry_id sem hifens: FullValue}) por tabela. Por Id vão
+    no máximo 20 por pedido — o mesmo limite de $expand dos projetos.
     """
-    global _lookup_cache
-    if _lookup_cache:
-        return _lookup_cache
-
-    do_disco = _load_lookup_disk()
-    if do_disco:
-        _lookup_cache = do_disco
-        logger.info("Cache de lookup lido do disco (%d entries).", len(_lookup_cache))
-        return _lookup_cache
+    params = {"$select": "Id,Name", "$expand": "Entries"}
+    lotes = [None] if ids is None else [ids[i:i + 20] for i in range(0, len(ids), 20)]
+    tabelas = []
+    for lote in lotes:
+        if lote:
+            params["$filter"] = " or ".join(f"Id eq guid'{t}'" for t in lote)
+        for lt in _get_all(f"{PS_BASE}/LookupTables", params):
+            entries = {e["Id"].replace("-", ""): e.get("FullValue", "")
+                       for e in _colecao(lt.get("Entries"))}
+            tabelas.append((lt["Id"], lt.get("Name", ""), entries))
+    return tabelas
+
+
+def _recarregar_lookup(ids: list[str] | None = None) -> None:
+    """Rebaixa as tabelas `ids` (ou todas) e grava no índice."""
+    logger.info("Baixando %s do PWA...", "tabelas de pesquisa" if ids is None
+                else f"{len(ids)} tabela(s) de pesquisa")
+    tabelas = _fetch_lookup_tables(ids)
+    mudaram = _lookup.gravar(tabelas, substituir_tudo=ids is None)
+    logger.info("  %d tabela(s), %d entries; %d mudaram.", len(tabelas),
+                sum(len(e) for _, _, e in tabelas), len(mudaram))
+
+
+def _build_lookup_cache() -> tabelas_pesquisa.Indice:
+    """O índice de entry_id (sem hifens) → FullValue, pronto para consulta.
+
+    Índice vazio: carga completa, num pedido só. Senão, só as tabelas que
+    algum custom field usa e que passaram de LOOKUP_CACHE_TTL — uma vez por
+    processo, e sem derrubar nada se o servidor falhar (vale o que há).
+    """
+    global _lookup, _lookup_conferido
+    if _lookup is None:
+        # Gravando cassete, as tabelas vêm do servidor: a cassete precisa
+        # tê-las para reproduzir num lugar sem o índice em disco.
+        gravando = _cassete is not None and _cassete.gravando
+        _lookup = tabelas_pesquisa.Indice(":memory:" if gravando else LOOKUP_CACHE_FILE)
+    if _lookup_conferido:
+        return _lookup
+    _lookup_conferido = True
+    if _lookup.vazio():
+        _recarregar_lookup()
+        return _lookup
+    vencidas = _lookup.vencidas(LOOKUP_CACHE_TTL)
+    if vencidas:
+        try:
+            _recarregar_lookup(vencidas)
+        except Exception as exc:
+            logger.warning("Falha ao atualizar tabelas de pesquisa: %s", exc)
+    return _lookup
 
-    _lookup_cache = _fetch_lookup_entries()
-    _save_lookup_disk(_lookup_cache)
-    return _lookup_cache
 
+def _resolve_lookup_entry(entry_internal: str, cf_id: str | None = None) -> str:
+    """Converte 'Entry_xxxxx' (32 chars) em FullValue legível.
 
-def _resolve_lookup_entry(entry_internal: str) -> str:
-    """Converte 'Entry_xxxxx' (32 chars) em FullValue legível."""
-    global _lookup_cache, _lookup_refetched
+    Com `cf_id`, o índice aprende a tabela do campo — e uma entry desconhecida
+    (entrada nova na tabela de pesquisa) rebaixa só essa tabela. Sem tabela
+    conhecida, rebaixa todas. Cada recarga, uma vez por processo.
+    """
     if not entry_internal.startswith("Entry_"):
         return entry_internal
 
-    eid   = entry_internal[6:]
-    cache = _build_lookup_cache()
-    if eid in cache:
-        return cache[eid]
-
-    # Entry desconhecida: o cache em disco pode estar velho (entrada nova na
-    # tabela de pesquisa). Recarrega do servidor uma única vez por processo.
-    if not _lookup_refetched:
-        _lookup_refetched = True
-        logger.info("Entry %s fora do cache — recarregando do servidor.", eid[:8])
-        try:
-            _lookup_cache = _fetch_lookup_entries()
-            _save_lookup_disk(_lookup_cache)
-        except Exception as exc:
-            logger.warning("Falha ao recarregar tabelas de pesquisa: %s", exc)
-    return _lookup_cache.get(eid, entry_internal)
+    eid    = entry_internal[6:]
+    indice = _build_lookup_cache()
+    achado = indice.valor(eid)
+    if achado is None:
+        tabela = indice.campos().get(cf_id) if cf_id else None
+        if tabela not in _lookup_refetched:
+            _lookup_refetched.add(tabela)
+            logger.info("Entry %s fora do índice — recarregando %s.", eid[:8],
+                        "a tabela do campo" if tabela else "as tabelas")
+            try:
+                _recarregar_lookup(None if tabela is None else [tabela])
+            except Exception as exc:
+                logger.warning("Falha ao recarregar tabelas de pesquisa: %s", exc)
+            achado = indice.valor(eid)
+        if achado is None:
+            return entry_internal
+    if cf_id:
+        indice.ligar(cf_id, achado[1])
+    return achado[0]
 
 
 # ── Extração de custom field value (lookup ou scalar) ────────────────────────
@@ -415,10 +947,9 @@ def _extract_cf_value(custom_fields_dict: dict, cf_id: str) -> str:
     raw = custom_fields_dict.get(_cf_key(cf_id))
     if raw is None:
         return ""
-    # Lookup multi-value: {"results": ["Entry_..."]}
-    if isinstance(raw, dict):
-        entries = raw.get("results", [])
-        return ", ".join(_resolve_lookup_entry(e) for e in entries)
+    # Lookup multi-value: {"results": ["Entry_..."]} (verboso) ou lista (light)
+    if isinstance(raw, (dict, list)):
+        return ", ".join(_resolve_lookup_entry(e, cf_id) for e in _colecao(raw))
     # Numero/scalar (string com número)
     if isinstance(raw, str) and "." in raw:
         try:
@@ -431,10 +962,10 @@ def _extract_cf_value(custom_fields_dict: dict, cf_id: str) -> str:
 
 # ── fetch_projects ────────────────────────────────────────────────────────────
 
-def _fetch_batch(batch_ids: list[str]) -> list[dict]:
-    """Busca um batch de projetos com tudo necessário (expand limitado a 20)."""
+def _projetos_url(batch_ids: list[str]) -> str:
+    """URL de um batch de projetos com tudo necessário (expand limitado a 20)."""
     filter_clauses = " or ".join(f"Id eq guid'{pid}'" for pid in batch_ids)
-    url = (
+    return (
         f"{PS_BASE}/Projects"
         f"?$filter={filter_clauses}"
         f"&$expand=ProjectSummaryTask,Draft/IncludeCustomFields"
@@ -444,24 +975,61 @@ def _fetch_batch(batch_ids: list[str]) -> list[dict]:
         f"ProjectSummaryTask/PercentComplete,"
         f"Draft/IncludeCustomFields"
     )
+
+
+def _fetch_batch(batch_ids: list[str]) -> list[dict]:
+    """Busca um batch de projetos sozinho, num GET próprio."""
     try:
-        r = _get(url)
-        return r.get("d", {}).get("results", [])
+        r = _get(_projetos_url(batch_ids))
+        return _resultados(r)
     except Exception as e:
         logger.error("Batch falhou: %s", e)
         return []
 
 
-def fetch_projects() -> list[dict]:
-    """
-    Retorna projetos com APENAS as 7 dimensões pedidas:
-    Nome, Cliente, Número Horizontes, Coordenador, Cidade, %Concluída, %Previsto.
+# ── Lista de projetos: duas estratégias ──────────────────────────────────────
+#
+# "projectserver": a de sempre — lista de Ids e ceil(N/15) GETs com
+# $expand=Draft/IncludeCustomFields (o expand é limitado a 20 projetos).
+# "projectdata": o feed de relatórios (/_api/ProjectData), onde os custom
+# fields são colunas planas e já vêm com o texto da tabela de pesquisa — uma
+# consulta paginada só. NESTE tenant o ProjectData responde 403 (seção 3); a
+# estratégia existe para quando a permissão for consertada, e quem escolhe
+# entre as duas é o fetcher, pelo tempo medido de cada uma.
+
+ESTRATEGIAS = ("projectserver", "projectdata")
+
+# Nomes do feed de relatórios. Site em pt-BR pode localizar o entity set e as
+# colunas (Projetos, NomeDoProjeto...); confirmar no $metadata quando o acesso
+# existir. Custom field vira coluna com o nome de exibição sem espaços.
+PDATA_PROJETOS = "Projects"
+PDATA_COLUNAS = {
+    "Id":                "ProjectId",
+    "Name":              "ProjectName",
+    "Start":             "ProjectStartDate",
+    "Finish":            "ProjectFinishDate",
+    "BaselineStart":     "ProjectBaselineStartDate",
+    "BaselineFinish":    "ProjectBaselineFinishDate",
+    "PercentComplete":   "ProjectPercentCompleted",
+    "LastPublishedDate": "ProjectLastPublishedDate",
+}
+PDATA_CF = {nome: nome for nome in CF_PROJECT}     # CF_PROJECT → coluna do feed
+
+_PDATA_RECUSADO = (400, 401, 403, 404, 501)
+
+
+def recusou_projectdata(exc: Exception) -> bool:
+    """O servidor recusou o feed de relatórios (permissão, nome, ou não existe)?"""
+    resp = getattr(exc, "response", None)
+    return getattr(resp, "status_code", None) in _PDATA_RECUSADO
 
-    Batches paralelos de 15 projetos (expand limitado a 20 pelo servidor).
-    """
-    from concurrent.futures import ThreadPoolExecutor
 
-    logger.info("Buscando projetos no PWA...")
+def _projetos_crus_projectserver() -> list[dict]:
+    """A lista de Ids e, depois, os projetos em batches de 15 (o expand é
+    limitado a 20 pelo servidor), empacotados em $batch por _get_many. Batch
+    que falha dentro do pacote é refeito uma vez sozinho — estrangulamento de
+    uma parte não perde os projetos dela.
+    """
     _build_lookup_cache()
 
     # 1) Lista IDs (sem expand — sem limite)
@@ -473,9 +1041,65 @@ def fetch_projects() -> list[dict]:
     BATCH = 15
     batches = [all_ids[i:i+BATCH] for i in range(0, len(all_ids), BATCH)]
     raw_projects: list[dict] = []
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        for page in pool.map(_fetch_batch, batches):
-            raw_projects.extend(page)
+    respostas = _get_many([_projetos_url(b) for b in batches])
+    for ids, r in zip(batches, respostas):
+        if isinstance(r, Exception):
+            logger.warning("Batch de %d projeto(s) falhou no $batch (%s) — "
+                           "refazendo sozinho.", len(ids), r)
+            raw_projects.extend(_fetch_batch(ids))
+        else:
+            raw_projects.extend(_resultados(r))
+    return raw_projects
+
+
+def _projetos_crus_projectdata() -> list[dict]:
+    """Uma consulta paginada ao ProjectData, no formato cru do ProjectServer.
+
+    Cada linha vira a entidade que _projetos_crus_projectserver devolveria
+    (ProjectSummaryTask, Draft/IncludeCustomFields com a chave Custom_x005f_),
+    para o resto de fetch_projects não saber de onde veio. O custom field já
+    chega como texto, então não passa pela tabela de pesquisa.
+    """
+    colunas = list(PDATA_COLUNAS.values()) + list(PDATA_CF.values())
+    # Tenant sem acesso a relatórios recusa o feed, e o fetcher volta ao
+    # ProjectServer com o próprio WARNING: a recusa não vai ao log como ERROR.
+    linhas = _get_all(f"{PDATA_BASE}/{PDATA_PROJETOS}", {"$select": ",".join(colunas)},
+                      recusas=_PDATA_RECUSADO)
+    c = PDATA_COLUNAS
+    crus = []
+    for L in linhas:
+        cfs = {}
+        for nome, coluna in PDATA_CF.items():
+            v = L.get(coluna)
+            if v is not None:
+                cfs[_cf_key(CF_PROJECT[nome])] = v if isinstance(v, str) else str(v)
+        crus.append({
+            "Id":                L.get(c["Id"]),
+            "Name":              L.get(c["Name"], ""),
+            "StartDate":         L.get(c["Start"]),
+            "FinishDate":        L.get(c["Finish"]),
+            "LastPublishedDate": L.get(c["LastPublishedDate"]),
+            "ProjectSummaryTask": {k: L.get(c[k]) for k in (
+                "Start", "Finish", "BaselineStart", "BaselineFinish", "PercentComplete")},
+            "Draft": {"IncludeCustomFields": cfs},
+        })
+    return crus
+
+
+def fetch_projects(estrategia: str = "projectserver") -> list[dict]:
+    """
+    Retorna projetos com APENAS as 7 dimensões pedidas:
+    Nome, Cliente, Número Horizontes, Coordenador, Cidade, %Concluída, %Previsto.
+
+    `estrategia` é uma de ESTRATEGIAS. A "projectdata" não cai sozinha na
+    outra: recusa do servidor sobe como HTTPError (ver recusou_projectdata) e
+    quem chamou decide.
+    """
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estratégia de lista desconhecida: {estrategia!r}")
+    logger.info("Buscando projetos no PWA (%s)...", estrategia)
+    raw_projects = (_projetos_crus_projectdata() if estrategia == "projectdata"
+                    else _projetos_crus_projectserver())
     logger.info("  %d projeto(s) carregados.", len(raw_projects))
 
     # 3) Monta lista com todos os campos necessários para o dashboard
@@ -579,6 +1203,49 @@ def fetch_projects() -> list[dict]:
     return projects
 
 
+# ── Coleta condicional ────────────────────────────────────────────────────────
+#
+# Republicar um projeto muda o LastPublishedDate, mas muita republicação não
+# mexe em tarefa nenhuma (só num custom field): o payload volta byte a byte
+# igual. O `validador` de cada projeto guarda o que a coleta anterior viu —
+# ETag e Last-Modified, se o servidor os manda, e o hash do corpo — e o
+# fetcher o guarda no fetch_state.json.
+#
+#   - Com ETag/Last-Modified, o pedido é condicional (If-None-Match /
+#     If-Modified-Since) e o servidor que os honra responde 304, sem corpo.
+#   - Sem eles, ou com servidor que os ignora, o corpo chega inteiro e o hash
+#     decide: igual ao anterior, é como se fosse 304.
+#
+# Nos dois casos fetch_tasks devolve None e o fetcher reaproveita o snapshot.
+
+NAO_MUDOU = 304
+
+
+def _assinatura(corpo: bytes) -> str:
+    return hashlib.sha1(corpo).hexdigest()[:16]
+
+
+def _condicional(validador: dict | None) -> dict:
+    """If-None-Match / If-Modified-Since com o que a coleta anterior recebeu."""
+    cabecalhos = {}
+    if validador:
+        if validador.get("etag"):
+            cabecalhos["If-None-Match"] = validador["etag"]
+        if validador.get("modificado"):
+            cabecalhos["If-Modified-Since"] = validador["modificado"]
+    return cabecalhos
+
+
+def _conferir(validador: dict | None, cabecalhos, assinatura: str) -> bool:
+    """Anota os validadores desta resposta. True se o corpo é o de antes."""
+    if validador is None:
+        return False
+    igual = validador.get("hash") == assinatura
+    validador.update(etag=cabecalhos.get("ETag"),
+                     modificado=cabecalhos.get("Last-Modified"), hash=assinatura)
+    return igual
+
+
 # ── fetch_tasks ───────────────────────────────────────────────────────────────
 
 # Campos realmente consumidos abaixo. Sem $select o servidor devolve a entidade
@@ -618,149 +1285,507 @@ def _tasks_url(project_id: str, com_select: bool) -> str:
     return url
 
 
-def _get_tasks_payload(project_id: str) -> dict:
-    """Busca o payload de tarefas, degradando para a consulta sem $select."""
+def _recusou_select(status: int | None) -> bool:
+    """Trata a recusa do $select aninhado. Devolve False se o erro é outro.
+
+    Compartilhado pelos clientes síncrono e assíncrono: quem vê a recusa
+    primeiro desliga o $select para o processo inteiro.
+    """
     global _select_tarefas_ok
+    if status not in (400, 404, 500):
+        return False
+    if _select_tarefas_ok:
+        _select_tarefas_ok = False
+        logger.warning(
+            "Servidor recusou o $select nas tarefas (HTTP %s) — "
+            "seguindo sem ele pelo resto do processo.", status,
+        )
+    return True
+
+
+def _get_tasks_payload(project_id: str, validador: dict | None = None) -> dict | None:
+    """Busca o payload de tarefas, degradando para a consulta sem $select."""
     if _select_tarefas_ok:
         try:
-            return _get(_tasks_url(project_id, com_select=True))
+            return _get(_tasks_url(project_id, com_select=True), validador=validador)
         except requests.HTTPError as exc:
             status = exc.response.status_code if exc.response is not None else None
-            if status not in (400, 404, 500):
+            if not _recusou_select(status):
                 raise
-            _select_tarefas_ok = False
-            logger.warning(
-                "Servidor recusou o $select nas tarefas (HTTP %s) — "
-                "seguindo sem ele pelo resto do processo.", status,
-            )
-    return _get(_tasks_url(project_id, com_select=False))
+    return _get(_tasks_url(project_id, com_select=False), validador=validador)
 
 
-def fetch_tasks(project_id: str) -> list[dict]:
+def fetch_tasks(project_id: str, validador: dict | None = None) -> list[dict] | None:
     """
     Retorna tarefas do projeto com APENAS as 9 dimensões pedidas:
     Nome, Nomes dos Recursos, Duração, Dias Corridos, Início, Início BL,
     Término, Término BL, Nível Outline.
+
+    Com `validador` (o da coleta anterior, ver Coleta condicional) o pedido é
+    condicional e o dict é atualizado com o desta resposta; None = payload
+    igual ao da coleta anterior.
     """
     logger.info("Buscando tarefas do projeto %s...", project_id)
+    if LER_EM_FLUXO:
+        tasks = _tarefas_em_fluxo(project_id, validador)
+    else:
+        r = _get_tasks_payload(project_id, validador)
+        tasks = None if r is None else _tarefas_do_payload(r)
+    _log_tarefas(tasks)
+    return tasks
+
+
+def _log_tarefas(tasks: list[dict] | None) -> None:
+    if tasks is None:
+        logger.info("  sem mudança desde a coleta anterior.")
+    else:
+        logger.info("  %d tarefa(s).", len(tasks))
+
 
-    r = _get_tasks_payload(project_id)
-    items = r.get("d", {}).get("results", [])
+def _tarefas_do_payload(r: dict) -> list[dict]:
+    """Converte a resposta crua do $expand=Tasks na lista do snapshot."""
+    items = _resultados(r)
     if not items:
         return []
+    raw_tasks = _colecao(items[0].get("Tasks"))
+    pst = items[0].get("ProjectSummaryTask") or {}
+    return ([_tarefa_projeto(pst)] if pst else []) + _normalizar(raw_tasks)
 
-    raw_tasks = items[0].get("Tasks", {}).get("results", [])
 
-    tasks = []
+def _normalizar(cruas, agora: datetime | None = None) -> list[dict]:
+    """Tarefas cruas → tarefas do snapshot, com um só "agora" para o % previsto."""
+    agora = agora or datetime.now()
+    return [_tarefa(t, agora) for t in cruas]
 
-    # A tarefa-resumo do projeto (Nível de Estrutura de Tópicos = 0) NÃO vem
-    # dentro da coleção "Tasks" (esta começa em OutlineLevel = 1). Ela é uma
-    # sub-entidade própria, "ProjectSummaryTask", e precisa ser injetada
-    # manualmente como a primeira linha (level 0) do Gantt.
-    pst = items[0].get("ProjectSummaryTask") or {}
-    if pst:
-        p_start    = _parse_date(pst.get("Start"))
-        p_end      = _parse_date(pst.get("Finish"))
-        p_bl_start = _parse_date(pst.get("BaselineStart"))
-        p_bl_end   = _parse_date(pst.get("BaselineFinish"))
-        p_pct      = pst.get("PercentComplete") or 0
-        p_days     = _calendar_days(p_start, p_end) or 0
-        tasks.append({
-            "id":           str(pst.get("Id", "")),
-            "name":         pst.get("Name", ""),
-            "resources":    "",
-            "start":        p_start,
-            "end":          p_end,
-            "blStart":      p_bl_start,
-            "blEnd":        p_bl_end,
-            "level":        0,
-            "type":         "project",
-            "status":       "ok",
-            "pct":          p_pct,
-            "days":         p_days,
-            "critical":     bool(pst.get("IsCritical", False)),
-            # A tarefa-resumo do projeto não participa da rede de dependências
-            # e nunca é marco.
-            "preds":        [],
-            "marco":        False,
-            "duracao":      p_days,
-            "diasCorridos": p_days,
-            "inicio":       p_start,
-            "blInicio":     p_bl_start,
-            "termino":      p_end,
-            "blTermino":    p_bl_end,
-            "outlineLevel": 0,
-        })
 
-    for t in raw_tasks:
-        # Nomes dos recursos
-        assigns = (t.get("Assignments") or {}).get("results", []) if isinstance(t.get("Assignments"), dict) else []
-        recursos = ", ".join(
-            (a.get("Resource") or {}).get("Name", "")
-            for a in assigns if (a.get("Resource") or {}).get("Name")
-        )
+def _tarefa_projeto(pst: dict) -> dict:
+    """A linha de nível 0 do snapshot, montada a partir da ProjectSummaryTask.
 
-        start     = _parse_date(t.get("Start"))
-        end       = _parse_date(t.get("Finish"))
-        bl_start  = _parse_date(t.get("BaselineStart"))
-        bl_end    = _parse_date(t.get("BaselineFinish"))
-        _ol       = t.get("OutlineLevel")
-        level     = _ol if _ol is not None else 1
-        pct_conc  = t.get("PercentComplete") or 0
-
-        # Tipo de linha no Gantt
-        if level == 0:
-            task_type = "project"
-        elif level == 1:
-            task_type = "summary"
-        else:
-            task_type = "task"
-
-        # Status da tarefa com base na defasagem de % previsto vs % concluído
-        task_pct_prev = _pct_previsto(bl_start or start, bl_end or end)
-        gap = max(0, task_pct_prev - pct_conc)
-        if gap < 5:
-            task_status = "ok"
-        elif gap < 20:
-            task_status = "warning"
-        else:
-            task_status = "late"
+    A tarefa-resumo do projeto (Nível de Estrutura de Tópicos = 0) NÃO vem
+    dentro da coleção "Tasks" (esta começa em OutlineLevel = 1). Ela é uma
+    sub-entidade própria, "ProjectSummaryTask", e precisa ser injetada
+    manualmente como a primeira linha (level 0) do Gantt.
+    """
+    p_start, d_start = _data(pst.get("Start"))
+    p_end, d_end     = _data(pst.get("Finish"))
+    p_bl_start, _    = _data(pst.get("BaselineStart"))
+    p_bl_end, _      = _data(pst.get("BaselineFinish"))
+    p_pct      = pst.get("PercentComplete") or 0
+    p_days     = _dias_corridos(d_start, d_end) or 0
+    return {
+        "id":           str(pst.get("Id", "")),
+        "name":         pst.get("Name", ""),
+        "resources":    "",
+        "start":        p_start,
+        "end":          p_end,
+        "blStart":      p_bl_start,
+        "blEnd":        p_bl_end,
+        "level":        0,
+        "type":         "project",
+        "status":       "ok",
+        "pct":          p_pct,
+        "days":         p_days,
+        "critical":     bool(pst.get("IsCritical", False)),
+        # A tarefa-resumo do projeto não participa da rede de dependências
+        # e nunca é marco.
+        "preds":        [],
+        "marco":        False,
+        "duracao":      p_days,
+        "diasCorridos": p_days,
+        "inicio":       p_start,
+        "blInicio":     p_bl_start,
+        "termino":      p_end,
+        "blTermino":    p_bl_end,
+        "outlineLevel": 0,
+    }
+
+
+def _tarefa(t: dict, agora: datetime | None = None) -> dict:
+    """Uma tarefa crua do $expand=Tasks no formato do snapshot.
+
+    As datas saem de _data (memorizado): o ISO vai para o snapshot e o date
+    para os derivados (dias corridos, % previsto) — nada é reconvertido.
+    """
+    # Nomes dos recursos
+    assigns = _colecao(t.get("Assignments"))
+    recursos = ", ".join(
+        (a.get("Resource") or {}).get("Name", "")
+        for a in assigns if (a.get("Resource") or {}).get("Name")
+    )
 
-        days = _calendar_days(start, end) or 0
+    start, d_start   = _data(t.get("Start"))
+    end, d_end       = _data(t.get("Finish"))
+    bl_start, d_bl_s = _data(t.get("BaselineStart"))
+    bl_end, d_bl_e   = _data(t.get("BaselineFinish"))
+    _ol       = t.get("OutlineLevel")
+    level     = _ol if _ol is not None else 1
+    pct_conc  = t.get("PercentComplete") or 0
+
+    # Tipo de linha no Gantt
+    if level == 0:
+        task_type = "project"
+    elif level == 1:
+        task_type = "summary"
+    else:
+        task_type = "task"
+
+    # Status da tarefa com base na defasagem de % previsto vs % concluído
+    # Baseline quando houver, senão as datas correntes — decidido pelo texto,
+    # como sempre: baseline ilegível não cai para a data corrente.
+    task_pct_prev = _pct_previsto_datas(d_bl_s if bl_start else d_start,
+                                        d_bl_e if bl_end else d_end,
+                                        agora or datetime.now())
+    gap = max(0, task_pct_prev - pct_conc)
+    if gap < 5:
+        task_status = "ok"
+    elif gap < 20:
+        task_status = "warning"
+    else:
+        task_status = "late"
+
+    days = _dias_corridos(d_start, d_end) or 0
+
+    return {
+        "id":           str(t.get("Id", "")),
+        "name":         t.get("Name", ""),
+        "resources":    recursos,
+        # Nomes de campo que o Gantt do index.html espera
+        "start":        start,
+        "end":          end,
+        "blStart":      bl_start,
+        "blEnd":        bl_end,
+        "level":        level,
+        "type":         task_type,
+        "status":       task_status,
+        "pct":          pct_conc,
+        "days":         days,
+        "critical":     bool(t.get("IsCritical", False)),
+        # Marco = duração zero. Vem dos milissegundos crus porque `duracao`
+        # é arredondada em dias e engoliria uma tarefa de poucas horas.
+        "marco":        int(t.get("DurationMilliseconds") or 0) == 0,
+        # O flag do Project, que é outra coisa: marca a INTENÇÃO de ser
+        # marco. Divergir de `marco` (duração zero) é o defeito que a
+        # Análise de Saúde aponta — marco que não tem duração zero.
+        "isMilestone":  bool(t.get("IsMilestone", False)),
+        # Rede de dependências, usada pelo comparador
+        "preds":        _extract_preds(t),
+        # Aliases pt-BR para compatibilidade
+        "duracao":      _parse_duration_ms(t.get("DurationMilliseconds") or 0) or 0,
+        "diasCorridos": days,
+        "inicio":       start,
+        "blInicio":     bl_start,
+        "termino":      end,
+        "blTermino":    bl_end,
+        "outlineLevel": level,
+    }
+
+
+# ── Tarefas em fluxo ──────────────────────────────────────────────────────────
+#
+# O payload de tarefas é lido item a item (fluxo.py) em vez de `resp.json()`:
+# cada tarefa crua vira a do snapshot assim que termina de chegar e é
+# descartada. O pico de memória deixa de ser o payload verboso inteiro, e a
+# normalização anda junto com o download em vez de esperar o último byte.
+
+LER_EM_FLUXO = True                     # False volta ao resp.json() inteiro
+PEDACO_FLUXO = 1 << 16                  # bytes por leitura do socket
+_CAMINHO_TAREFAS = {"verbose":         ("d", "results", 0, "Tasks", "results"),
+                    "minimalmetadata": ("value", 0, "Tasks")}
+
+
+class _Montador:
+    """Recebe o payload em pedaços e devolve a lista pronta do snapshot."""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        """Volta ao zero — para quando o pedido é refeito em outro formato."""
+        self._leitor  = fluxo.LeitorEmFluxo(_CAMINHO_TAREFAS[_odata()])
+        self._tarefas: list[dict] = []
+        self._agora   = datetime.now()
+        self._hash    = hashlib.sha1()
+        self.bytes    = 0
+
+    @property
+    def assinatura(self) -> str:
+        """_assinatura do corpo recebido até aqui."""
+        return self._hash.hexdigest()[:16]
+
+    def alimentar(self, pedaco: bytes) -> None:
+        self.bytes += len(pedaco)
+        self._hash.update(pedaco)
+        self._tarefas.extend(_normalizar(self._leitor.alimentar(pedaco), self._agora))
+
+    def concluir(self) -> list[dict]:
+        self._tarefas.extend(_normalizar(self._leitor.fechar(), self._agora))
+        items = _resultados(self._leitor.resto or {})
+        if not items:
+            return []
+        if not self._tarefas:
+            # Servidor que ignorou o formato pedido: as tarefas não estavam no
+            # caminho esperado e vieram montadas no `resto`, inteiras.
+            self._tarefas = _normalizar(_colecao(items[0].get("Tasks")), self._agora)
+        # A tarefa-resumo pode chegar antes ou depois da coleção de tarefas —
+        # a ordem das propriedades é do servidor. Entra na frente de qualquer jeito.
+        pst = items[0].get("ProjectSummaryTask") or {}
+        return ([_tarefa_projeto(pst)] if pst else []) + self._tarefas
+
+
+def _get_em_fluxo(url: str, timeout: int = 90,
+                  validador: dict | None = None) -> list[dict] | None:
+    """_get para o payload de tarefas, normalizando enquanto os bytes chegam.
+
+    Com `validador`, None se o payload é o da coleta anterior. No hash a
+    normalização já foi feita (ela anda junto com o download); o que se
+    poupa é a comparação com o snapshot e a gravação.
+    """
+    pedido = time.monotonic()
+    condicional = _condicional(validador)
+    with _vaga():
+        inicio = time.monotonic()
+        montador = _Montador()
+        try:
+            resp = get_session().get(url, timeout=timeout, stream=True, headers=condicional)
+            if resp.status_code == 401:
+                logger.warning("Token expirado, reconstruindo sessão...")
+                resp.close()
+                reset_session()
+                resp = get_session().get(url, timeout=timeout, stream=True,
+                                         headers=condicional)
+            if _recusou_formato(resp.status_code):
+                resp.close()
+                montador.reiniciar()            # o alvo do fluxo muda com o formato
+                resp = get_session().get(url, timeout=timeout, stream=True,
+                                         headers=condicional)
+            _anotar(resp.headers.get("Content-Encoding"))
+            if resp.status_code == NAO_MUDOU:
+                resp.close()
+            elif resp.ok:
+                for pedaco in resp.iter_content(PEDACO_FLUXO):
+                    montador.alimentar(pedaco)
+        except requests.RequestException:
+            _registrar(inicio, None)
+            raise
+        _registrar(inicio, resp, montador.bytes if resp.ok else None)
+    _medir(inicio - pedido, montador.bytes)
+    if resp.status_code == NAO_MUDOU:
+        return None
+    if not resp.ok:
+        nivel = (logging.WARNING if resp.status_code in governador.ESTRANGULADO
+                 else logging.ERROR)
+        logger.log(nivel, "HTTP %s — %s", resp.status_code, resp.text[:400])
+        resp.raise_for_status()
+    tarefas = montador.concluir()
+    if _conferir(validador, resp.headers, montador.assinatura):
+        return None
+    return tarefas
 
-        tasks.append({
-            "id":           str(t.get("Id", "")),
-            "name":         t.get("Name", ""),
-            "resources":    recursos,
-            # Nomes de campo que o Gantt do index.html espera
-            "start":        start,
-            "end":          end,
-            "blStart":      bl_start,
-            "blEnd":        bl_end,
-            "level":        level,
-            "type":         task_type,
-            "status":       task_status,
-            "pct":          pct_conc,
-            "days":         days,
-            "critical":     bool(t.get("IsCritical", False)),
-            # Marco = duração zero. Vem dos milissegundos crus porque `duracao`
-            # é arredondada em dias e engoliria uma tarefa de poucas horas.
-            "marco":        int(t.get("DurationMilliseconds") or 0) == 0,
-            # O flag do Project, que é outra coisa: marca a INTENÇÃO de ser
-            # marco. Divergir de `marco` (duração zero) é o defeito que a
-            # Análise de Saúde aponta — marco que não tem duração zero.
-            "isMilestone":  bool(t.get("IsMilestone", False)),
-            # Rede de dependências, usada pelo comparador
-            "preds":        _extract_preds(t),
-            # Aliases pt-BR para compatibilidade
-            "duracao":      _parse_duration_ms(t.get("DurationMilliseconds") or 0) or 0,
-            "diasCorridos": days,
-            "inicio":       start,
-            "blInicio":     bl_start,
-            "termino":      end,
-            "blTermino":    bl_end,
-            "outlineLevel": level,
-        })
 
-    logger.info("  %d tarefa(s).", len(tasks))
-    return tasks
+def _tarefas_em_fluxo(project_id: str, validador: dict | None = None) -> list[dict] | None:
+    """Como _get_tasks_payload + _tarefas_do_payload, mas em fluxo."""
+    if _select_tarefas_ok:
+        try:
+            return _get_em_fluxo(_tasks_url(project_id, com_select=True),
+                                 validador=validador)
+        except requests.HTTPError as exc:
+            status = exc.response.status_code if exc.response is not None else None
+            if not _recusou_select(status):
+                raise
+    return _get_em_fluxo(_tasks_url(project_id, com_select=False), validador=validador)
+
+
+# ── Cliente assíncrono (coleta de tarefas do fetcher) ─────────────────────────
+#
+# A coleta das tarefas é quase toda espera de rede: um cronograma grande leva
+# dezenas de segundos no servidor e, com 4 threads, prendia um quarto da
+# capacidade enquanto os menores esperavam na fila. Aqui cada requisição é uma
+# corrotina — 16 ou 32 em voo custam o mesmo que uma. Quantas ficam em voo é o
+# governador que decide, pelo que o servidor responde.
+
+def _rastreio_async():
+    """TraceConfig que conta conexões abertas e reaproveitadas pelo aiohttp."""
+    import aiohttp
+
+    async def _requisicao(sessao, ctx, params):
+        with _lock_transporte:
+            _conexoes_async["requisicoes"] += 1
+
+    async def _conexao(sessao, ctx, params):
+        with _lock_transporte:
+            _conexoes_async["conexoes"] += 1
+
+    rastreio = aiohttp.TraceConfig()
+    rastreio.on_request_start.append(_requisicao)
+    rastreio.on_connection_create_end.append(_conexao)
+    return rastreio
+
+
+_INALTERADO = object()      # ClienteAssincrono._get: payload igual ao anterior
+
+
+class ClienteAssincrono:
+    """Sessão aiohttp com o token e os cabeçalhos da sessão síncrona.
+
+    Uso: `async with ClienteAssincrono(g, 90) as c: await c.fetch_tasks(pid)`.
+    `timeout` vale para cada requisição, do envio ao último byte. Sem
+    governador, usa o do processo ou, na falta dele, um novo com teto 16.
+    """
+
+    def __init__(self, gov: governador.Governador | None = None, timeout: float = 90):
+        self.gov     = gov or _governador or governador.Governador(maximo=16)
+        self.timeout = timeout
+        self._http   = None
+
+    async def __aenter__(self) -> "ClienteAssincrono":
+        import aiohttp
+
+        token = get_token_silent()
+        if not token:
+            raise RuntimeError("Não autenticado.")
+        self._http = aiohttp.ClientSession(
+            headers=_headers(token, assincrono=True),
+            connector=aiohttp.TCPConnector(limit=self.gov.maximo),
+            trace_configs=[_rastreio_async()],
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def _get(self, url: str, montador: "_Montador | None" = None,
+                   validador: dict | None = None):
+        """GET com vaga do governador. Com `montador`, lê o corpo em fluxo.
+
+        Devolve o JSON (sem montador), None (com montador) ou _INALTERADO se,
+        com `validador`, o payload é o da coleta anterior.
+        """
+        import asyncio
+        import aiohttp
+
+        if _cassete is not None and not _cassete.gravando:
+            return self._tocar(url, montador, validador)
+        condicional = _condicional(validador)
+        pedido = time.monotonic()
+        async with self.gov.vaga_async():
+            espera = time.monotonic() - pedido
+            renovou = False
+            while True:
+                inicio = time.monotonic()
+                gravado = bytearray() if _cassete is not None else None
+                try:
+                    async with self._http.get(
+                        url, timeout=aiohttp.ClientTimeout(total=self.timeout),
+                        headers=condicional,
+                    ) as resp:
+                        if resp.status == 401 and not renovou:
+                            logger.warning("Token expirado, renovando cabeçalhos...")
+                            renovou = True
+                            token = get_token_silent()
+                            if not token:
+                                raise RuntimeError("Não autenticado.")
+                            self._http.headers.update(_headers(token, assincrono=True))
+                            continue
+                        if _recusou_formato(resp.status):
+                            self._http.headers["Accept"] = _headers("")["Accept"]
+                            if montador is not None:
+                                montador.reiniciar()
+                            continue
+                        _anotar(resp.headers.get("Content-Encoding"))
+                        if resp.status == NAO_MUDOU:
+                            self.gov.registrar(time.monotonic() - inicio, resp.status, 0)
+                            _medir(espera, 0)
+                            return _INALTERADO
+                        if montador is not None and resp.status < 400:
+                            async for pedaco in resp.content.iter_chunked(PEDACO_FLUXO):
+                                montador.alimentar(pedaco)
+                                if gravado is not None:
+                                    gravado += pedaco
+                            self.gov.registrar(time.monotonic() - inicio, resp.status,
+                                               montador.bytes)
+                            _medir(espera, montador.bytes)
+                            if gravado is not None:
+                                _cassete.gravar(self._chave(url), resp.status,
+                                                resp.headers, bytes(gravado))
+                            if _conferir(validador, resp.headers, montador.assinatura):
+                                return _INALTERADO
+                            return None
+                        corpo = await resp.read()
+                        _medir(espera, len(corpo))
+                        if gravado is not None:
+                            _cassete.gravar(self._chave(url), resp.status,
+                                            resp.headers, corpo)
+                        self.gov.registrar(
+                            time.monotonic() - inicio, resp.status, len(corpo),
+                            governador.retry_after(resp.headers.get("Retry-After")),
+                        )
+                        if resp.status >= 400:
+                            nivel = (logging.WARNING
+                                     if resp.status in governador.ESTRANGULADO
+                                     else logging.ERROR)
+                            logger.log(nivel, "HTTP %s — %s", resp.status,
+                                       corpo[:400].decode("utf-8", "replace"))
+                            resp.raise_for_status()
+                        if _conferir(validador, resp.headers, _assinatura(corpo)):
+                            return _INALTERADO
+                        return json.loads(corpo)
+                except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                        asyncio.TimeoutError):
+                    self.gov.registrar(time.monotonic() - inicio, None)
+                    raise
+
+    def _chave(self, url: str) -> str:
+        return cassete.chave("GET", url, self._http.headers.get("Accept"))
+
+    def _tocar(self, url: str, montador: "_Montador | None",
+               validador: dict | None = None):
+        """_get reproduzido da cassete: mesma saída, mesmos erros, sem rede."""
+        import aiohttp
+
+        status, cabecalhos, corpo = _cassete.tocar(self._chave(url))
+        _medir(0.0, len(corpo))
+        if status >= 400:
+            raise aiohttp.ClientResponseError(
+                None, (), status=status, message="Gravado", headers=cabecalhos)
+        if _conferir(validador, cabecalhos, _assinatura(corpo)):
+            return _INALTERADO
+        if montador is None:
+            return json.loads(corpo)
+        for i in range(0, len(corpo), PEDACO_FLUXO):
+            montador.alimentar(corpo[i:i + PEDACO_FLUXO])
+        return None
+
+    async def _get_tarefas(self, project_id: str, com_select: bool,
+                           validador: dict | None) -> list[dict] | None:
+        url = _tasks_url(project_id, com_select)
+        if not LER_EM_FLUXO:
+            r = await self._get(url, validador=validador)
+            return None if r is _INALTERADO else _tarefas_do_payload(r)
+        montador = _Montador()
+        if await self._get(url, montador, validador) is _INALTERADO:
+            return None
+        return montador.concluir()
+
+    async def fetch_tasks(self, project_id: str,
+                          validador: dict | None = None) -> list[dict] | None:
+        """Versão assíncrona de fetch_tasks — mesma saída, mesmo formato.
+
+        Degrada o $select como _get_tasks_payload; None com `validador` é o
+        mesmo payload da coleta anterior.
+        """
+        import aiohttp
+
+        logger.info("Buscando tarefas do projeto %s...", project_id)
+        if _select_tarefas_ok:
+            try:
+                tasks = await self._get_tarefas(project_id, True, validador)
+                _log_tarefas(tasks)
+                return tasks
+            except aiohttp.ClientResponseError as exc:
+                if not _recusou_select(exc.status):
+                    raise
+        tasks = await self._get_tarefas(project_id, False, validador)
+        _log_tarefas(tasks)
+        return tasks
@@ -10,13 +10,16 @@ trabalho (as que não são resumo). Sem isso o Sede 2 (2.286 tarefas) seria semp
 pior que o Jardim Coreano (19), o que diria mais sobre o tamanho do projeto do
 que sobre a qualidade dele.
 
-Lê apenas os snapshots em data/tasks_<pid>.json. Não escreve nada.
+Lê apenas os snapshots em data/tasks_<pid>.json. Não escreve nada — quem
+guarda o resultado pronto é saude_calculada.py, chamado pelo fetcher.
 
 Depende de `rede` (pasta comparador/): quem importar este módulo precisa ter
 comparador/ no sys.path — app.py já insere as duas pastas.
 """
 from __future__ import annotations
 
+import numpy as np
+
 import rede
 
 # ── Definição dos KPIs ────────────────────────────────────────────────────────
@@ -72,7 +75,17 @@ KPIS = [
         "acao": "Zerar a duração do marco.",
     },
     {
-        "id": "fora_nivel4", "peso": 15, "limite": 0.30,
+        "id": "folga_negativa", "peso": 5, "limite": 0.05,
+        "nome": "Tarefas com folga negativa",
+        "desc": "Tarefa não concluída que, pelos vínculos, não cabe antes do término publicado do projeto.",
+        "porque": "A data dela está presa por algo que não é a rede — restrição, data digitada, "
+                  "vínculo incoerente. O término publicado é um que a própria lógica do "
+                  "cronograma não sustenta, e o atraso que passa por ela não chega ao prazo.",
+        "acao": "Revisar as restrições de data e os vínculos da cadeia até o término; se não "
+                "cabe, replanejar em vez de fixar a data.",
+    },
+    {
+        "id": "fora_nivel4", "peso": 10, "limite": 0.30,
         "nome": "Trabalho fora do nível 4",
         "desc": "Tarefa de trabalho em nível diferente de 4, fora marcos.",
         "porque": "Quebra a padronização da EAP: o trabalho deveria estar todo no mesmo "
@@ -81,6 +94,11 @@ KPIS = [
     },
 ]
 
+# Versão da lógica de medição. saude_calculada guarda a análise pronta e só a
+# refaz quando muda a publicação ou alguma definição desta seção; mudança no
+# CÓDIGO de _medir/analisar não é vista por ela — suba este número junto.
+VERSAO = 3
+
 NIVEL_TRABALHO = 4          # nível em que o trabalho deve estar
 TOLERANCIA_PONTA = 1        # pontas soltas perdoadas por projeto, em cada lado
 FAIXAS = [                  # (nota mínima, rótulo, cor)
@@ -109,58 +127,88 @@ def _nota(qtd: int, base: int, limite: float) -> float:
 
 # ── Coleta dos defeitos ───────────────────────────────────────────────────────
 
-def _tolerar(ids: set[str], por_id: dict, campo: str, isentas: int = 0) -> set[str]:
+def _tolerar(linhas: np.ndarray, datas: np.ndarray, decrescente: bool = False,
+             isentas: int = 0) -> np.ndarray:
     """Tira da conta as pontas soltas perdoadas do projeto.
 
     Perdoa as mais defensáveis: sem predecessora, as que começam antes de todas
     (começo de uma frente); sem sucessora, as que terminam depois de todas (fim
     de uma frente). `isentas` são as isenções estruturais, somadas à tolerância.
+
+    `linhas` são posições no cronograma, em ordem crescente, e `datas` a ordem
+    de cada data (ver _ordem_das_datas). O empate fica com quem vem antes no
+    cronograma: a ordenação é estável.
+    """
+    chave = -datas[linhas] if decrescente else datas[linhas]
+    ordem = linhas[np.argsort(chave, kind="stable")]
+    return np.sort(ordem[TOLERANCIA_PONTA + isentas:])
+
+
+def _ordem_das_datas(datas: list[str]) -> np.ndarray:
+    """A posição de cada data entre as distintas — a ordem da comparação de texto.
+
+    Não converte nada: a data ISO já ordena como texto, e sem data ("") fica
+    antes de todas, exatamente como o sorted das strings fazia. Um cronograma
+    tem poucas centenas de datas distintas, então o sort é das distintas.
     """
-    ordem = sorted(ids, key=lambda x: (por_id[x].get(campo) or ""),
-                   reverse=(campo == "end"))
-    return set(ordem[TOLERANCIA_PONTA + isentas:])
+    posicao = {d: i for i, d in enumerate(sorted(set(datas)))}
+    return np.array([posicao[d] for d in datas], dtype=np.int64)
 
 
-def _medir(tarefas: list[dict]) -> dict:
+def _medir(tarefas: list[dict], g: rede.Grafo | None = None) -> dict:
     """Conta as tarefas com cada defeito e guarda quais são.
 
     A base do cálculo são as tarefas de trabalho — as que não têm filhas. Resumo
     não entra: ele espelha as filhas e seria contado duas vezes.
 
-    Junto da contagem sai o motivo de cada tarefa apontada. É o que a tela usa
-    para dizer onde está o defeito: contar 49 dependências em resumo não ajuda
-    ninguém a achar as 49 no meio de 221 linhas do Project.
+    O cronograma vira colunas (nível, % concluído, flags, ordem das datas, se
+    tem predecessora e sucessora), e cada KPI é uma máscara sobre elas. O
+    motivo de cada tarefa apontada não sai daqui: é texto, e só quem lista as
+    tarefas o pede (_motivo, chamado por _itens). O painel geral, que só
+    conta, não monta frase nenhuma.
+
+    Folhas, índice, sucessoras e caminhos vêm do rede.Grafo — o mesmo que a
+    causa do prazo usa, e que o app monta uma vez por snapshot.
     """
-    folhas = rede.folhas(tarefas)
-    por_id = {str(t["id"]): t for t in tarefas if t.get("id")}
-    # A tarefa-resumo do projeto ocupa a linha 0 do Project, não a 1. Quando ela
-    # abre a lista (é o normal: o coletor a injeta como primeira), a posição no
-    # cronograma é o próprio índice; sem ela a numeração começa em 1.
-    base = 0 if tarefas and tarefas[0].get("level") == 0 else 1
-    linha = {str(t["id"]): i + base for i, t in enumerate(tarefas) if t.get("id")}
-    fim_projeto = max((t.get("end") or "") for t in tarefas) if tarefas else ""
-
-    dep_resumo = set()
-    motivos_resumo: dict[str, list[str]] = {}
-    com_pred, com_suc = set(), set()
-
-    for t in tarefas:
-        tid = str(t.get("id"))
-        preds = t.get("preds") or []
-        if preds:
-            com_pred.add(tid)
-            if tid not in folhas:
-                dep_resumo.add(tid)          # resumo que é sucessora
-                motivos_resumo.setdefault(tid, []).append(
-                    "é um resumo e mesmo assim tem predecessora")
-        for pr in preds:
-            pid_pred = str(pr.get("id"))
-            com_suc.add(pid_pred)
-            if pid_pred in por_id and pid_pred not in folhas:
-                dep_resumo.add(tid)          # predecessora é resumo
-                motivos_resumo.setdefault(tid, []).append(
-                    'predecessora é o resumo "%s" (linha %d)'
-                    % (por_id[pid_pred].get("name") or "", linha[pid_pred]))
+    g = g or rede.indexar(tarefas)
+    ordem, pos = g.ordem, g.pos
+    n = len(ordem)
+
+    nivel   = np.array([t.get("level") or 0 for t in ordem], dtype=np.int64)
+    pct     = np.array([t.get("pct") or 0 for t in ordem], dtype=float)
+    marco   = np.array([bool(t.get("marco")) for t in ordem], dtype=bool)
+    recurso = np.array([bool((t.get("resources") or "").strip()) for t in ordem],
+                       dtype=bool)
+    inicios = [t.get("start") or "" for t in ordem]
+    fins    = [t.get("end") or "" for t in ordem]
+    tem_flag = any("isMilestone" in t for t in ordem)
+    ids     = [str(t.get("id")) for t in ordem]
+
+    def mascara(linhas) -> np.ndarray:
+        m = np.zeros(n, dtype=bool)
+        m[list(linhas)] = True
+        return m
+
+    # A linha de cada id é a última dele; com ids únicos (o normal) são todas, e
+    # folha é quem não tem bloco abaixo de si. Com id repetido, folha é o id que
+    # foi folha em alguma linha — como em g.folhas.
+    canonica = mascara(pos.values())
+    if len(pos) == n:
+        folha = np.asarray(g.fim) == np.arange(1, n + 1)
+    else:
+        folha = canonica & np.array([x in g.folhas for x in ids], dtype=bool)
+
+    # Por id, na linha que o representa (a última, como em g.por_id): o que
+    # vale para o id se vale para qualquer linha dele.
+    com_pred = mascara(pos[x] for x, t in zip(ids, ordem) if t.get("preds") and x in pos)
+    com_suc = mascara(pos[x] for x in g.sucessoras if x in pos)
+
+    # Resumo que é sucessora, ou tarefa cuja predecessora é resumo — as
+    # sucessoras de cada resumo, que o grafo já tem.
+    resumo = canonica & ~folha
+    dep_resumo = com_pred & resumo
+    dep_resumo[[pos[x] for i in np.flatnonzero(resumo)
+                for x in g.sucessoras.get(ids[i], ()) if x in pos]] = True
 
     # A primeira tarefa não precisa de predecessora; quem termina junto com o
     # projeto não precisa de sucessora. Além dessas isenções estruturais, cada
@@ -169,65 +217,57 @@ def _medir(tarefas: list[dict]) -> dict:
     # do Contrato" de um segundo lote) e fecha uma etapa antes do fim ("Término
     # do Projeto" de uma fase). Uma dessas não é erro de amarração; da segunda
     # em diante é, e aí conta.
-    sem_pred = _tolerar({x for x in folhas if x not in com_pred},
-                        por_id, "start", isentas=1)   # a primeira do cronograma
-    sem_suc = _tolerar({x for x in folhas if x not in com_suc
-                        and (por_id[x].get("end") or "") != fim_projeto},
-                       por_id, "end")
+    inicio, fim = _ordem_das_datas(inicios), _ordem_das_datas(fins)
+    fim_projeto = fim.max() if n else 0
+    sem_pred = _tolerar(np.flatnonzero(folha & ~com_pred), inicio,
+                        isentas=1)                     # a primeira do cronograma
+    sem_suc = _tolerar(np.flatnonzero(folha & ~com_suc & (fim != fim_projeto)), fim,
+                       decrescente=True)
 
     # Marco por intenção (flag do Project) que não tem duração zero. O flag só
     # existe em snapshot coletado depois de 14/08/26 — sem ele o KPI sai de fora
     # do score em vez de mentir um 100.
-    tem_flag = any("isMilestone" in t for t in tarefas)
-    marco_dur = {str(t["id"]) for t in tarefas
-                 if t.get("isMilestone") and not t.get("marco")} if tem_flag else set()
+    marco_dur = mascara(pos[x] for x, t in zip(ids, ordem)
+                        if tem_flag and t.get("isMilestone") and not t.get("marco")
+                        and x in pos)
 
     # Marco (duração zero) não é trabalho: marca o começo ou o fim de uma etapa,
     # e o lugar dele na EAP é o nível da etapa que ele delimita, não o nível 4.
     # Cobrar nível dele apontaria como defeito o cronograma bem montado.
-    fora_nivel = {x for x in folhas
-                  if (por_id[x].get("level") or 0) != NIVEL_TRABALHO
-                  and not por_id[x].get("marco")}
+    trabalho = folha & ~marco
+    fora_nivel = trabalho & (nivel != NIVEL_TRABALHO)
 
     # Pelo mesmo motivo o marco não tem a quem atribuir: fica de fora.
-    sem_recurso = {x for x in folhas
-                   if (por_id[x].get("level") or 0) == NIVEL_TRABALHO
-                   and not por_id[x].get("marco")
-                   and not (por_id[x].get("resources") or "").strip()}
-
-    caminhos = _caminhos(tarefas)
-    ofensores = {
-        "dep_resumo": {x: "; ".join(dict.fromkeys(motivos_resumo.get(x, [])))
-                       for x in dep_resumo},
-        "sem_sucessora": {
-            x: "ninguém depende dela: termina em %s e o atraso morre aí"
-               % _data_br(por_id[x].get("end")) for x in sem_suc},
-        "sem_predecessora": {
-            x: "nada antes dela na rede: começa em %s sem que ninguém a libere"
-               % _data_br(por_id[x].get("start")) for x in sem_pred},
-        "sem_recurso": {
-            x: 'campo Recursos vazio: o report sairia com "Responsável: não atribuído"'
-            for x in sem_recurso},
-        "marco_com_duracao": {
-            x: "marcado como marco no Project, mas com %d dia(s) de duração"
-               % (por_id[x].get("duracao") or 0) for x in marco_dur},
-        "fora_nivel4": {
-            x: "é trabalho e está no nível %s, direto dentro de \"%s\""
-               % (por_id[x].get("level"), caminhos[x][-1])
-               if caminhos[x] else
-               "é trabalho e está no nível %s, solta na raiz do cronograma"
-               % por_id[x].get("level")
-            for x in fora_nivel},
+    sem_recurso = trabalho & (nivel == NIVEL_TRABALHO) & ~recurso
+
+    # Folga total pelo CPM da rede (rede.Cpm), contra o término publicado do
+    # projeto. Um dia útil inteiro de tolerância: lag fracionado deixa resto.
+    # Concluída não entra — a data dela é passado, e não há o que segurar.
+    folga_neg = folha & (pct < 100) & mascara(
+        pos[x] for x, f in g.cpm.folga_total.items() if f <= -1)
+
+    linhas = {
+        "dep_resumo":        np.flatnonzero(dep_resumo),
+        "sem_sucessora":     sem_suc,
+        "sem_predecessora":  sem_pred,
+        "sem_recurso":       np.flatnonzero(sem_recurso),
+        "marco_com_duracao": np.flatnonzero(marco_dur),
+        "folga_negativa":    np.flatnonzero(folga_neg),
+        "fora_nivel4":       np.flatnonzero(fora_nivel),
     }
+    ofensores = {k: [ids[i] for i in v] for k, v in linhas.items()}
 
     return {
-        "base": len(folhas),
+        "base": len(g.folhas),
         "tem_flag_marco": tem_flag,
         "contagens": {k: len(v) for k, v in ofensores.items()},
         "ofensores": ofensores,
-        "por_id": por_id,
-        "linha": linha,
-        "caminhos": caminhos,
+        "grafo": g,
+        # A tarefa-resumo do projeto ocupa a linha 0 do Project, não a 1. Quando
+        # ela abre a lista (é o normal: o coletor a injeta como primeira), a
+        # posição no cronograma é o próprio índice; sem ela a numeração começa
+        # em 1.
+        "primeira": 0 if n and ordem[0].get("level") == 0 else 1,
     }
 
 
@@ -237,39 +277,63 @@ def _data_br(iso: str | None) -> str:
     return "/".join(reversed(iso.split("-"))) if iso else ""
 
 
-def _caminhos(tarefas: list[dict]) -> dict[str, list[str]]:
-    """Caminho na EAP de cada tarefa, sem o nome do projeto.
+def _motivo(m: dict, kpi_id: str, tid: str) -> str:
+    """Onde está o defeito de `tid` no KPI `kpi_id`, em uma frase.
 
-    A hierarquia do MSP é posicional — as filhas vêm logo depois da mãe, com
-    nível maior —, então uma pilha indexada pelo nível reconstrói o caminho.
-    Sem ele a lista não identifica nada: um cronograma tem dezenas de tarefas
-    chamadas "Análise" e "R00", e o nome sozinho não diz qual é qual.
+    É o que a tela usa para achar a tarefa: contar 49 dependências em resumo
+    não ajuda ninguém a achar as 49 no meio de 221 linhas do Project.
     """
-    caminhos: dict[str, list[str]] = {}
-    pilha: list[str] = []
-    for t in tarefas:
-        nivel = t.get("level") or 0
-        pilha = pilha[:nivel]
-        pilha.append(t.get("name") or "")
-        caminhos[str(t.get("id"))] = list(pilha[1:-1])   # [0] é o projeto
-    return caminhos
+    g = m["grafo"]
+    t = g.por_id[tid]
+    if kpi_id == "dep_resumo":
+        motivos = []
+        preds = t.get("preds") or []
+        if preds and tid not in g.folhas:
+            motivos.append("é um resumo e mesmo assim tem predecessora")
+        for pr in preds:
+            pid_pred = str(pr.get("id"))
+            if pid_pred in g.por_id and pid_pred not in g.folhas:
+                motivos.append('predecessora é o resumo "%s" (linha %d)'
+                               % (g.por_id[pid_pred].get("name") or "",
+                                  g.pos[pid_pred] + m["primeira"]))
+        return "; ".join(dict.fromkeys(motivos))
+    if kpi_id == "sem_sucessora":
+        return ("ninguém depende dela: termina em %s e o atraso morre aí"
+                % _data_br(t.get("end")))
+    if kpi_id == "sem_predecessora":
+        return ("nada antes dela na rede: começa em %s sem que ninguém a libere"
+                % _data_br(t.get("start")))
+    if kpi_id == "sem_recurso":
+        return 'campo Recursos vazio: o report sairia com "Responsável: não atribuído"'
+    if kpi_id == "marco_com_duracao":
+        return ("marcado como marco no Project, mas com %d dia(s) de duração"
+                % (t.get("duracao") or 0))
+    if kpi_id == "folga_negativa":
+        return ("folga de %s dia(s) útil(eis): pelos vínculos, o que vem depois dela "
+                "não cabe até o término do projeto"
+                % ("%g" % g.cpm.folga_total[tid]).replace(".", ","))
+    caminho = g.caminhos[tid]       # fora_nivel4
+    if caminho:
+        return ("é trabalho e está no nível %s, direto dentro de \"%s\""
+                % (t.get("level"), caminho[-1]))
+    return "é trabalho e está no nível %s, solta na raiz do cronograma" % t.get("level")
 
 
 def _itens(m: dict, kpi_id: str) -> list[dict]:
     """As tarefas apontadas por um KPI, na ordem em que estão no cronograma."""
-    por_id, linha, caminhos = m["por_id"], m["linha"], m["caminhos"]
+    g = m["grafo"]
     itens = []
-    for tid, motivo in m["ofensores"][kpi_id].items():
-        t = por_id[tid]
+    for tid in m["ofensores"][kpi_id]:
+        t = g.por_id[tid]
         itens.append({
-            "linha": linha[tid],
+            "linha": g.pos[tid] + m["primeira"],
             "nome": t.get("name") or "",
-            "eap": " › ".join(caminhos.get(tid) or []) or "—",
+            "eap": " › ".join(g.caminhos.get(tid) or []) or "—",
             "nivel": t.get("level"),
             "inicio": t.get("start"),
             "fim": t.get("end"),
             "recurso": (t.get("resources") or "").strip(),
-            "motivo": motivo,
+            "motivo": _motivo(m, kpi_id, tid),
         })
     return sorted(itens, key=lambda i: i["linha"])
 
@@ -277,14 +341,15 @@ def _itens(m: dict, kpi_id: str) -> list[dict]:
 # ── API do módulo ─────────────────────────────────────────────────────────────
 
 def analisar(tarefas: list[dict], nome: str = "", pid: str = "",
-             detalhar: bool = True) -> dict:
+             detalhar: bool = True, grafo: rede.Grafo | None = None) -> dict:
     """Análise completa de um cronograma: KPIs, notas e score total.
 
     `detalhar` traz junto a lista das tarefas apontadas por cada KPI. O painel
     geral analisa a carteira inteira só para desenhar o mapa de calor e não usa
     essas listas — nele sai `False` para não montar milhares de linhas à toa.
+    `grafo` é o rede.Grafo das mesmas tarefas, se quem chama já o tem.
     """
-    m = _medir(tarefas)
+    m = _medir(tarefas, grafo)
     base = m["base"]
 
     kpis = []
@@ -333,7 +398,11 @@ def resumo(tarefas: list[dict], nome: str = "", pid: str = "") -> dict:
     calor e o radar que compara os melhores com os piores; sem isso seria uma
     chamada por projeto só para desenhar a comparação.
     """
-    a = analisar(tarefas, nome, pid, detalhar=False)
+    return resumo_de(analisar(tarefas, nome, pid, detalhar=False))
+
+
+def resumo_de(a: dict) -> dict:
+    """O resumo do painel a partir de uma análise já feita (detalhada ou não)."""
     notas = [{"id": k["id"], "nome": k["nome"], "nota": k["nota"],
               "qtd": k["qtd"], "taxa": k["taxa"]} for k in a["kpis"]]
     avaliados = [k for k in notas if k["nota"] is not None]
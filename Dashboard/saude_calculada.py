@@ -0,0 +1,146 @@
+"""
+saude_calculada.py — A análise de saúde de cada projeto, já calculada.
+
+O painel de saúde analisava a carteira inteira a cada abertura, e o resultado só
+muda quando muda o cronograma — três vezes por dia, no máximo, e só nos
+projetos republicados. Quem calcula agora é o fetcher, logo depois de gravar as
+tarefas; o app lê, e só calcula o que faltar.
+
+data/saude_<pid>.json guarda a análise completa (a da tela de um projeto, com a
+lista das tarefas apontadas) e o resumo do painel geral, montado a partir dela.
+Os dois saem da mesma passada: o resumo é um recorte da análise, não uma
+segunda análise.
+
+A análise do app para o painel geral sai sem a lista (`detalhada` False): ali
+só se contam as tarefas, e montar o motivo de cada uma é o que mais custa. A
+tela do projeto pede a detalhada e, se só houver a outra, analisa de novo. O
+fetcher sempre grava a detalhada.
+
+Cada análise vale para UMA publicação do cronograma e UM conjunto de regras: a
+chave é (pid, publicadoEm, regras), onde `regras` é o hash das definições de
+saude.py (KPIS, TOLERANCIA_PONTA, NIVEL_TRABALHO, FAIXAS, VERSAO). Republicou,
+ou mudou um peso, um limite, um texto de KPI — a análise guardada deixa de
+valer e é refeita por quem a pedir primeiro: o fetcher no próximo run ou o app
+na próxima abertura do painel. Mudança na LÓGICA de saude.py não aparece no
+hash; quem a fizer sobe saude.VERSAO.
+
+O nome do projeto guardado aqui é o da coleta. Renomear projeto no PWA não
+republica o cronograma, então quem exibe deve preferir o nome do projects.json.
+
+Importa `saude` só na hora de calcular: quem chamar calcular() precisa ter
+saude/ e comparador/ no sys.path (app.py e fetcher.py já inserem).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def caminho(pid: str) -> Path:
+    return DATA_DIR / f"saude_{pid}.json"
+
+
+def regras() -> str:
+    """Hash curto das definições que decidem o resultado da análise."""
+    import saude
+
+    definicao = {"versao": saude.VERSAO, "kpis": saude.KPIS,
+                 "tolerancia": saude.TOLERANCIA_PONTA,
+                 "nivel": saude.NIVEL_TRABALHO, "faixas": saude.FAIXAS}
+    bruto = json.dumps(definicao, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()[:12]
+
+
+def vale(conteudo: dict | None, publicado_em: str | None,
+         detalhada: bool = True) -> bool:
+    """A análise guardada ainda retrata esta publicação com as regras de hoje?
+
+    Projeto sem publicadoEm casa com análise sem publicadoEm: o fetcher recoleta
+    esses projetos em todo run e recalcula junto, então a análise nunca fica
+    mais velha que um run. Com `detalhada`, a sem lista de tarefas não serve.
+    """
+    return (conteudo is not None
+            and conteudo.get("publicadoEm") == publicado_em
+            and conteudo.get("regras") == regras()
+            and (not detalhada or conteudo.get("detalhada", True)))
+
+
+def carregar(pid: str) -> dict | None:
+    """{pid, publicadoEm, regras, calculadoEm, analise, resumo} — None se não há.
+
+    Arquivo ilegível é tratado como ausente: quem lê recalcula na hora.
+    """
+    p = caminho(pid)
+    if not p.exists():
+        return None
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception as exc:
+        logger.warning("saude_%s.json ilegível (%s) — será recalculado.", pid[:8], exc)
+        return None
+
+
+def calcular(pid: str, tarefas, nome: str = "", publicado_em: str | None = None,
+             grafo=None, detalhar: bool = True) -> dict:
+    """Analisa o cronograma e grava o resultado. Devolve o que foi gravado.
+
+    `grafo` é o rede.Grafo de `tarefas`, se quem chama já o tem. Sem
+    `detalhar`, a análise sai sem a lista das tarefas apontadas.
+    """
+    import saude
+
+    analise = saude.analisar(tarefas, nome, pid, detalhar=detalhar, grafo=grafo)
+    conteudo = {
+        "pid":         pid,
+        "publicadoEm": publicado_em,
+        "regras":      regras(),
+        "detalhada":   detalhar,
+        "calculadoEm": datetime.now().isoformat(timespec="seconds"),
+        "analise":     analise,
+        "resumo":      saude.resumo_de(analise),
+    }
+    _gravar(pid, conteudo)
+    return conteudo
+
+
+def _gravar(pid: str, conteudo: dict) -> None:
+    DATA_DIR.mkdir(exist_ok=True)
+    alvo = caminho(pid)
+    # O fetcher e o app (em mais de uma thread) podem gravar a mesma análise
+    # ao mesmo tempo: cada um escreve o seu .tmp, e o replace decide quem fica.
+    fd, tmp = tempfile.mkstemp(dir=DATA_DIR, prefix=alvo.name + ".", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        # dumps, não dump: o dump para arquivo usa o codificador em Python puro
+        # (iterencode), e a análise detalhada tem milhares de itens.
+        f.write(json.dumps(conteudo, ensure_ascii=False))
+    os.replace(tmp, alvo)
+
+
+def rechavear(pid: str, publicado_em: str | None) -> bool:
+    """Passa a análise guardada para outra publicação, sem refazê-la.
+
+    Para republicação que não mexeu em nenhuma tarefa: o cronograma é o mesmo,
+    então a análise também. Só vale com as regras de hoje — se elas mudaram,
+    devolve False e a análise é refeita como qualquer outra.
+    """
+    conteudo = carregar(pid)
+    if conteudo is None or conteudo.get("regras") != regras():
+        return False
+    if conteudo.get("publicadoEm") != publicado_em:
+        conteudo["publicadoEm"] = publicado_em
+        _gravar(pid, conteudo)
+    return True
+
+
+def remover(pid: str) -> None:
+    """Descarta a análise guardada — ela não corresponde mais ao snapshot."""
+    caminho(pid).unlink(missing_ok=True)
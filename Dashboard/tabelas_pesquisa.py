@@ -0,0 +1,159 @@
+"""
+tabelas_pesquisa.py — As tabelas de pesquisa do PWA num índice SQLite em disco.
+
+Os custom fields de lista (Cliente, Cidade, Coordenador...) chegam como
+"Entry_<id>", e o texto de cada entry está nas LookupTables. Antes o cache era
+um JSON com todas as entries, relido inteiro a cada processo e rebaixado
+inteiro do servidor a cada 7 dias ou à primeira entry desconhecida.
+
+Aqui cada entry é uma linha indexada pelo id, com a tabela a que pertence; quem
+consulta lê só a linha pedida (e a guarda em memória). Cada tabela tem a data
+em que foi baixada e uma assinatura do conteúdo, então pode ser atualizada
+sozinha. E o índice aprende, pelas entries que resolve, qual tabela serve cada
+custom field: é isso que deixa o pwa_client rebaixar só a tabela de um campo
+(entry nova) ou só as tabelas em uso que venceram.
+
+Só guarda; quem fala com o servidor é o pwa_client. Caminho ":memory:" dá um
+índice que não sobrevive ao processo (gravação de cassete).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tabela (
+    id         TEXT PRIMARY KEY,
+    nome       TEXT NOT NULL,
+    entradas   INTEGER NOT NULL,
+    assinatura TEXT NOT NULL,
+    baixada_em TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entrada (
+    id     TEXT PRIMARY KEY,          -- sem hifens, como vem no Entry_<id>
+    tabela TEXT NOT NULL,
+    valor  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entrada_por_tabela ON entrada (tabela);
+CREATE TABLE IF NOT EXISTS campo (
+    cf     TEXT PRIMARY KEY,          -- id do custom field, com hifens
+    tabela TEXT NOT NULL
+);
+"""
+
+
+def assinatura(entradas: dict[str, str]) -> str:
+    """Hash curto do conteúdo de uma tabela: muda se mudar qualquer entry."""
+    bruto = json.dumps(sorted(entradas.items()), ensure_ascii=False)
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()[:16]
+
+
+class Indice:
+    """O índice aberto. A conexão só é aberta na primeira consulta."""
+
+    def __init__(self, caminho: str | Path):
+        self.caminho = str(caminho)
+        self._con: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._valores: dict[str, tuple[str, str]] = {}   # id → (valor, tabela)
+        self._campos: dict[str, str] | None = None
+
+    def _abrir(self) -> sqlite3.Connection:
+        if self._con is None:
+            if self.caminho != ":memory:":
+                Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+            # O fetcher pode rodar dentro do app (outra thread); o lock serializa.
+            self._con = sqlite3.connect(self.caminho, timeout=30,
+                                        check_same_thread=False)
+            self._con.executescript(ESQUEMA)
+        return self._con
+
+    def vazio(self) -> bool:
+        with self._lock:
+            return self._abrir().execute("SELECT 1 FROM tabela LIMIT 1").fetchone() is None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._abrir().execute("SELECT COUNT(*) FROM entrada").fetchone()[0]
+
+    def valor(self, eid: str) -> tuple[str, str] | None:
+        """(FullValue, id da tabela) da entry `eid`, ou None se não há."""
+        achado = self._valores.get(eid)
+        if achado is None:
+            with self._lock:
+                linha = self._abrir().execute(
+                    "SELECT valor, tabela FROM entrada WHERE id = ?", (eid,)).fetchone()
+            if linha is None:
+                return None
+            achado = self._valores[eid] = tuple(linha)
+        return achado
+
+    def gravar(self, tabelas: list[tuple[str, str, dict[str, str]]],
+               substituir_tudo: bool = False) -> list[str]:
+        """Grava (id, nome, {entry: valor}) de cada tabela. Devolve as que mudaram.
+
+        `substituir_tudo` apaga antes as tabelas que não vieram — é a carga
+        completa. Sem ele, só as tabelas passadas são trocadas.
+        """
+        agora = datetime.now().isoformat(timespec="seconds")
+        mudaram = []
+        with self._lock:
+            con = self._abrir()
+            with con:
+                if substituir_tudo:
+                    con.execute("DELETE FROM entrada")
+                    con.execute("DELETE FROM tabela")
+                for tid, nome, entradas in tabelas:
+                    sig = assinatura(entradas)
+                    antes = con.execute("SELECT assinatura FROM tabela WHERE id = ?",
+                                        (tid,)).fetchone()
+                    if antes is None or antes[0] != sig:
+                        mudaram.append(tid)
+                    # Reescreve mesmo sem mudança: a tabela baixada é a verdade,
+                    # e são dezenas de linhas.
+                    con.execute("DELETE FROM entrada WHERE tabela = ?", (tid,))
+                    con.executemany(
+                        "INSERT OR REPLACE INTO entrada (id, tabela, valor) VALUES (?, ?, ?)",
+                        [(eid, tid, v) for eid, v in entradas.items()])
+                    con.execute(
+                        "INSERT OR REPLACE INTO tabela "
+                        "(id, nome, entradas, assinatura, baixada_em) VALUES (?, ?, ?, ?, ?)",
+                        (tid, nome, len(entradas), sig, agora))
+            self._valores.clear()
+        return mudaram
+
+    def ligar(self, cf: str, tabela: str) -> None:
+        """Anota que o custom field `cf` usa a tabela `tabela`."""
+        if self.campos().get(cf) == tabela:
+            return
+        with self._lock:
+            con = self._abrir()
+            with con:
+                con.execute("INSERT OR REPLACE INTO campo (cf, tabela) VALUES (?, ?)",
+                            (cf, tabela))
+            self._campos[cf] = tabela
+
+    def campos(self) -> dict[str, str]:
+        """Custom field → tabela, do que já foi aprendido."""
+        if self._campos is None:
+            with self._lock:
+                self._campos = dict(self._abrir().execute("SELECT cf, tabela FROM campo"))
+        return self._campos
+
+    def vencidas(self, validade: timedelta) -> list[str]:
+        """Tabelas ligadas a algum custom field e baixadas há mais de `validade`."""
+        limite = (datetime.now() - validade).isoformat(timespec="seconds")
+        with self._lock:
+            return [t for (t,) in self._abrir().execute(
+                "SELECT DISTINCT t.id FROM tabela t JOIN campo c ON c.tabela = t.id "
+                "WHERE t.baixada_em < ?", (limite,))]
+
+    def fechar(self) -> None:
+        with self._lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
@@ -0,0 +1,174 @@
+"""
+telemetria.py — Tempos de cada run do fetcher, guardados run a run.
+
+O last_update.json só guarda o último run, e o fetcher.log é texto corrido:
+não dava para ver se a coleta ficou mais lenta no mês, nem qual projeto pesa
+mais nela. Aqui cada run vira UMA linha de data/telemetria.jsonl:
+
+  {"run": ..., "inicio": ..., "ok": true, "total_s": 41.2,
+   "fases": {"autenticacao": 0.3, "projetos": 2.1, "tarefas": 35.0, ...},
+   "projetos": [{"pid", "nome", "s", "espera_s", "gravacao_s", "bytes",
+                 "requisicoes", "tentativas", "tarefas", "erro"}, ...]}
+
+  - fases: quanto cada passo do main() levou, de parede.
+  - por projeto: `s` do início da primeira tentativa ao fim da gravação;
+    `espera_s` é o tempo esperando vaga do governador (fila), somado nas
+    tentativas; `bytes` e `requisicoes` são os do pwa_client (pwa_client.medir).
+
+Só os últimos RETER runs ficam — o arquivo é aparado quando passa disso em um
+quarto. Quem lê é o app (/api/telemetria) e o próprio fetcher, que ordena a
+fila pelo tempo medido de cada projeto (duracoes).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent / "data"
+ARQUIVO  = "telemetria.jsonl"
+RETER    = 300      # runs guardados (~3 meses a 3 runs por dia)
+
+
+def caminho() -> Path:
+    return DATA_DIR / ARQUIVO
+
+
+class Run:
+    """O que um run do fetcher mede, até ser gravado."""
+
+    def __init__(self, run_id: str):
+        self.run_id   = run_id
+        self.inicio   = time.time()
+        self.fases: dict[str, float] = {}
+        self.projetos: list[dict] = []
+        self._marca   = time.perf_counter()
+
+    def marcar(self, fase: str) -> None:
+        """Fecha `fase`: o tempo dela é o decorrido desde a marca anterior."""
+        agora = time.perf_counter()
+        self.fases[fase] = round(agora - self._marca, 3)
+        self._marca = agora
+
+    def projeto(self, **medida) -> None:
+        self.projetos.append(medida)
+
+    def gravar(self, ok: bool, **extra) -> None:
+        """Anexa o run ao arquivo. Falha de disco só vira WARNING."""
+        linha = {
+            "run":      self.run_id,
+            "inicio":   datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+            "ok":       ok,
+            "total_s":  round(time.time() - self.inicio, 2),
+            "fases":    self.fases,
+            "projetos": self.projetos,
+            **extra,
+        }
+        try:
+            DATA_DIR.mkdir(exist_ok=True)
+            with open(caminho(), "a", encoding="utf-8") as f:
+                f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+            _aparar()
+        except OSError as exc:
+            logger.warning("Telemetria do run não gravada: %s", exc)
+
+
+def _aparar() -> None:
+    """Deixa só os últimos RETER runs, se o arquivo passou deles em 25%."""
+    with open(caminho(), encoding="utf-8") as f:
+        linhas = f.readlines()
+    if len(linhas) <= RETER * 5 // 4:
+        return
+    tmp = caminho().with_suffix(".jsonl.tmp")
+    tmp.write_text("".join(linhas[-RETER:]), encoding="utf-8")
+    os.replace(tmp, caminho())
+
+
+def carregar(ultimos: int | None = None) -> list[dict]:
+    """Os runs gravados, do mais antigo ao mais novo. Linha ilegível é pulada."""
+    try:
+        with open(caminho(), encoding="utf-8") as f:
+            linhas = f.readlines()
+    except FileNotFoundError:
+        return []
+    runs = []
+    for linha in linhas[-ultimos:] if ultimos else linhas:
+        try:
+            runs.append(json.loads(linha))
+        except ValueError:
+            continue
+    return runs
+
+
+def servico(p: dict) -> float | None:
+    """Tempo de serviço de uma coleta — `s` sem a espera por vaga —, ou None se
+    ela não mede o projeto.
+
+    Não medem: a que falhou (mede o timeout) e a que voltou sem mudança (304
+    ou payload igual), que não baixou nem gravou as tarefas — e as `tarefas`
+    dela são as da coleta anterior, não as que passaram pelo fio.
+    """
+    if p.get("erro") or p.get("sem_mudanca") or p.get("s") is None:
+        return None
+    return p["s"] - (p.get("espera_s") or 0)
+
+
+def duracoes(runs: list[dict] | None = None, janela: int = 3) -> dict[str, float]:
+    """Segundos que cada projeto costuma levar: mediana das `janela` últimas coletas.
+
+    O tempo é o de serviço (ver servico) — sem a espera por vaga, que depende
+    de onde o projeto caiu na fila e não dele. Só coleta que baixou as
+    tarefas conta.
+    """
+    runs = carregar(RETER) if runs is None else runs
+    medidas: dict[str, list[float]] = {}
+    for run in runs:
+        for p in run.get("projetos") or []:
+            s = servico(p)
+            if s is not None:
+                medidas.setdefault(p["pid"], []).append(s)
+    return {pid: round(statistics.median(s[-janela:]), 3) for pid, s in medidas.items()}
+
+
+def painel(ultimos: int = 60, projetos: int = 12) -> dict:
+    """O que o /api/telemetria devolve: os runs resumidos e os projetos mais lentos.
+
+    `runs`: fases, total e somas por run. `lentos`: os `projetos` de maior
+    tempo mediano, com o tempo de cada um run a run (None onde não coletou).
+    """
+    runs = carregar(ultimos)
+    resumo = []
+    for r in runs:
+        ps = r.get("projetos") or []
+        resumo.append({
+            "run":       r.get("run"),
+            "inicio":    r.get("inicio"),
+            "ok":        r.get("ok"),
+            "total_s":   r.get("total_s"),
+            "fases":     r.get("fases") or {},
+            "coletados": sum(1 for p in ps if not p.get("erro")),
+            "falhas":    sum(1 for p in ps if p.get("erro")),
+            "bytes":     sum(p.get("bytes") or 0 for p in ps),
+            "espera_s":  round(sum(p.get("espera_s") or 0 for p in ps), 2),
+        })
+    tipicos = duracoes(runs)
+    nomes = {p["pid"]: p.get("nome", "") for r in runs for p in r.get("projetos") or []}
+    lentos = sorted(tipicos, key=tipicos.get, reverse=True)[:projetos]
+    series = []
+    for pid in lentos:
+        por_run = {r.get("run"): p for r in runs for p in r.get("projetos") or []
+                   if p["pid"] == pid}
+        series.append({
+            "pid":    pid,
+            "nome":   nomes.get(pid, ""),
+            "tipico": round(tipicos[pid], 2),
+            "s":      [(por_run.get(r.get("run")) or {}).get("s") for r in runs],
+            "espera": [(por_run.get(r.get("run")) or {}).get("espera_s") for r in runs],
+        })
+    return {"runs": resumo, "lentos": series}